@@ -4,12 +4,22 @@ Application Flask pour la présentation des post-mortems SRE
 Interface web pour visualiser les post-mortems avec un format structuré
 """
 
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, Response, render_template, jsonify, request, stream_with_context
 import json
 import os
+import threading
 from datetime import datetime
 import logging
 
+from http_cache import VariantCache, compress_response, conditional_response
+from postmortem_analytics import IncidentAnalytics
+from postmortem_index import FILTER_FIELDS, PostmortemIndex, VersionConflict
+from postmortem_ndjson import IMPORT_BATCH_SIZE, export_lines, import_lines, iter_lines
+from postmortem_search import SearchIndex
+from postmortem_similar import SimilarityIndex
+from postmortem_sqlite import SQLitePostmortemStore
+from postmortem_watcher import PostmortemWatcher
+
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -17,42 +27,109 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 
 # Configuration
-POSTMORTEM_DIR = "data/postmortems"
+POSTMORTEM_DIR = os.environ.get('POSTMORTEM_DIR', "data/postmortems")
+# Backend de stockage: 'file' (un JSON par post-mortem) ou 'sqlite' (JSON + FTS5)
+STORAGE_BACKEND = os.environ.get('POSTMORTEM_BACKEND', 'file')
+POSTMORTEM_DB = os.environ.get('POSTMORTEM_DB', 'data/postmortems.db')
+# Surveillance du répertoire en arrière-plan (backend 'file'); sinon parcours à la demande
+POSTMORTEM_WATCH = os.environ.get('POSTMORTEM_WATCH', '1') == '1'
 TEMPLATE_DIR = "templates"
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+def create_storage(backend):
+    """Stockage des post-mortems et fonction de recherche associée"""
+    if backend == 'sqlite':
+        store = SQLitePostmortemStore(POSTMORTEM_DB)
+        return store, store.search
+    if backend != 'file':
+        raise ValueError(f"Backend de stockage inconnu: {backend}")
+
+    # Index en mémoire: résumés rafraîchis par mtime, documents complets en LRU,
+    # et index plein texte tenu à jour à chaque ajout ou modification détecté
+    index = PostmortemIndex(POSTMORTEM_DIR)
+    search_index = SearchIndex()
+    index.subscribe(search_index.update)
+    return index, search_index.search
+
+storage, search_postmortems = create_storage(STORAGE_BACKEND)
+
+# Corps rendus et compressés par (id, version du document, version des templates)
+response_cache = VariantCache(max_bytes=int(os.environ.get('POSTMORTEM_RENDER_CACHE_MB', '64')) * 1024 * 1024)
+
+def invalidate_renders(postmortem_id, postmortem):
+    """Libère les rendus d'un post-mortem créé, modifié ou supprimé"""
+    for kind in ('html', 'json'):
+        response_cache.invalidate((kind, postmortem_id))
+
+storage.subscribe(invalidate_renders, replay=False)
+
+# Statistiques d'incidents mises à jour à chaque écriture, sans relire l'archive
+analytics = IncidentAnalytics()
+storage.subscribe(analytics.update)
+
+# Vecteurs TF-IDF (causes racines, timeline) des incidents similaires, précalculés au démarrage
+similarity = SimilarityIndex()
+storage.subscribe(similarity.update)
+similarity.rebuild()
+
+# Fichiers déposés hors application (copy_postmortems.py, kubectl cp, git) appliqués à l'index
+# par un thread dédié: les requêtes ne parcourent plus le répertoire
+watcher = None
+watcher_lock = threading.Lock()
+
+@app.before_request
+def start_watcher():
+    """Démarre la surveillance du répertoire à la première requête (aucun thread lancé à l'import)"""
+    global watcher
+    if watcher is not None or STORAGE_BACKEND != 'file' or not POSTMORTEM_WATCH:
+        return
+    with watcher_lock:
+        if watcher is None:
+            watcher = PostmortemWatcher(storage).start()
+            storage.refresh_interval = float('inf')
+
+# Compression gzip/br des autres réponses volumineuses
+app.after_request(compress_response)
 
 def load_postmortem(postmortem_id):
-    """Charge un post-mortem depuis le fichier JSON"""
-    try:
-        file_path = os.path.join(POSTMORTEM_DIR, f"{postmortem_id}.json")
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except FileNotFoundError:
+    """Charge un post-mortem (relu depuis le fichier JSON seulement s'il a changé)"""
+    postmortem = storage.get(postmortem_id)
+    if postmortem is None:
         logger.error(f"Post-mortem {postmortem_id} non trouvé")
+    return postmortem
+
+def scan_template_version():
+    """Dernière modification des templates (un changement de base.html invalide toutes les pages)"""
+    with os.scandir(os.path.join(app.root_path, app.template_folder)) as entries:
+        return max((entry.stat().st_mtime_ns for entry in entries if entry.name.endswith('.html')), default=0)
+
+# Templates figés au démarrage: le répertoire n'est relu que s'ils sont rechargés à chaud (debug)
+TEMPLATE_VERSION = scan_template_version()
+
+def template_version():
+    """Version des templates, sans parcours du répertoire hors rechargement à chaud"""
+    if app.debug or app.config['TEMPLATES_AUTO_RELOAD']:
+        return scan_template_version()
+    return TEMPLATE_VERSION
+
+def document_response(kind, postmortem_id, build, mimetype):
+    """Réponse conditionnelle (ETag, Last-Modified, 304) d'un post-mortem, ou None s'il n'existe pas"""
+    version = storage.version_of(postmortem_id)
+    if version is None:
         return None
-    except json.JSONDecodeError as e:
-        logger.error(f"Erreur de parsing JSON pour {postmortem_id}: {e}")
-        return None
+    # Le premier élément de la version est la date de modification en nanosecondes
+    modified_ns = version[0]
+    if kind == 'html':
+        # Page rendue: modifiée aussi quand un template change
+        version = (*version, template_version())
+        modified_ns = max(modified_ns, version[-1])
+    return conditional_response(response_cache, (kind, postmortem_id), version, modified_ns / 1e9,
+                                build, mimetype)
 
 def list_postmortems():
     """Liste tous les post-mortems disponibles"""
-    postmortems = []
-    if os.path.exists(POSTMORTEM_DIR):
-        for filename in os.listdir(POSTMORTEM_DIR):
-            if filename.endswith('.json'):
-                postmortem_id = filename[:-5]  # Enlever .json
-                try:
-                    postmortem = load_postmortem(postmortem_id)
-                    if postmortem:
-                        postmortems.append({
-                            'id': postmortem_id,
-                            'title': postmortem.get('title', 'Sans titre'),
-                            'incident_date': postmortem.get('incident_date', ''),
-                            'status': postmortem.get('status', 'Brouillon'),
-                            'published': postmortem.get('published', '')
-                        })
-                except Exception as e:
-                    logger.error(f"Erreur lors du chargement de {postmortem_id}: {e}")
-    return sorted(postmortems, key=lambda x: x.get('incident_date', ''), reverse=True)
+    return storage.list()
 
 @app.route('/')
 def index():
@@ -63,26 +140,130 @@ def index():
 @app.route('/postmortem/<postmortem_id>')
 def view_postmortem(postmortem_id):
     """Page de visualisation d'un post-mortem spécifique"""
-    postmortem = load_postmortem(postmortem_id)
-    if not postmortem:
+    response = document_response(
+        'html', postmortem_id,
+        lambda: render_template('postmortem.html', postmortem=load_postmortem(postmortem_id)),
+        'text/html'
+    )
+    if response is None:
+        logger.error(f"Post-mortem {postmortem_id} non trouvé")
         return render_template('error.html', 
                              message=f"Post-mortem '{postmortem_id}' non trouvé"), 404
     
-    return render_template('postmortem.html', postmortem=postmortem)
+    return response
 
 @app.route('/api/postmortems')
 def api_list_postmortems():
-    """API pour lister les post-mortems"""
-    postmortems = list_postmortems()
-    return jsonify(postmortems)
+    """API pour lister les post-mortems (pagination par curseur, tri, filtres, projection)"""
+    limit = max(1, min(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE))
+    sort = request.args.get('sort', 'incident_date')
+    order = request.args.get('order', 'desc')
+    filters = {field: request.args[field] for field in FILTER_FIELDS if request.args.get(field)}
+    fields = [field for field in request.args.get('fields', '').split(',') if field]
+    if order not in ('asc', 'desc'):
+        return jsonify({'error': "Paramètre 'order' invalide (asc ou desc)"}), 400
+
+    try:
+        summaries, next_cursor = storage.query(
+            sort=sort,
+            descending=order == 'desc',
+            filters=filters,
+            date_from=request.args.get('from'),
+            date_to=request.args.get('to'),
+            cursor=request.args.get('cursor'),
+            limit=limit
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({
+        'items': [project(summary, fields) for summary in summaries],
+        'count': len(summaries),
+        'next_cursor': next_cursor
+    })
+
+def project(summary, fields):
+    """Champs demandés d'un post-mortem; le document complet n'est lu que hors résumé"""
+    if not fields:
+        return summary
+    if all(field in summary for field in fields):
+        return {'id': summary['id'], **{field: summary[field] for field in fields}}
+    postmortem = load_postmortem(summary['id']) or {}
+    return {'id': summary['id'], **{field: summary.get(field, postmortem.get(field)) for field in fields}}
 
 @app.route('/api/postmortem/<postmortem_id>')
 def api_get_postmortem(postmortem_id):
     """API pour récupérer un post-mortem spécifique"""
-    postmortem = load_postmortem(postmortem_id)
-    if not postmortem:
+    response = document_response(
+        'json', postmortem_id,
+        lambda: app.json.dumps(load_postmortem(postmortem_id)),
+        'application/json'
+    )
+    if response is None:
+        return jsonify({'error': 'Post-mortem non trouvé'}), 404
+    return response
+
+@app.route('/api/postmortem/<postmortem_id>/similar')
+def api_similar_postmortems(postmortem_id):
+    """API des incidents les plus proches d'un post-mortem (cosinus TF-IDF)"""
+    limit = max(1, min(request.args.get('limit', 5, type=int), 50))
+    storage.sync()
+    result = similarity.similar(postmortem_id, limit)
+    if result is None:
         return jsonify({'error': 'Post-mortem non trouvé'}), 404
-    return jsonify(postmortem)
+    return jsonify(result)
+
+@app.route('/api/similar')
+def api_suggest_similar():
+    """API de suggestion pendant la saisie: incidents proches d'un texte (causes, timeline)"""
+    text = request.args.get('q', '').strip()
+    if not text:
+        return jsonify({'error': "Paramètre 'q' requis"}), 400
+    limit = max(1, min(request.args.get('limit', 5, type=int), 50))
+    storage.sync()
+    return jsonify(similarity.suggest(text, limit))
+
+@app.route('/api/search')
+def api_search():
+    """API de recherche plein texte (BM25) dans les post-mortems"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': "Paramètre 'q' requis"}), 400
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+
+    # Prend en compte les fichiers ajoutés hors de l'application
+    storage.sync()
+    return jsonify(search_postmortems(query, limit))
+
+@app.route('/api/analytics')
+def api_analytics():
+    """Statistiques d'incidents: MTTR, fréquence par équipe, produit et mois, distribution des durées"""
+    storage.sync()
+    return jsonify(analytics.snapshot())
+
+@app.route('/api/export')
+def api_export():
+    """Export NDJSON en flux des post-mortems (filtres status, owner, from, to)"""
+    filters = {field: request.args[field] for field in FILTER_FIELDS if request.args.get(field)}
+    lines = export_lines(storage, filters, request.args.get('from'), request.args.get('to'))
+    return Response(lines, mimetype='application/x-ndjson',
+                    headers={'Content-Disposition': 'attachment; filename=postmortems.ndjson'})
+
+@app.route('/api/import', methods=['POST'])
+def api_import():
+    """Import NDJSON en flux, par lots; un résultat par ligne puis un bilan"""
+    batch_size = max(1, min(request.args.get('batch', IMPORT_BATCH_SIZE, type=int), 5000))
+
+    def results():
+        for result in import_lines(storage, iter_lines(request.stream), batch_size):
+            yield json.dumps(result, ensure_ascii=False) + '\n'
+
+    return Response(stream_with_context(results()), mimetype='application/x-ndjson')
+
+@app.route('/metrics')
+def metrics():
+    """Métriques Prometheus du cache de rendu (hits, misses, temps de rendu)"""
+    return Response(response_cache.metrics(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/create')
 def create_postmortem():
@@ -95,26 +276,43 @@ def api_create_postmortem():
     try:
         data = request.get_json()
         
-        # Générer un ID unique basé sur le timestamp
-        postmortem_id = f"incident_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        
         # Ajouter des métadonnées
         data['created_at'] = datetime.now().isoformat()
-        data['id'] = postmortem_id
         
-        # Sauvegarder le fichier
-        os.makedirs(POSTMORTEM_DIR, exist_ok=True)
-        file_path = os.path.join(POSTMORTEM_DIR, f"{postmortem_id}.json")
+        # Création atomique sous un ID horodaté unique (id et version ajoutés par le backend)
+        postmortem_id = storage.create(data)
+        # Version telle qu'enregistrée par le backend (celle à renvoyer lors de la mise à jour)
+        created = storage.get(postmortem_id)
         
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-        
-        return jsonify({'success': True, 'id': postmortem_id})
+        return jsonify({'success': True, 'id': postmortem_id,
+                        'version': created['version'] if created else None})
     
     except Exception as e:
         logger.error(f"Erreur lors de la création du post-mortem: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/postmortem/<postmortem_id>', methods=['PUT'])
+def api_update_postmortem(postmortem_id):
+    """API de mise à jour avec contrôle de concurrence optimiste (champ 'version' lu)"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Corps JSON attendu'}), 400
+    expected_version = data.get('version')
+    if not isinstance(expected_version, int):
+        return jsonify({'error': "Champ 'version' (entier) requis: version du document lu"}), 428
+
+    try:
+        version = storage.update(postmortem_id, data, expected_version)
+    except KeyError:
+        return jsonify({'error': 'Post-mortem non trouvé'}), 404
+    except VersionConflict as e:
+        return jsonify({'error': str(e), 'current_version': e.current}), 409
+    except Exception as e:
+        logger.error(f"Erreur lors de la mise à jour du post-mortem {postmortem_id}: {e}")
+        return jsonify({'error': str(e)}), 500
+
+    return jsonify({'success': True, 'id': postmortem_id, 'version': version})
+
 @app.errorhandler(404)
 def not_found(error):
     return render_template('error.html', message="Page non trouvée"), 404
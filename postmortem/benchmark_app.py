@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Benchmark de l'application post-mortems sur un corpus synthétique
+Pour chaque taille de corpus, génère les post-mortems, démarre app.py dans un processus
+dédié et le pilote avec le client de test Flask selon un mélange de routes (liste, vue,
+API, création, recherche); rapporte débit et latences p50/p99 par route, et compare à
+une référence pour détecter les régressions
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from synthetic_corpus import COMPONENTS, OWNERS, STATUSES, generate_corpus, synthetic_postmortem
+
+# Configuration du logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+SIZES = (100, 1000, 10000, 100000)
+
+# Route -> libellé du rapport
+ROUTES = {
+    'list': 'GET /',
+    'view': 'GET /postmortem/<id>',
+    'api_list': 'GET /api/postmortems',
+    'api_get': 'GET /api/postmortem/<id>',
+    'search': 'GET /api/search',
+    'similar': 'GET /api/postmortem/<id>/similar',
+    'suggest': 'GET /api/similar',
+    'analytics': 'GET /api/analytics',
+    'create': 'POST /api/create'
+}
+
+# Mélanges de trafic: route -> poids
+MIXES = {
+    'lecture': {'list': 2, 'view': 5, 'api_list': 3, 'api_get': 5},
+    'api': {'api_list': 4, 'api_get': 4, 'analytics': 1, 'similar': 1},
+    'recherche': {'search': 6, 'suggest': 2, 'similar': 2},
+    'ecriture': {'create': 4, 'api_get': 3, 'api_list': 3},
+    'mixte': {'list': 1, 'view': 4, 'api_list': 3, 'api_get': 4, 'search': 2, 'similar': 1, 'suggest': 1,
+              'analytics': 1, 'create': 1}
+}
+
+SEARCH_QUERIES = ['prometheus', 'redis timeout', 'certificat expiré', 'mise à jour échouée', 'saturation mémoire',
+                  'kafka réplication', 'erreurs 502 nginx', 'quota connexions', 'configuration erronée vault']
+SUGGEST_TEXTS = ["Le pool de connexions ne rendait pas les connexions en erreur après des timeouts",
+                 "La mise à jour automatique a échoué silencieusement pendant la nuit",
+                 "Les logs ont rempli le volume disque, rotation désactivée"]
+
+# En dessous de cet écart (ms), une hausse du p99 est du bruit de mesure
+REGRESSION_FLOOR_MS = 1.0
+
+
+def build_request(route: str, rng: random.Random, ids: List[str]) -> Tuple[str, str, Optional[Dict]]:
+    """Méthode, chemin et corps JSON d'une requête tirée pour une route"""
+    postmortem_id = rng.choice(ids)
+    if route == 'list':
+        return 'GET', '/', None
+    if route == 'view':
+        return 'GET', f"/postmortem/{postmortem_id}", None
+    if route == 'api_list':
+        params = rng.choice(['limit=50', f"limit=50&owner={rng.choice(OWNERS)}", f"limit=20&status={rng.choice(STATUSES)}",
+                             f"limit=50&from={rng.randint(2019, 2025)}&order=asc", 'limit=50&fields=title,status'])
+        return 'GET', f"/api/postmortems?{params}", None
+    if route == 'api_get':
+        return 'GET', f"/api/postmortem/{postmortem_id}", None
+    if route == 'search':
+        query = rng.choice(SEARCH_QUERIES + [component.lower() for component in COMPONENTS])
+        return 'GET', f"/api/search?q={query}", None
+    if route == 'similar':
+        return 'GET', f"/api/postmortem/{postmortem_id}/similar", None
+    if route == 'suggest':
+        return 'GET', f"/api/similar?q={rng.choice(SUGGEST_TEXTS)}", None
+    if route == 'analytics':
+        return 'GET', '/api/analytics', None
+    if route == 'create':
+        postmortem = synthetic_postmortem(rng.randint(0, 10 ** 6), rng)
+        del postmortem['id']
+        return 'POST', '/api/create', postmortem
+    raise ValueError(f"Route inconnue: {route}")
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Percentile (rang le plus proche) d'échantillons triés"""
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def run_size(size: int, mix: str, duration: float, warmup: int, backend: str, workdir: str, results):
+    """Processus d'un palier: corpus, démarrage de l'application, trafic mesuré"""
+    directory = os.path.join(workdir, f"corpus_{size}")
+    started = time.perf_counter()
+    ids = generate_corpus(directory, size)
+    logger.info(f"[INFO] {size} post-mortems générés en {time.perf_counter() - started:.1f}s")
+
+    os.environ['POSTMORTEM_DIR'] = directory
+    os.environ['POSTMORTEM_BACKEND'] = backend
+    os.environ['POSTMORTEM_DB'] = os.path.join(workdir, f"corpus_{size}.db")
+    if backend == 'sqlite':
+        from postmortem_sqlite import SQLitePostmortemStore
+        store = SQLitePostmortemStore(os.environ['POSTMORTEM_DB'])
+        store.import_directory(directory)
+        store.close()
+
+    # Import dans le processus du palier: l'application indexe le corpus à son chargement
+    started = time.perf_counter()
+    import app
+    startup = time.perf_counter() - started
+    client = app.app.test_client()
+    headers = {'Accept-Encoding': 'gzip'}
+
+    rng = random.Random(size)
+    routes, weights = zip(*MIXES[mix].items())
+    samples: Dict[str, List[float]] = {route: [] for route in routes}
+    errors: Counter = Counter()
+
+    def send(route: str) -> float:
+        method, path, body = build_request(route, rng, ids)
+        began = time.perf_counter()
+        response = client.open(path, method=method, json=body, headers=headers)
+        elapsed = time.perf_counter() - began
+        if response.status_code >= 400:
+            errors[route] += 1
+        elif route == 'create':
+            ids.append(response.get_json()['id'])
+        return elapsed
+
+    for i in range(warmup):
+        send(routes[i % len(routes)])
+
+    began = time.perf_counter()
+    deadline = began + duration
+    while time.perf_counter() < deadline:
+        route = rng.choices(routes, weights)[0]
+        samples[route].append(send(route))
+    elapsed = time.perf_counter() - began
+
+    report = {'documents': size, 'startup_s': round(startup, 3), 'elapsed_s': round(elapsed, 3),
+              'requests': sum(len(values) for values in samples.values()), 'routes': {}}
+    report['throughput'] = round(report['requests'] / elapsed, 1)
+    for route in routes:
+        values = sorted(samples[route])
+        if not values:
+            continue
+        report['routes'][ROUTES[route]] = {
+            'requests': len(values),
+            'throughput': round(len(values) / elapsed, 1),
+            'p50_ms': round(percentile(values, 0.5) * 1000, 3),
+            'p99_ms': round(percentile(values, 0.99) * 1000, 3),
+            'errors': errors[route]
+        }
+    results.put(report)
+
+
+def run_benchmark(sizes: List[int], mix: str, duration: float, warmup: int, backend: str,
+                  workdir: str) -> List[Dict]:
+    """Un processus par palier: chaque taille démarre une application neuve"""
+    reports = []
+    for size in sizes:
+        results = multiprocessing.Queue()
+        process = multiprocessing.Process(target=run_size,
+                                          args=(size, mix, duration, warmup, backend, workdir, results))
+        process.start()
+        process.join()
+        if process.exitcode != 0:
+            raise RuntimeError(f"Le palier de {size} post-mortems a échoué (code {process.exitcode})")
+        reports.append(results.get())
+        shutil.rmtree(os.path.join(workdir, f"corpus_{size}"), ignore_errors=True)
+    return reports
+
+
+def print_report(report: Dict):
+    """Tableau des latences et du débit d'un palier"""
+    print(f"\n{report['documents']} post-mortems: {report['throughput']} req/s sur {report['elapsed_s']}s "
+          f"({report['requests']} requêtes), démarrage {report['startup_s']}s")
+    print(f"{'Route':<36} {'Requêtes':>9} {'req/s':>9} {'p50 (ms)':>10} {'p99 (ms)':>10} {'Erreurs':>8}")
+    print("-" * 86)
+    for route, stats in report['routes'].items():
+        print(f"{route:<36} {stats['requests']:>9} {stats['throughput']:>9.1f} {stats['p50_ms']:>10.3f} "
+              f"{stats['p99_ms']:>10.3f} {stats['errors']:>8}")
+
+
+def find_regressions(reports: List[Dict], baseline: List[Dict], tolerance: float) -> List[str]:
+    """Routes dont le p99 dépasse celui de la référence de plus de 'tolerance' (fraction)"""
+    previous = {report['documents']: report['routes'] for report in baseline}
+    regressions = []
+    for report in reports:
+        for route, stats in report['routes'].items():
+            reference = previous.get(report['documents'], {}).get(route)
+            if reference is None:
+                continue
+            limit = max(reference['p99_ms'] * (1 + tolerance), reference['p99_ms'] + REGRESSION_FLOOR_MS)
+            if stats['p99_ms'] > limit:
+                regressions.append(f"{route} ({report['documents']} documents): p99 {stats['p99_ms']:.3f} ms, "
+                                   f"référence {reference['p99_ms']:.3f} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de l'application post-mortems")
+    parser.add_argument('--sizes', default=','.join(str(size) for size in SIZES),
+                       help=f"Tailles de corpus séparées par des virgules (défaut: {','.join(map(str, SIZES))})")
+    parser.add_argument('--mix', choices=list(MIXES), default='mixte',
+                       help='Mélange de routes (défaut: mixte)')
+    parser.add_argument('--duration', type=float, default=10.0,
+                       help='Durée de mesure par palier en secondes (défaut: 10)')
+    parser.add_argument('--warmup', type=int, default=50,
+                       help='Requêtes de chauffe non mesurées (défaut: 50)')
+    parser.add_argument('--backend', choices=['file', 'sqlite'], default='file',
+                       help='Backend de stockage (défaut: file)')
+    parser.add_argument('--output',
+                       help='Fichier JSON où écrire les résultats (référence pour les prochains runs)')
+    parser.add_argument('--baseline',
+                       help='Résultats JSON de référence: code de sortie 1 si un p99 régresse')
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                       help='Hausse de p99 tolérée par rapport à la référence (défaut: 0.5)')
+    parser.add_argument('--workdir',
+                       help='Répertoire de travail (défaut: répertoire temporaire supprimé à la fin)')
+
+    args = parser.parse_args()
+
+    try:
+        sizes = [int(size) for size in args.sizes.split(',') if size]
+    except ValueError:
+        logger.error(f"[ERROR] Tailles invalides: {args.sizes}")
+        sys.exit(1)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='postmortem-app-bench-')
+    try:
+        reports = run_benchmark(sizes, args.mix, args.duration, args.warmup, args.backend, workdir)
+    except Exception as e:
+        logger.error(f"[ERROR] Erreur pendant le benchmark: {e}")
+        sys.exit(1)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    for report in reports:
+        print_report(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'mix': args.mix, 'backend': args.backend, 'reports': reports}, f, indent=2, ensure_ascii=False)
+        logger.info(f"[OK] Résultats écrits dans {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = find_regressions(reports, baseline['reports'], args.tolerance)
+        for regression in regressions:
+            logger.error(f"[ERROR] Régression: {regression}")
+        if regressions:
+            sys.exit(1)
+        logger.info(f"[OK] Aucune régression de p99 au-delà de {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark des backends de stockage des post-mortems
+Génère un corpus synthétique, l'importe dans les deux backends (fichiers JSON + index
+en mémoire, SQLite + FTS5) et compare les latences de liste, lecture et recherche
+"""
+
+import argparse
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from statistics import median
+from typing import Callable, Dict
+
+from postmortem_index import PostmortemIndex
+from postmortem_search import SearchIndex
+from postmortem_sqlite import SQLitePostmortemStore
+from synthetic_corpus import OWNERS, generate_corpus
+
+# Configuration du logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+QUERIES = ['prometheus', 'redis timeout', 'certificat expiré', 'mise à jour échouée', 'saturation mémoire',
+           'kafka réplication', 'erreurs 502 nginx', 'quota', 'configuration erronée vault']
+
+
+def measure(operation: Callable[[int], object], iterations: int) -> Dict[str, float]:
+    """Latences p50/p99/max en millisecondes"""
+    samples = []
+    for i in range(iterations):
+        started = time.perf_counter()
+        operation(i)
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        'p50': median(samples),
+        'p99': samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+        'max': samples[-1]
+    }
+
+
+def run_benchmark(documents: int, iterations: int, workdir: str) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Construit les deux backends sur le même corpus et mesure chaque opération"""
+    corpus_dir = os.path.join(workdir, 'postmortems')
+    started = time.perf_counter()
+    ids = generate_corpus(corpus_dir, documents)
+    logger.info(f"[INFO] Corpus de {documents} post-mortems généré en {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    index = PostmortemIndex(corpus_dir)
+    search_index = SearchIndex()
+    index.subscribe(search_index.update)
+    logger.info(f"[INFO] Backend fichiers indexé en {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    store = SQLitePostmortemStore(os.path.join(workdir, 'postmortems.db'))
+    imported, _ = store.import_directory(corpus_dir)
+    logger.info(f"[INFO] {imported} post-mortems importés dans SQLite en {time.perf_counter() - started:.1f}s")
+
+    rng = random.Random(7)
+    random_ids = [rng.choice(ids) for _ in range(iterations)]
+    backends = {
+        'file': (index, search_index.search),
+        'sqlite': (store, store.search)
+    }
+
+    results = {}
+    for name, (backend, search) in backends.items():
+        results[name] = {
+            'list (page 50)': measure(lambda i: backend.query(limit=50), iterations),
+            'list (filtre)': measure(lambda i: backend.query(filters={'owner': OWNERS[i % len(OWNERS)]},
+                                                             date_from='2022', limit=50), iterations),
+            'get': measure(lambda i: backend.get(random_ids[i]), iterations),
+            'search': measure(lambda i: search(QUERIES[i % len(QUERIES)], 20), iterations)
+        }
+    store.close()
+    return results
+
+
+def print_results(results: Dict[str, Dict[str, Dict[str, float]]]):
+    """Tableau comparatif des latences"""
+    print(f"\n{'Opération':<16} {'Backend':<8} {'p50 (ms)':>10} {'p99 (ms)':>10} {'max (ms)':>10}")
+    print("-" * 58)
+    operations = next(iter(results.values())).keys()
+    for operation in operations:
+        for backend, measures in results.items():
+            stats = measures[operation]
+            print(f"{operation:<16} {backend:<8} {stats['p50']:>10.3f} {stats['p99']:>10.3f} {stats['max']:>10.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark des backends de stockage des post-mortems')
+    parser.add_argument('--documents', type=int, default=10000,
+                       help='Nombre de post-mortems synthétiques (défaut: 10000)')
+    parser.add_argument('--iterations', type=int, default=500,
+                       help='Requêtes par opération (défaut: 500)')
+    parser.add_argument('--workdir',
+                       help='Répertoire de travail (défaut: répertoire temporaire supprimé à la fin)')
+
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='postmortem-bench-')
+    try:
+        print_results(run_benchmark(args.documents, args.iterations, workdir))
+    except Exception as e:
+        logger.error(f"[ERROR] Erreur pendant le benchmark: {e}")
+        sys.exit(1)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Requêtes conditionnelles, compression et cache de rendu pour l'application post-mortems
+ETags forts dérivés de la version des documents, Last-Modified et 304, corps rendus
+puis compressés (gzip/br selon Accept-Encoding) mis en cache par version, avec métriques
+"""
+
+import gzip
+import hashlib
+import threading
+import time
+from collections import Counter, OrderedDict
+from email.utils import formatdate
+from typing import Callable, Dict, List, Optional, Tuple
+
+from flask import Response, request
+
+# Import brotli seulement si disponible
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# En dessous, la compression coûte plus qu'elle ne rapporte
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/html', 'text/plain', 'text/css', 'application/javascript')
+
+# Buckets (secondes) de l'histogramme des temps de rendu
+RENDER_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+def available_encodings() -> List[str]:
+    """Encodages proposés, par ordre de préférence du serveur"""
+    return (['br'] if BROTLI_AVAILABLE else []) + ['gzip']
+
+
+def negotiate(accept_encoding: str) -> str:
+    """Meilleur encodage accepté par le client ('identity' si aucun)"""
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+
+    for encoding in available_encodings():
+        if accepted.get(encoding, accepted.get('*', 0.0)) > 0:
+            return encoding
+    return 'identity'
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Encode un corps"""
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return body
+
+
+class VariantCache:
+    """Corps rendus (identity et compressés) par clé et version, LRU borné en octets
+
+    Les clés commencent par le type de rendu ('html', 'json'), utilisé comme label des métriques.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        # clé -> (version, {encodage: corps})
+        self.entries: OrderedDict = OrderedDict()
+        self.size = 0
+
+        # (compteur, type) -> valeur: hits, misses, not_modified, evictions, invalidations
+        self.counters: Counter = Counter()
+        # type -> [nombre par bucket (cumulatif à l'export), somme, nombre]
+        self.render_times: Dict[str, List] = {}
+
+    def get(self, key: Tuple, version: tuple, encoding: str) -> Optional[bytes]:
+        """Corps en cache pour cette version et cet encodage"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self.entries.move_to_end(key)
+            return entry[1].get(encoding)
+
+    def put(self, key: Tuple, version: tuple, encoding: str, body: bytes):
+        """Ajoute une variante; une nouvelle version remplace toutes les anciennes"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] != version:
+                self.discard(key)
+                entry = (version, {})
+                self.entries[key] = entry
+            if encoding not in entry[1]:
+                entry[1][encoding] = body
+                self.size += len(body)
+            self.entries.move_to_end(key)
+            while self.size > self.max_bytes and self.entries:
+                evicted = next(iter(self.entries))
+                self.discard(evicted)
+                self.counters['evictions', evicted[0]] += 1
+
+    def discard(self, key: Tuple):
+        """Retire toutes les variantes d'une clé"""
+        entry = self.entries.pop(key, None)
+        if entry:
+            self.size -= sum(len(body) for body in entry[1].values())
+
+    def invalidate(self, key: Tuple):
+        """Libère les rendus d'un document créé, modifié ou supprimé"""
+        with self.lock:
+            if key in self.entries:
+                self.discard(key)
+                self.counters['invalidations', key[0]] += 1
+
+    def count(self, counter: str, kind: str):
+        """Incrémente un compteur de métriques"""
+        with self.lock:
+            self.counters[counter, kind] += 1
+
+    def observe_render(self, kind: str, seconds: float):
+        """Enregistre la durée d'un rendu"""
+        with self.lock:
+            histogram = self.render_times.setdefault(kind, [[0] * len(RENDER_BUCKETS), 0.0, 0])
+            for i, bound in enumerate(RENDER_BUCKETS):
+                if seconds <= bound:
+                    histogram[0][i] += 1
+                    break
+            histogram[1] += seconds
+            histogram[2] += 1
+
+    def metrics(self, prefix: str = 'postmortem_render_cache') -> str:
+        """Métriques au format d'exposition texte Prometheus"""
+        with self.lock:
+            counters = dict(self.counters)
+            render_times = {kind: ([*h[0]], h[1], h[2]) for kind, h in self.render_times.items()}
+            entries, size = len(self.entries), self.size
+
+        lines = []
+        for counter, help_text in (('hits', 'Rendus servis depuis le cache'),
+                                   ('misses', 'Rendus calculés (absents ou périmés)'),
+                                   ('not_modified', 'Réponses 304'),
+                                   ('evictions', 'Entrées évincées par la limite de taille'),
+                                   ('invalidations', 'Entrées invalidées par une écriture')):
+            lines.append(f"# HELP {prefix}_{counter}_total {help_text}")
+            lines.append(f"# TYPE {prefix}_{counter}_total counter")
+            for (name, kind), value in sorted(counters.items()):
+                if name == counter:
+                    lines.append(f'{prefix}_{counter}_total{{kind="{kind}"}} {value}')
+
+        lines += [f"# HELP {prefix}_entries Documents en cache", f"# TYPE {prefix}_entries gauge",
+                  f"{prefix}_entries {entries}",
+                  f"# HELP {prefix}_bytes Taille des corps en cache", f"# TYPE {prefix}_bytes gauge",
+                  f"{prefix}_bytes {size}",
+                  f"# HELP {prefix}_render_seconds Durée des rendus", f"# TYPE {prefix}_render_seconds histogram"]
+        for kind, (buckets, total, count) in sorted(render_times.items()):
+            cumulative = 0
+            for bound, value in zip(RENDER_BUCKETS, buckets):
+                cumulative += value
+                lines.append(f'{prefix}_render_seconds_bucket{{kind="{kind}",le="{bound}"}} {cumulative}')
+            lines.append(f'{prefix}_render_seconds_bucket{{kind="{kind}",le="+Inf"}} {count}')
+            lines.append(f'{prefix}_render_seconds_sum{{kind="{kind}"}} {total}')
+            lines.append(f'{prefix}_render_seconds_count{{kind="{kind}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+def make_etag(key: Tuple, version: tuple, encoding: str) -> str:
+    """ETag fort: une valeur par version de document et par encodage"""
+    digest = hashlib.sha1(repr((key, version)).encode('utf-8')).hexdigest()[:20]
+    return f'"{digest}"' if encoding == 'identity' else f'"{digest}-{encoding}"'
+
+
+def not_modified(etag: str, last_modified: float) -> bool:
+    """If-None-Match prioritaire sur If-Modified-Since (RFC 9110)"""
+    if request.if_none_match:
+        return request.if_none_match.contains(etag.strip('"')) or request.if_none_match.star_tag
+    if request.if_modified_since:
+        return int(last_modified) <= request.if_modified_since.timestamp()
+    return False
+
+
+def conditional_response(cache: VariantCache, key: Tuple, version: tuple, last_modified: float,
+                         build: Callable[[], str], mimetype: str) -> Response:
+    """Réponse 304, ou corps construit et compressé au plus une fois par version"""
+    encoding = negotiate(request.headers.get('Accept-Encoding', ''))
+    identity = cache.get(key, version, 'identity')
+    if identity is not None and len(identity) < MIN_COMPRESS_BYTES:
+        encoding = 'identity'
+
+    etag = make_etag(key, version, encoding)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': formatdate(last_modified, usegmt=True),
+        'Cache-Control': 'no-cache',
+        'Vary': 'Accept-Encoding'
+    }
+    if not_modified(etag, last_modified):
+        cache.count('not_modified', key[0])
+        return Response(status=304, headers=headers)
+
+    cache.count('misses' if identity is None else 'hits', key[0])
+    body = cache.get(key, version, encoding)
+    if body is None:
+        if identity is None:
+            started = time.perf_counter()
+            identity = build().encode('utf-8')
+            cache.observe_render(key[0], time.perf_counter() - started)
+            cache.put(key, version, 'identity', identity)
+        if len(identity) < MIN_COMPRESS_BYTES and encoding != 'identity':
+            # Petit corps découvert après construction: ETag de la variante identity
+            encoding = 'identity'
+            headers['ETag'] = make_etag(key, version, encoding)
+        body = compress(identity, encoding)
+        cache.put(key, version, encoding, body)
+
+    if encoding != 'identity':
+        headers['Content-Encoding'] = encoding
+    return Response(body, mimetype=mimetype, headers=headers)
+
+
+def compress_response(response: Response) -> Response:
+    """Compression à la volée des autres réponses volumineuses (hook after_request)"""
+    if (response.direct_passthrough or response.is_streamed or response.status_code != 200
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    body = response.get_data()
+    if len(body) < MIN_COMPRESS_BYTES:
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate(request.headers.get('Accept-Encoding', ''))
+    if encoding == 'identity':
+        return response
+    response.set_data(compress(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    if response.headers.get('ETag'):
+        response.headers['ETag'] = response.headers['ETag'].rstrip('"') + f'-{encoding}"'
+    return response
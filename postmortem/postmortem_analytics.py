@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Statistiques d'incidents maintenues incrémentalement
+Durées et dates normalisées une seule fois à l'indexation d'un post-mortem, agrégats
+(MTTR, fréquence par équipe, produit et mois, distribution des durées) mis à jour par
+différence à chaque création, modification ou suppression
+"""
+
+import math
+import re
+import threading
+from bisect import bisect_left, insort
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Bornes (minutes) de l'histogramme des durées
+DURATION_BUCKETS = (15, 30, 60, 120, 240, 480, 1440)
+
+DURATION_UNITS = {
+    'j': 1440, 'jour': 1440, 'jours': 1440, 'd': 1440, 'day': 1440, 'days': 1440,
+    'h': 60, 'heure': 60, 'heures': 60, 'hour': 60, 'hours': 60, 'hr': 60, 'hrs': 60,
+    'min': 1, 'mins': 1, 'minute': 1, 'minutes': 1, 'm': 1, 'mn': 1,
+    's': 1 / 60, 'sec': 1 / 60, 'seconde': 1 / 60, 'secondes': 1 / 60, 'second': 1 / 60, 'seconds': 1 / 60
+}
+
+DURATION_PART = re.compile(r'(\d+(?:[.,]\d+)?)\s*([a-z]*)')
+CLOCK_DURATION = re.compile(r'^(\d+):(\d{2})(?::(\d{2}))?$')
+
+
+def parse_duration_minutes(text) -> Optional[float]:
+    """Durée libre en minutes: '1h45', '2h', '90 min', '1 jour 3h', '01:45' (None si illisible)"""
+    if isinstance(text, (int, float)):
+        return float(text)
+    if not isinstance(text, str):
+        return None
+    text = text.strip().lower()
+    clock = CLOCK_DURATION.match(text)
+    if clock:
+        hours, minutes, seconds = clock.groups()
+        return int(hours) * 60 + int(minutes) + int(seconds or 0) / 60
+
+    total, previous_unit, found = 0.0, None, False
+    for value, unit in DURATION_PART.findall(text):
+        amount = float(value.replace(',', '.'))
+        if not unit:
+            # '1h45': nombre sans unité après des heures = minutes
+            if previous_unit != 60:
+                return None
+            factor = 1
+        elif unit in DURATION_UNITS:
+            factor = DURATION_UNITS[unit]
+        else:
+            return None
+        total += amount * factor
+        previous_unit = factor
+        found = True
+    return total if found else None
+
+
+def parse_timestamp(value) -> Optional[float]:
+    """Horodatage ISO 8601 en epoch (None si absent ou invalide)"""
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+def split_products(value) -> List[str]:
+    """Produits affectés d'une liste libre ('A, B et C')"""
+    if isinstance(value, list):
+        items = value
+    elif isinstance(value, str):
+        items = re.split(r',|;|\bet\b', value)
+    else:
+        return []
+    return sorted({item.strip() for item in items if isinstance(item, str) and item.strip()})
+
+
+def incident_facts(postmortem: Dict) -> Dict:
+    """Valeurs normalisées d'un post-mortem, calculées une fois à l'indexation"""
+    problem = postmortem.get('problem_summary') if isinstance(postmortem.get('problem_summary'), dict) else {}
+    duration = parse_duration_minutes(problem.get('duration'))
+    if duration is None:
+        # Repli sur les horodatages de début et de fin
+        start, end = parse_timestamp(problem.get('start_time')), parse_timestamp(problem.get('end_time'))
+        if start is not None and end is not None and end >= start:
+            duration = (end - start) / 60
+
+    incident_date = postmortem.get('incident_date') or problem.get('start_time') or ''
+    return {
+        'owner': postmortem.get('owner') or 'Inconnu',
+        'status': postmortem.get('status') or 'Brouillon',
+        'products': split_products(problem.get('products_affected')),
+        'month': incident_date[:7] if parse_timestamp(incident_date) is not None else None,
+        'duration_minutes': duration
+    }
+
+
+def duration_bucket(minutes: float) -> str:
+    """Libellé du bucket d'histogramme d'une durée"""
+    for bound in DURATION_BUCKETS:
+        if minutes <= bound:
+            return f"<={bound}m"
+    return f">{DURATION_BUCKETS[-1]}m"
+
+
+class IncidentAnalytics:
+    """Agrégats d'incidents, mis à jour document par document"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.facts: Dict[str, Dict] = {}
+        self.counters: Dict[str, Counter] = {name: Counter() for name in
+                                             ('owner', 'product', 'month', 'status', 'duration_bucket')}
+        # Somme et nombre de durées connues, globalement et par équipe
+        self.duration_total = 0.0
+        self.owner_durations: Dict[str, List[float]] = {}
+        # Durées triées pour des percentiles exacts
+        self.durations: List[float] = []
+        self.cached: Optional[Dict] = None
+
+    def update(self, postmortem_id: str, postmortem: Optional[Dict]):
+        """Remplace la contribution d'un post-mortem (retrait si postmortem vaut None)"""
+        facts = incident_facts(postmortem) if postmortem is not None else None
+        with self.lock:
+            previous = self.facts.pop(postmortem_id, None)
+            if previous:
+                self.apply(previous, -1)
+            if facts:
+                self.facts[postmortem_id] = facts
+                self.apply(facts, 1)
+            self.cached = None
+
+    def apply(self, facts: Dict, sign: int):
+        """Ajoute (sign=1) ou retire (sign=-1) les faits d'un incident des agrégats"""
+        self.counters['owner'][facts['owner']] += sign
+        self.counters['status'][facts['status']] += sign
+        for product in facts['products']:
+            self.counters['product'][product] += sign
+        if facts['month']:
+            self.counters['month'][facts['month']] += sign
+
+        duration = facts['duration_minutes']
+        if duration is None:
+            return
+        self.counters['duration_bucket'][duration_bucket(duration)] += sign
+        owner_total = self.owner_durations.setdefault(facts['owner'], [0.0, 0])
+        owner_total[0] += sign * duration
+        owner_total[1] += sign
+        self.duration_total += sign * duration
+        if sign > 0:
+            insort(self.durations, duration)
+        else:
+            del self.durations[bisect_left(self.durations, duration)]
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Percentile des durées (rang le plus proche)"""
+        if not self.durations:
+            return None
+        index = max(0, math.ceil(fraction * len(self.durations)) - 1)
+        return round(self.durations[index], 1)
+
+    def snapshot(self) -> Dict:
+        """Statistiques courantes, recalculées seulement après une modification"""
+        with self.lock:
+            if self.cached is not None:
+                return self.cached
+
+            def ranked(counter: Counter) -> Dict[str, int]:
+                return {key: count for key, count in counter.most_common() if count > 0}
+
+            known = len(self.durations)
+            self.cached = {
+                'incidents': len(self.facts),
+                'mttr_minutes': round(self.duration_total / known, 1) if known else None,
+                'durations': {
+                    'known': known,
+                    'p50_minutes': self.percentile(0.5),
+                    'p90_minutes': self.percentile(0.9),
+                    'max_minutes': round(self.durations[-1], 1) if known else None,
+                    'histogram': {label: self.counters['duration_bucket'].get(label, 0) for label in
+                                  [f"<={bound}m" for bound in DURATION_BUCKETS] + [f">{DURATION_BUCKETS[-1]}m"]}
+                },
+                'by_owner': {
+                    owner: {
+                        'incidents': count,
+                        'mttr_minutes': (round(self.owner_durations[owner][0] / self.owner_durations[owner][1], 1)
+                                         if self.owner_durations.get(owner, [0, 0])[1] else None)
+                    }
+                    for owner, count in ranked(self.counters['owner']).items()
+                },
+                'by_product': ranked(self.counters['product']),
+                'by_month': dict(sorted((month, count) for month, count in self.counters['month'].items()
+                                        if count > 0)),
+                'by_status': ranked(self.counters['status'])
+            }
+            return self.cached
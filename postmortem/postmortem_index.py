@@ -0,0 +1,605 @@
+#!/usr/bin/env python3
+"""
+Index en mémoire des post-mortems
+Résumés indexés par ID, rafraîchis incrémentalement via os.scandir et les mtimes
+(un fichier inchangé n'est jamais relu), documents complets dans un LRU borné en taille,
+écritures atomiques (fichier temporaire, fsync, rename) et mises à jour par version
+"""
+
+import base64
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Set, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Identifiants acceptés: noms de fichiers simples, sans séparateur de chemin
+POSTMORTEM_ID_PATTERN = re.compile(r'^[A-Za-z0-9_\-]+$')
+
+# Champs triables et filtrables servis par l'index
+SORT_FIELDS = ('incident_date', 'published')
+FILTER_FIELDS = ('status', 'owner')
+
+# En dessous de cette fraction de la plage parcourue, les candidats filtrés sont triés directement
+CANDIDATE_SORT_RATIO = 0.25
+
+# Tentatives d'allocation d'un identifiant avant abandon
+MAX_ID_ATTEMPTS = 100
+
+# Verrou de mise à jour considéré comme abandonné (processus tué) au-delà de ce délai
+STALE_LOCK_SECONDS = 30.0
+
+_id_lock = threading.Lock()
+_last_id_time: Optional[datetime] = None
+
+
+class VersionConflict(Exception):
+    """Mise à jour refusée: le document a changé depuis la version lue"""
+
+    def __init__(self, postmortem_id: str, expected: int, current: int):
+        super().__init__(f"Conflit de version pour {postmortem_id}: attendu {expected}, actuel {current}")
+        self.postmortem_id = postmortem_id
+        self.expected = expected
+        self.current = current
+
+
+def new_postmortem_id() -> str:
+    """Identifiant horodaté à la microseconde, strictement croissant dans le processus
+
+    L'unicité entre processus est garantie par la création exclusive du document.
+    """
+    global _last_id_time
+    with _id_lock:
+        now = datetime.now()
+        if _last_id_time is not None and now <= _last_id_time:
+            now = _last_id_time + timedelta(microseconds=1)
+        _last_id_time = now
+    return f"incident_{now.strftime('%Y%m%d_%H%M%S_%f')}"
+
+
+def document_version(document: Dict) -> int:
+    """Numéro de version d'un document (0 pour les documents antérieurs au versionnement)"""
+    try:
+        return int(document.get('version') or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def fsync_directory(directory: str):
+    """Rend durable une création ou un renommage dans un répertoire (POSIX uniquement)"""
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_atomic(path: str, document: Dict, exclusive: bool = False, sync_directory: bool = True):
+    """Écrit un document sans jamais exposer de fichier partiel
+
+    Fichier temporaire du même répertoire, fsync, puis publication par os.replace, ou
+    par os.link si exclusive (FileExistsError si le chemin existe déjà).
+    """
+    directory = os.path.dirname(path) or '.'
+    fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix='.tmp', dir=directory)
+    try:
+        if hasattr(os, 'fchmod'):
+            os.fchmod(fd, 0o644)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        if exclusive:
+            os.link(temp_path, path)
+            os.unlink(temp_path)
+        else:
+            os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    if sync_directory:
+        fsync_directory(directory)
+
+
+@contextmanager
+def file_lock(path: str, timeout: float = 10.0):
+    """Verrou inter-processus par création exclusive d'un fichier .lock"""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.stat(path).st_mtime > STALE_LOCK_SECONDS:
+                    logger.warning(f"[WARN] Verrou abandonné supprimé: {path}")
+                    os.unlink(path)
+                    continue
+            except FileNotFoundError:
+                continue
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Verrou {path} non obtenu en {timeout}s")
+            time.sleep(0.002)
+    try:
+        yield
+    finally:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+def build_summary(postmortem_id: str, postmortem: Dict) -> Dict:
+    """Métadonnées affichées dans les listes"""
+    return {
+        'id': postmortem_id,
+        'title': postmortem.get('title', 'Sans titre'),
+        'incident_date': postmortem.get('incident_date', ''),
+        'status': postmortem.get('status', 'Brouillon'),
+        'published': postmortem.get('published', ''),
+        'owner': postmortem.get('owner', ''),
+        'created_at': postmortem.get('created_at', '')
+    }
+
+
+def encode_cursor(value: str, postmortem_id: str) -> str:
+    """Curseur opaque: position (valeur de tri, id) du dernier élément d'une page"""
+    raw = json.dumps([value, postmortem_id], ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Position encodée dans un curseur (ValueError si invalide)"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        value, postmortem_id = json.loads(raw.decode('utf-8'))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Curseur invalide: {cursor}") from e
+    if not isinstance(value, str) or not isinstance(postmortem_id, str):
+        raise ValueError(f"Curseur invalide: {cursor}")
+    return value, postmortem_id
+
+
+class PostmortemIndex:
+    """Index des post-mortems d'un répertoire JSON"""
+
+    def __init__(self, directory: str, max_cache_bytes: int = 32 * 1024 * 1024, refresh_interval: float = 2.0):
+        self.directory = directory
+        self.max_cache_bytes = max_cache_bytes
+        # Délai minimal entre deux parcours du répertoire pour les lectures (listes, requêtes)
+        self.refresh_interval = refresh_interval
+        self.last_refresh = 0.0
+        self.lock = threading.RLock()
+
+        # id -> (mtime_ns, taille) du fichier tel qu'indexé
+        self.versions: Dict[str, tuple] = {}
+        # id -> (mtime_ns, taille) d'un fichier illisible, ignoré jusqu'à sa prochaine modification
+        self.invalid: Dict[str, tuple] = {}
+        self.summaries: Dict[str, Dict] = {}
+        self.sorted_summaries: Optional[List[Dict]] = None
+        # Champ de tri -> [(valeur, id)] croissant, construit à la première lecture puis tenu à jour
+        self.orders: Dict[str, List[Tuple[str, str]]] = {}
+        # Champ filtrable -> valeur normalisée -> ids
+        self.by_value: Dict[str, Dict[str, Set[str]]] = {field: {} for field in FILTER_FIELDS}
+
+        # LRU des documents complets: id -> (version, document, taille)
+        self.documents: OrderedDict = OrderedDict()
+        self.cache_bytes = 0
+
+        # Abonnés aux changements: callback(id, document ou None si supprimé)
+        self.listeners: List[Callable[[str, Optional[Dict]], None]] = []
+        self.parse_count = 0
+
+    def path_for(self, postmortem_id: str) -> str:
+        """Chemin du fichier d'un post-mortem"""
+        return os.path.join(self.directory, f"{postmortem_id}.json")
+
+    def read_file(self, postmortem_id: str) -> Optional[Dict]:
+        """Lit et décode un fichier de post-mortem (None si absent ou illisible, erreur journalisée)"""
+        try:
+            loaded = self.load_file(postmortem_id)
+        except ValueError as e:
+            logger.error(f"Erreur de parsing JSON pour {postmortem_id}: {e}")
+            return None
+        return loaded[1] if loaded else None
+
+    def load_file(self, postmortem_id: str) -> Optional[Tuple[tuple, Dict]]:
+        """Version et contenu d'un fichier (None si absent, ValueError si JSON invalide, non UTF-8 ou non objet)"""
+        try:
+            with open(self.path_for(postmortem_id), 'rb') as f:
+                # Version du fichier ouvert: un remplacement atomique pendant la lecture est sans effet
+                stat = os.fstat(f.fileno())
+                self.parse_count += 1
+                document = json.loads(f.read())
+        except FileNotFoundError:
+            return None
+        if not isinstance(document, dict):
+            raise ValueError(f"objet JSON attendu, {type(document).__name__} trouvé")
+        return (stat.st_mtime_ns, stat.st_size), document
+
+    def changed_ids(self) -> List[str]:
+        """Ids ajoutés, modifiés ou supprimés depuis leur indexation (parcours sans lecture ni verrou)"""
+        if not os.path.isdir(self.directory):
+            return list(self.versions)
+        seen = set()
+        changed = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                postmortem_id = entry.name[:-5]
+                if (not entry.name.endswith('.json') or not POSTMORTEM_ID_PATTERN.match(postmortem_id)
+                        or not entry.is_file()):
+                    continue
+                seen.add(postmortem_id)
+                stat = entry.stat()
+                if self.versions.get(postmortem_id) != (stat.st_mtime_ns, stat.st_size):
+                    changed.append(postmortem_id)
+        changed += [postmortem_id for postmortem_id in list(self.versions) if postmortem_id not in seen]
+        return changed
+
+    def reload(self, postmortem_id: str) -> bool:
+        """Applique l'état du fichier d'un post-mortem à l'index; retourne True si l'index a changé
+
+        Lecture et parsing hors verrou, pour ne pas bloquer les requêtes. ValueError si le
+        fichier est illisible (l'index garde alors la dernière version valide).
+        """
+        loaded = self.load_file(postmortem_id)
+        with self.lock:
+            try:
+                stat = os.stat(self.path_for(postmortem_id))
+                current = (stat.st_mtime_ns, stat.st_size)
+            except FileNotFoundError:
+                current = None
+            if loaded is None or current is None:
+                if current is not None or postmortem_id not in self.versions:
+                    return False
+                self.forget(postmortem_id)
+                return True
+            version, document = loaded
+            # Fichier déjà indexé, ou remplacé depuis la lecture (un autre événement suivra)
+            if self.versions.get(postmortem_id) == version or current != version:
+                return False
+            self.store(postmortem_id, version, document)
+            return True
+
+    def refresh(self) -> int:
+        """Synchronise l'index avec le répertoire; retourne le nombre de fichiers relus"""
+        if not os.path.isdir(self.directory):
+            return 0
+
+        with self.lock:
+            self.last_refresh = time.monotonic()
+            seen = set()
+            changed = 0
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    postmortem_id = entry.name[:-5]
+                    # Même filtre que get() et changed_ids(): un fichier sans identifiant valide n'est pas listé
+                    if (not entry.name.endswith('.json') or not POSTMORTEM_ID_PATTERN.match(postmortem_id)
+                            or not entry.is_file()):
+                        continue
+                    seen.add(postmortem_id)
+                    stat = entry.stat()
+                    version = (stat.st_mtime_ns, stat.st_size)
+                    if self.versions.get(postmortem_id) == version or self.invalid.get(postmortem_id) == version:
+                        continue
+
+                    document = self.read_file(postmortem_id)
+                    if document is None:
+                        # Pas de nouvelle lecture tant que le fichier ne change pas
+                        self.invalid[postmortem_id] = version
+                        continue
+                    self.invalid.pop(postmortem_id, None)
+                    self.store(postmortem_id, version, document)
+                    changed += 1
+
+            for postmortem_id in [pid for pid in self.versions if pid not in seen]:
+                self.forget(postmortem_id)
+                changed += 1
+            for postmortem_id in [pid for pid in self.invalid if pid not in seen]:
+                del self.invalid[postmortem_id]
+            return changed
+
+    def sync(self) -> int:
+        """Rafraîchit l'index si le dernier parcours date de plus de refresh_interval"""
+        if time.monotonic() - self.last_refresh < self.refresh_interval:
+            return 0
+        return self.refresh()
+
+    def store(self, postmortem_id: str, version: tuple, document: Dict):
+        """Enregistre une version d'un document dans l'index et le cache"""
+        self.versions[postmortem_id] = version
+        self.unindex_values(postmortem_id)
+        summary = build_summary(postmortem_id, document)
+        self.reorder(postmortem_id, self.summaries.get(postmortem_id), summary)
+        self.summaries[postmortem_id] = summary
+        for field in FILTER_FIELDS:
+            self.by_value[field].setdefault(str(summary[field]).lower(), set()).add(postmortem_id)
+        self.cache_document(postmortem_id, version, document)
+        for listener in self.listeners:
+            listener(postmortem_id, document)
+
+    def forget(self, postmortem_id: str):
+        """Retire un document supprimé"""
+        self.versions.pop(postmortem_id, None)
+        self.unindex_values(postmortem_id)
+        self.reorder(postmortem_id, self.summaries.pop(postmortem_id, None), None)
+        cached = self.documents.pop(postmortem_id, None)
+        if cached:
+            self.cache_bytes -= cached[2]
+        for listener in self.listeners:
+            listener(postmortem_id, None)
+
+    def unindex_values(self, postmortem_id: str):
+        """Retire un document des index de filtrage"""
+        summary = self.summaries.get(postmortem_id)
+        if summary is None:
+            return
+        for field in FILTER_FIELDS:
+            value = str(summary[field]).lower()
+            ids = self.by_value[field].get(value)
+            if ids:
+                ids.discard(postmortem_id)
+                if not ids:
+                    del self.by_value[field][value]
+
+    def reorder(self, postmortem_id: str, previous: Optional[Dict], summary: Optional[Dict]):
+        """Déplace un document dans les tris en cache (retrait de l'ancienne clé, insertion de la nouvelle)"""
+        self.sorted_summaries = None
+        for field, keys in self.orders.items():
+            if previous is not None:
+                key = (str(previous[field]), postmortem_id)
+                i = bisect_left(keys, key)
+                if i < len(keys) and keys[i] == key:
+                    del keys[i]
+            if summary is not None:
+                insort(keys, (str(summary[field]), postmortem_id))
+
+    def cache_document(self, postmortem_id: str, version: tuple, document: Dict):
+        """Ajoute un document au LRU et évince les plus anciens au-delà de la taille maximale"""
+        size = version[1]
+        previous = self.documents.pop(postmortem_id, None)
+        if previous:
+            self.cache_bytes -= previous[2]
+        if size > self.max_cache_bytes:
+            return
+
+        self.documents[postmortem_id] = (version, document, size)
+        self.cache_bytes += size
+        while self.cache_bytes > self.max_cache_bytes:
+            _, (_, _, evicted_size) = self.documents.popitem(last=False)
+            self.cache_bytes -= evicted_size
+
+    def get(self, postmortem_id: str) -> Optional[Dict]:
+        """Document complet, relu seulement si le fichier a changé"""
+        if not POSTMORTEM_ID_PATTERN.match(postmortem_id):
+            return None
+
+        try:
+            stat = os.stat(self.path_for(postmortem_id))
+        except FileNotFoundError:
+            with self.lock:
+                if postmortem_id in self.versions:
+                    self.forget(postmortem_id)
+            return None
+        version = (stat.st_mtime_ns, stat.st_size)
+
+        with self.lock:
+            cached = self.documents.get(postmortem_id)
+            if cached and cached[0] == version:
+                self.documents.move_to_end(postmortem_id)
+                return cached[1]
+
+            document = self.read_file(postmortem_id)
+            if document is not None:
+                if self.versions.get(postmortem_id) == version:
+                    self.cache_document(postmortem_id, version, document)
+                else:
+                    self.store(postmortem_id, version, document)
+            return document
+
+    def save(self, postmortem_id: str, document: Dict):
+        """Écrit (ou remplace) un post-mortem de façon atomique et l'indexe"""
+        os.makedirs(self.directory, exist_ok=True)
+        write_atomic(self.path_for(postmortem_id), document)
+        self.register(postmortem_id, document)
+
+    def replace_many(self, items: List[Tuple[str, Dict]]) -> List[Union[Dict, Exception]]:
+        """Remplace un lot de post-mortems, chacun sous verrou en version courante + 1 (1 s'il est nouveau)
+
+        Écritures atomiques avec un seul fsync du répertoire. Les documents sont écrits un par un
+        (pas de transaction): le résultat de chacun, document écrit ou erreur, est retourné.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        results: List[Union[Dict, Exception]] = []
+        for postmortem_id, document in items:
+            path = self.path_for(postmortem_id)
+            try:
+                with file_lock(path + '.lock'):
+                    # Relecture sous verrou, comme update(): une mise à jour concurrente n'est pas écrasée
+                    # par une version plus ancienne
+                    current = self.read_file(postmortem_id) or {}
+                    replaced = {**document, 'id': postmortem_id, 'version': document_version(current) + 1}
+                    if current:
+                        replaced.setdefault('created_at', current.get('created_at'))
+                    write_atomic(path, replaced, sync_directory=False)
+                    self.register(postmortem_id, replaced)
+            except (OSError, ValueError) as e:
+                logger.error(f"[ERROR] Échec d'écriture du post-mortem {postmortem_id}: {e}")
+                results.append(e)
+                continue
+            results.append(replaced)
+        fsync_directory(self.directory)
+        return results
+
+    def create(self, document: Dict) -> str:
+        """Crée un post-mortem sous un identifiant neuf (version 1); retourne l'identifiant"""
+        os.makedirs(self.directory, exist_ok=True)
+        for _ in range(MAX_ID_ATTEMPTS):
+            postmortem_id = new_postmortem_id()
+            created = {**document, 'id': postmortem_id, 'version': 1}
+            try:
+                write_atomic(self.path_for(postmortem_id), created, exclusive=True)
+            except FileExistsError:
+                # Identifiant pris par un autre processus à la même microseconde
+                continue
+            self.register(postmortem_id, created)
+            return postmortem_id
+        raise RuntimeError(f"Aucun identifiant libre après {MAX_ID_ATTEMPTS} tentatives")
+
+    def update(self, postmortem_id: str, document: Dict, expected_version: int) -> int:
+        """Remplace un post-mortem si sa version est toujours expected_version; retourne la nouvelle version
+
+        KeyError si le document n'existe pas, VersionConflict s'il a changé entre-temps.
+        """
+        if not POSTMORTEM_ID_PATTERN.match(postmortem_id):
+            raise KeyError(postmortem_id)
+        path = self.path_for(postmortem_id)
+        with file_lock(path + '.lock'):
+            # Relecture sous verrou: le cache peut être en retard sur un autre processus
+            current = self.read_file(postmortem_id)
+            if current is None:
+                raise KeyError(postmortem_id)
+            current_version = document_version(current)
+            if current_version != expected_version:
+                raise VersionConflict(postmortem_id, expected_version, current_version)
+
+            updated = {**document, 'id': postmortem_id, 'version': current_version + 1}
+            updated.setdefault('created_at', current.get('created_at'))
+            write_atomic(path, updated)
+            self.register(postmortem_id, updated)
+        return updated['version']
+
+    def register(self, postmortem_id: str, document: Dict):
+        """Indexe un document qui vient d'être écrit, sans le relire"""
+        stat = os.stat(self.path_for(postmortem_id))
+        with self.lock:
+            self.store(postmortem_id, (stat.st_mtime_ns, stat.st_size), document)
+
+    def list(self) -> List[Dict]:
+        """Résumés triés par date d'incident décroissante"""
+        with self.lock:
+            self.sync()
+            if self.sorted_summaries is None:
+                # Lu dans l'ordre maintenu: aucun tri après une écriture
+                self.sorted_summaries = [self.summaries[postmortem_id]
+                                         for _, postmortem_id in reversed(self.order('incident_date'))]
+            return self.sorted_summaries
+
+    def order(self, sort: str) -> List[Tuple[str, str]]:
+        """Clés (valeur, id) triées par ordre croissant pour un champ de tri"""
+        keys = self.orders.get(sort)
+        if keys is None:
+            keys = sorted((str(summary[sort]), postmortem_id) for postmortem_id, summary in self.summaries.items())
+            self.orders[sort] = keys
+        return keys
+
+    def query(self, sort: str = 'incident_date', descending: bool = True, filters: Optional[Dict[str, str]] = None,
+              date_from: Optional[str] = None, date_to: Optional[str] = None,
+              cursor: Optional[str] = None, limit: int = 50) -> Tuple[List[Dict], Optional[str]]:
+        """Page de résumés filtrés et triés, et curseur de la page suivante (None si dernière page)
+
+        Les bornes de dates portent sur incident_date (préfixes ISO, 'date_to' inclus).
+        """
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"Tri non supporté: {sort} (valeurs: {', '.join(SORT_FIELDS)})")
+        position = decode_cursor(cursor) if cursor else None
+
+        with self.lock:
+            self.sync()
+            keys = self.order(sort)
+            lo, hi = 0, len(keys)
+            if sort == 'incident_date':
+                # Plage de dates résolue par dichotomie sur l'ordre de tri
+                if date_from:
+                    lo = bisect_left(keys, (date_from,))
+                if date_to:
+                    hi = bisect_right(keys, (date_to + '\uffff',))
+            if position:
+                if descending:
+                    hi = min(hi, bisect_left(keys, position))
+                else:
+                    lo = max(lo, bisect_right(keys, position))
+
+            candidates = self.candidates(filters or {})
+            check_dates = sort != 'incident_date' and bool(date_from or date_to)
+
+            if candidates is not None and len(candidates) < CANDIDATE_SORT_RATIO * (hi - lo):
+                # Filtre sélectif: on trie les seuls candidats dans la plage
+                low_key = keys[lo] if lo < len(keys) else None
+                high_key = keys[hi - 1] if hi > 0 else None
+                matched = sorted(
+                    key for key in ((str(self.summaries[pid][sort]), pid) for pid in candidates)
+                    if low_key is not None and high_key is not None and low_key <= key <= high_key
+                )
+                if descending:
+                    matched.reverse()
+                matched = [key for key in matched
+                           if not check_dates or self.in_date_range(key[1], date_from, date_to)]
+                page = matched[:limit + 1]
+            else:
+                page = []
+                indices = range(hi - 1, lo - 1, -1) if descending else range(lo, hi)
+                for i in indices:
+                    postmortem_id = keys[i][1]
+                    if candidates is not None and postmortem_id not in candidates:
+                        continue
+                    if check_dates and not self.in_date_range(postmortem_id, date_from, date_to):
+                        continue
+                    page.append(keys[i])
+                    if len(page) > limit:
+                        break
+
+            next_cursor = encode_cursor(*page[limit - 1]) if len(page) > limit else None
+            return [self.summaries[postmortem_id] for _, postmortem_id in page[:limit]], next_cursor
+
+    def in_date_range(self, postmortem_id: str, date_from: Optional[str], date_to: Optional[str]) -> bool:
+        """incident_date dans [date_from, date_to] (comparaison de préfixes ISO)"""
+        incident_date = self.summaries[postmortem_id]['incident_date']
+        return ((not date_from or incident_date >= date_from) and
+                (not date_to or incident_date[:len(date_to)] <= date_to))
+
+    def candidates(self, filters: Dict[str, str]) -> Optional[Set[str]]:
+        """Ids satisfaisant les filtres d'égalité (None si aucun filtre)"""
+        result = None
+        for field, value in filters.items():
+            if field not in FILTER_FIELDS:
+                raise ValueError(f"Filtre non supporté: {field}")
+            ids = self.by_value[field].get(value.lower(), set())
+            result = set(ids) if result is None else result & ids
+        return result
+
+    def version_of(self, postmortem_id: str) -> Optional[tuple]:
+        """Version courante (mtime_ns, taille) d'un document, sans le lire (None si absent)"""
+        if not POSTMORTEM_ID_PATTERN.match(postmortem_id):
+            return None
+        try:
+            stat = os.stat(self.path_for(postmortem_id))
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def subscribe(self, listener: Callable[[str, Optional[Dict]], None], replay: bool = True):
+        """Abonne un index secondaire aux ajouts, modifications et suppressions"""
+        with self.lock:
+            self.refresh()
+            self.listeners.append(listener)
+            if not replay:
+                return
+            for postmortem_id in list(self.summaries):
+                document = self.get(postmortem_id)
+                if document is not None:
+                    listener(postmortem_id, document)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Import et export NDJSON des post-mortems
+Un document JSON par ligne, produit et consommé en flux par lots: la mémoire
+utilisée ne dépend pas de la taille de l'archive
+"""
+
+import json
+import logging
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from postmortem_index import POSTMORTEM_ID_PATTERN
+
+logger = logging.getLogger(__name__)
+
+EXPORT_PAGE_SIZE = 200
+IMPORT_BATCH_SIZE = 500
+READ_CHUNK_BYTES = 64 * 1024
+
+# Types attendus des champs structurés, quand ils sont présents
+FIELD_TYPES = {
+    'title': str,
+    'status': str,
+    'owner': str,
+    'incident_date': str,
+    'published': str,
+    'executive_summary': dict,
+    'problem_summary': dict,
+    'root_causes': dict,
+    'lessons_learned': dict,
+    'timeline': list,
+    'action_items': list
+}
+
+
+def validate_postmortem(document) -> Optional[str]:
+    """Message d'erreur si le document est invalide, None sinon"""
+    if not isinstance(document, dict):
+        return "Objet JSON attendu"
+    if not isinstance(document.get('title'), str) or not document['title'].strip():
+        return "Champ 'title' requis"
+    postmortem_id = document.get('id')
+    if postmortem_id is not None and (not isinstance(postmortem_id, str)
+                                      or not POSTMORTEM_ID_PATTERN.match(postmortem_id)):
+        return f"Identifiant invalide: {postmortem_id!r}"
+    for field, expected in FIELD_TYPES.items():
+        if field in document and document[field] is not None and not isinstance(document[field], expected):
+            return f"Champ '{field}' de type {type(document[field]).__name__}, {expected.__name__} attendu"
+    return None
+
+
+def iter_lines(stream, chunk_size: int = READ_CHUNK_BYTES) -> Iterator[bytes]:
+    """Lignes d'un flux binaire lu par blocs (seule la ligne en cours est gardée en mémoire)"""
+    pending = b''
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        lines = (pending + chunk).split(b'\n')
+        pending = lines.pop()
+        yield from lines
+    if pending:
+        yield pending
+
+
+def export_lines(storage, filters: Optional[Dict[str, str]] = None, date_from: Optional[str] = None,
+                 date_to: Optional[str] = None) -> Iterator[str]:
+    """Documents complets en NDJSON, page par page (ordre chronologique)"""
+    cursor = None
+    while True:
+        summaries, cursor = storage.query(descending=False, filters=filters, date_from=date_from,
+                                          date_to=date_to, cursor=cursor, limit=EXPORT_PAGE_SIZE)
+        for summary in summaries:
+            document = storage.get(summary['id'])
+            if document is not None:
+                yield json.dumps(document, ensure_ascii=False) + '\n'
+        if cursor is None:
+            return
+
+
+def import_lines(storage, lines: Iterable[bytes], batch_size: int = IMPORT_BATCH_SIZE) -> Iterator[Dict]:
+    """Valide et écrit les documents par lots; produit un résultat par ligne puis un bilan
+
+    Un document avec 'id' remplace celui de même id comme une mise à jour (sous verrou, en version
+    courante + 1: le champ 'version' importé est ignoré), sans 'id' il est créé sous un nouvel id.
+    """
+    counts = {'imported': 0, 'created': 0, 'failed': 0, 'skipped': 0}
+    batch: List[Tuple[int, Dict]] = []
+
+    def flush() -> Iterator[Dict]:
+        try:
+            # Un résultat par document: le backend fichier n'est pas transactionnel
+            results = storage.replace_many([(document['id'], document) for _, document in batch])
+        except Exception as e:
+            logger.error(f"[ERROR] Échec d'écriture d'un lot de {len(batch)} post-mortems: {e}")
+            results = [e] * len(batch)
+        for (line_number, document), result in zip(batch, results):
+            if isinstance(result, Exception):
+                counts['failed'] += 1
+                yield {'line': line_number, 'id': document['id'], 'status': 'error', 'error': "Écriture échouée"}
+            else:
+                counts['imported'] += 1
+                yield {'line': line_number, 'id': result['id'], 'status': 'ok', 'version': result['version']}
+        batch.clear()
+
+    for line_number, raw in enumerate(lines, start=1):
+        line = raw.strip()
+        if not line:
+            counts['skipped'] += 1
+            continue
+        try:
+            document = json.loads(line)
+        except (ValueError, UnicodeDecodeError) as e:
+            counts['failed'] += 1
+            yield {'line': line_number, 'status': 'error', 'error': f"JSON invalide: {e}"}
+            continue
+
+        error = validate_postmortem(document)
+        if error:
+            counts['failed'] += 1
+            yield {'line': line_number, 'id': document.get('id') if isinstance(document, dict) else None,
+                   'status': 'error', 'error': error}
+            continue
+
+        if document.get('id') is None:
+            # Pas d'identifiant: création immédiate sous un ID neuf
+            try:
+                postmortem_id = storage.create(document)
+            except Exception as e:
+                counts['failed'] += 1
+                yield {'line': line_number, 'status': 'error', 'error': str(e)}
+                continue
+            counts['created'] += 1
+            yield {'line': line_number, 'id': postmortem_id, 'status': 'created'}
+            continue
+
+        batch.append((line_number, document))
+        if len(batch) >= batch_size:
+            yield from flush()
+
+    if batch:
+        yield from flush()
+    yield {'summary': counts}
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Recherche plein texte dans les post-mortems
+Index inversé en mémoire (titre, résumé exécutif, causes racines, timeline, actions),
+tokenisation française insensible aux accents, classement BM25 et extraits surlignés
+"""
+
+import heapq
+import html
+import math
+import re
+import threading
+import time
+import unicodedata
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Poids des champs: un terme du titre compte trois fois plus qu'un terme de la timeline
+FIELD_WEIGHTS = {
+    'title': 3.0,
+    'executive_summary': 1.5,
+    'root_causes': 1.5,
+    'timeline': 1.0,
+    'action_items': 1.0
+}
+
+# Paramètres BM25 usuels
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+SNIPPET_WIDTH = 160
+
+# Nombre de termes dont les contributions BM25 sont gardées en cache
+MAX_CACHED_TERMS = 2048
+
+WORD_PATTERN = re.compile(r'\w+')
+
+# Mots vides français (sans accents, comparés après normalisation)
+STOPWORDS = frozenset("""
+a afin ai aie aient ainsi alors apres au aucun aucune aupres aussi autre autres aux avaient avait avant avec
+avoir ayant c ca car ce ceci cela celle celles celui ces cet cette ceux chaque chez ci comme comment d dans de
+depuis des deux donc dont du durant elle elles en encore entre est et etaient etait ete etre eu eux fait faire
+il ils j je jusqu l la le les leur leurs lors lui m ma mais me meme mes moi mon n ne ni nos notre nous on ont
+ou par parce pas pendant peu peut plus pour pourquoi qu quand que quel quelle quelles quels qui s sa sans se
+selon ses si son sont sous suis sur t ta te tes toi ton tous tout toute toutes tres tu un une vers via vos
+votre vous y
+""".split())
+
+
+def normalize(text: str) -> str:
+    """Minuscules sans accents ('Échec' -> 'echec')"""
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def stem(token: str) -> str:
+    """Racinisation légère: retire la marque du pluriel"""
+    if len(token) > 3 and token[-1] in 'sx' and token[-2] not in 'su':
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Termes indexés d'un texte, dans l'ordre"""
+    return [stem(word) for word in WORD_PATTERN.findall(normalize(text))
+            if len(word) > 1 and word not in STOPWORDS]
+
+
+def query_terms(query: str) -> List[str]:
+    """Termes distincts d'une requête, dans l'ordre"""
+    return list(dict.fromkeys(tokenize(query)))
+
+
+def iter_strings(value) -> Iterator[str]:
+    """Chaînes contenues dans une valeur JSON (dictionnaires et listes imbriqués)"""
+    if isinstance(value, str):
+        if value:
+            yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from iter_strings(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from iter_strings(item)
+
+
+def field_segments(postmortem: Dict) -> List[Tuple[str, str]]:
+    """Segments de texte indexés (champ, texte), dans l'ordre d'affichage des extraits"""
+    segments = [('title', postmortem.get('title') or '')]
+    for field in ('executive_summary', 'root_causes'):
+        segments.extend((field, text) for text in iter_strings(postmortem.get(field)))
+    for event in postmortem.get('timeline') or []:
+        if isinstance(event, dict):
+            segments.extend(('timeline', event[key]) for key in ('title', 'description')
+                            if isinstance(event.get(key), str) and event[key])
+    for action in postmortem.get('action_items') or []:
+        if isinstance(action, dict) and isinstance(action.get('description'), str):
+            segments.append(('action_items', action['description']))
+    return segments
+
+
+class SearchIndex:
+    """Index inversé BM25 mis à jour document par document"""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        # terme -> {id: fréquence pondérée par champ}
+        self.postings: Dict[str, Dict[str, float]] = {}
+        self.doc_terms: Dict[str, Dict[str, float]] = {}
+        self.doc_lengths: Dict[str, float] = {}
+        self.total_length = 0.0
+        self.segments: Dict[str, List[Tuple[str, str]]] = {}
+        self.summaries: Dict[str, Dict] = {}
+        # terme -> {id: contribution BM25}, valable jusqu'à la prochaine modification de l'index
+        self.impacts: Dict[str, Dict[str, float]] = {}
+
+    def update(self, postmortem_id: str, postmortem: Optional[Dict]):
+        """(Ré)indexe un document, ou le retire si postmortem vaut None"""
+        with self.lock:
+            # Idf et longueur moyenne changent: toutes les contributions sont à recalculer
+            self.impacts.clear()
+            self.remove(postmortem_id)
+            if postmortem is not None:
+                self.add(postmortem_id, postmortem)
+
+    def add(self, postmortem_id: str, postmortem: Dict):
+        """Indexe un document absent de l'index"""
+        segments = field_segments(postmortem)
+        terms: Dict[str, float] = {}
+        for field, text in segments:
+            weight = FIELD_WEIGHTS[field]
+            for term in tokenize(text):
+                terms[term] = terms.get(term, 0.0) + weight
+
+        for term, frequency in terms.items():
+            self.postings.setdefault(term, {})[postmortem_id] = frequency
+        length = sum(terms.values())
+        self.doc_terms[postmortem_id] = terms
+        self.doc_lengths[postmortem_id] = length
+        self.total_length += length
+        self.segments[postmortem_id] = segments
+        self.summaries[postmortem_id] = {
+            'id': postmortem_id,
+            'title': postmortem.get('title', 'Sans titre'),
+            'incident_date': postmortem.get('incident_date', ''),
+            'status': postmortem.get('status', 'Brouillon')
+        }
+
+    def remove(self, postmortem_id: str):
+        """Retire un document de l'index"""
+        terms = self.doc_terms.pop(postmortem_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            posting = self.postings[term]
+            del posting[postmortem_id]
+            if not posting:
+                del self.postings[term]
+        self.total_length -= self.doc_lengths.pop(postmortem_id)
+        self.segments.pop(postmortem_id, None)
+        self.summaries.pop(postmortem_id, None)
+
+    def __len__(self) -> int:
+        return len(self.doc_terms)
+
+    def term_impacts(self, term: str) -> Dict[str, float]:
+        """Contribution BM25 d'un terme à chaque document qui le contient"""
+        impacts = self.impacts.get(term)
+        if impacts is not None:
+            return impacts
+
+        posting = self.postings.get(term, {})
+        count = len(self.doc_terms)
+        impacts = {}
+        if posting:
+            idf = math.log(1 + (count - len(posting) + 0.5) / (len(posting) + 0.5))
+            average_length = self.total_length / count
+            lengths = self.doc_lengths
+            for postmortem_id, frequency in posting.items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[postmortem_id] / average_length)
+                impacts[postmortem_id] = idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+
+        if len(self.impacts) >= MAX_CACHED_TERMS:
+            self.impacts.clear()
+        self.impacts[term] = impacts
+        return impacts
+
+    def search(self, query: str, limit: int = 20) -> Dict:
+        """Documents les plus pertinents pour une requête, avec extraits surlignés"""
+        started = time.perf_counter()
+        terms = query_terms(query)
+
+        with self.lock:
+            # Le terme le plus fréquent sert de base, les autres y sont ajoutés
+            impacts = sorted((self.term_impacts(term) for term in terms), key=len, reverse=True)
+            scores: Dict[str, float] = dict(impacts[0]) if impacts else {}
+            for term_impacts in impacts[1:]:
+                for postmortem_id, impact in term_impacts.items():
+                    scores[postmortem_id] = scores.get(postmortem_id, 0.0) + impact
+
+            # Extraits calculés uniquement pour les documents retournés
+            results = []
+            for postmortem_id, score in heapq.nlargest(limit, scores.items(), key=lambda item: item[1]):
+                field, snippet = find_snippet(self.segments[postmortem_id], set(terms))
+                results.append({**self.summaries[postmortem_id], 'score': round(score, 4),
+                                'field': field, 'snippet': snippet})
+
+        return {
+            'query': query,
+            'terms': terms,
+            'total': len(scores),
+            'results': results,
+            'took_ms': round((time.perf_counter() - started) * 1000, 3)
+        }
+
+
+def find_snippet(segments: List[Tuple[str, str]], terms: set) -> Tuple[Optional[str], str]:
+    """Premier passage contenant un terme, échappé en HTML et surligné avec <mark>"""
+    for field, text in segments:
+        matches = [m for m in WORD_PATTERN.finditer(text) if stem(normalize(m.group())) in terms]
+        if matches:
+            return field, highlight(text, matches)
+    return None, ''
+
+
+def highlight(text: str, matches: List[re.Match]) -> str:
+    """Fenêtre de SNIPPET_WIDTH caractères autour de la première occurrence"""
+    start = max(0, matches[0].start() - SNIPPET_WIDTH // 3)
+    if start:
+        # Ne pas couper un mot en début d'extrait
+        space = text.find(' ', start)
+        start = space + 1 if 0 <= space < matches[0].start() else start
+    end = min(len(text), start + SNIPPET_WIDTH)
+
+    parts = ['…' if start else '']
+    position = start
+    for match in matches:
+        if match.start() < position or match.end() > end:
+            continue
+        parts.append(html.escape(text[position:match.start()]))
+        parts.append(f"<mark>{html.escape(match.group())}</mark>")
+        position = match.end()
+    parts.append(html.escape(text[position:end]))
+    parts.append('…' if end < len(text) else '')
+    return ''.join(parts)
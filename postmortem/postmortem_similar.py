@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Incidents similaires
+Vecteurs TF-IDF creux des causes racines et de la timeline, précalculés et tenus à jour
+document par document, et index inversé (terme -> poids par document): la similarité
+cosinus top-k se calcule par produits scalaires creux sur les seuls termes partagés,
+limités aux documents de plus fort poids par terme (listes de champions) puis reclassés
+"""
+
+import heapq
+import math
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from postmortem_search import iter_strings, tokenize
+
+# Termes de la requête retenus (les plus discriminants): borne le coût des listes longues
+MAX_QUERY_TERMS = 40
+# Les idf sont recalculés quand la taille du corpus a varié de plus de cette fraction
+IDF_DRIFT_RATIO = 0.1
+# Documents de plus fort poids gardés par terme, et candidats reclassés par résultat demandé
+CHAMPION_LIST_SIZE = 256
+RERANK_FACTOR = 10
+# Termes partagés cités pour expliquer chaque suggestion
+EXPLAIN_TERMS = 5
+
+
+def smoothed_idf(size: int, frequency: int) -> float:
+    """Idf lissé d'un terme présent dans 'frequency' documents sur 'size'"""
+    return math.log((1 + size) / (1 + frequency)) + 1
+
+
+def similarity_tokens(postmortem: Dict) -> List[str]:
+    """Termes des causes racines et de la timeline"""
+    texts = list(iter_strings(postmortem.get('root_causes')))
+    for event in postmortem.get('timeline') or []:
+        if isinstance(event, dict):
+            texts.extend(event[key] for key in ('title', 'description') if isinstance(event.get(key), str))
+    return tokenize(' '.join(texts))
+
+
+class SimilarityIndex:
+    """Matrice TF-IDF creuse (lignes par document, colonnes par terme) mise à jour incrémentalement"""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        # id -> fréquences brutes des termes
+        self.term_counts: Dict[str, Counter] = {}
+        self.document_frequency: Counter = Counter()
+        # Nombre de documents et fréquences figés au dernier calcul des idf
+        self.idf_size = 0
+        self.idf_frequency: Dict[str, int] = {}
+        # id -> {terme: poids normalisé}, et terme -> {id: poids normalisé}
+        self.vectors: Dict[str, Dict[str, float]] = {}
+        self.postings: Dict[str, Dict[str, float]] = {}
+        # terme -> [{id: poids} des champions, plus petit poids], calculé à la demande
+        self.champion_lists: Dict[str, list] = {}
+        self.summaries: Dict[str, Dict] = {}
+        # Recalcul des idf en arrière-plan (un seul à la fois, jamais sur le chemin des requêtes)
+        self.rebuild_lock = threading.Lock()
+        self.rebuild_pending = False
+
+    def __len__(self) -> int:
+        return len(self.term_counts)
+
+    def update(self, postmortem_id: str, postmortem: Optional[Dict]):
+        """(Ré)indexe un document, ou le retire si postmortem vaut None"""
+        with self.lock:
+            self.remove(postmortem_id)
+            if postmortem is not None:
+                counts = Counter(similarity_tokens(postmortem))
+                self.term_counts[postmortem_id] = counts
+                self.document_frequency.update(counts.keys())
+                self.summaries[postmortem_id] = {
+                    'id': postmortem_id,
+                    'title': postmortem.get('title', 'Sans titre'),
+                    'incident_date': postmortem.get('incident_date', ''),
+                    'status': postmortem.get('status', 'Brouillon')
+                }
+                # Idf figés (terme nouveau: fréquence courante) en attendant le prochain recalcul
+                self.store_vector(postmortem_id, self.vectorize(counts))
+            if self.idf_stale():
+                self.schedule_rebuild()
+
+    def remove(self, postmortem_id: str):
+        """Retire un document de la matrice"""
+        counts = self.term_counts.pop(postmortem_id, None)
+        if counts is None:
+            return
+        self.document_frequency.subtract(counts.keys())
+        for term in counts:
+            if self.document_frequency[term] <= 0:
+                del self.document_frequency[term]
+        self.drop_vector(postmortem_id)
+        self.summaries.pop(postmortem_id, None)
+
+    def drop_vector(self, postmortem_id: str):
+        """Retire la ligne d'un document de la matrice et de l'index inversé"""
+        for term in self.vectors.pop(postmortem_id, {}):
+            posting = self.postings[term]
+            del posting[postmortem_id]
+            if not posting:
+                del self.postings[term]
+            champions = self.champion_lists.get(term)
+            if champions and postmortem_id in champions[0]:
+                # Un champion sort: la liste sera recalculée depuis l'index inversé
+                del self.champion_lists[term]
+
+    def idf_stale(self) -> bool:
+        """Le corpus a trop varié depuis le dernier calcul des idf"""
+        return abs(len(self.term_counts) - self.idf_size) > IDF_DRIFT_RATIO * self.idf_size
+
+    def idf(self, term: str) -> float:
+        """Idf lissé, avec les fréquences figées (fréquence courante pour un terme nouveau)"""
+        frequency = self.idf_frequency.get(term) or self.document_frequency.get(term, 0)
+        return smoothed_idf(self.idf_size, frequency)
+
+    def vectorize(self, counts: Counter, idf: Optional[Callable[[str], float]] = None) -> Dict[str, float]:
+        """Vecteur TF-IDF (tf logarithmique) de norme 1"""
+        idf = idf or self.idf
+        vector = {term: (1 + math.log(count)) * idf(term) for term, count in counts.items()}
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        return {term: weight / norm for term, weight in vector.items()} if norm else {}
+
+    def store_vector(self, postmortem_id: str, vector: Dict[str, float]):
+        """Enregistre la ligne d'un document dans la matrice et l'index inversé"""
+        self.vectors[postmortem_id] = vector
+        for term, weight in vector.items():
+            self.postings.setdefault(term, {})[postmortem_id] = weight
+            champions = self.champion_lists.get(term)
+            if champions is None:
+                continue
+            members, floor = champions
+            if len(members) < CHAMPION_LIST_SIZE:
+                members[postmortem_id] = weight
+                champions[1] = min(floor, weight)
+            elif weight > floor:
+                del members[min(members, key=members.get)]
+                members[postmortem_id] = weight
+                champions[1] = min(members.values())
+
+    def schedule_rebuild(self):
+        """Lance le recalcul des idf dans un thread (aucun si un recalcul est déjà prévu)"""
+        if self.rebuild_pending:
+            return
+        self.rebuild_pending = True
+        threading.Thread(target=self.rebuild, name='similarity-rebuild', daemon=True).start()
+
+    def rebuild(self):
+        """Recalcule les idf et tous les vecteurs hors verrou, puis remplace la matrice"""
+        with self.rebuild_lock:
+            with self.lock:
+                self.rebuild_pending = False
+                # Les Counter ne sont jamais modifiés en place: une copie du dict suffit
+                term_counts = dict(self.term_counts)
+                frequency = dict(self.document_frequency)
+            size = len(term_counts)
+            vectors = {postmortem_id: self.vectorize(counts, lambda term: smoothed_idf(size, frequency[term]))
+                       for postmortem_id, counts in term_counts.items()}
+            postings: Dict[str, Dict[str, float]] = {}
+            for postmortem_id, vector in vectors.items():
+                for term, weight in vector.items():
+                    postings.setdefault(term, {})[postmortem_id] = weight
+
+            with self.lock:
+                self.idf_size = size
+                self.idf_frequency = frequency
+                self.vectors = vectors
+                self.postings = postings
+                self.champion_lists = {}
+                # Documents modifiés, supprimés ou ajoutés pendant le calcul
+                for postmortem_id in [postmortem_id for postmortem_id in vectors
+                                      if self.term_counts.get(postmortem_id) is not term_counts[postmortem_id]]:
+                    self.drop_vector(postmortem_id)
+                for postmortem_id, counts in self.term_counts.items():
+                    if postmortem_id not in self.vectors:
+                        self.store_vector(postmortem_id, self.vectorize(counts))
+
+    def champions(self, term: str) -> Dict[str, float]:
+        """Documents de plus fort poids pour un terme (toute la liste si elle est courte)"""
+        champions = self.champion_lists.get(term)
+        if champions is None:
+            posting = self.postings.get(term)
+            if not posting:
+                # Terme absent du corpus: rien à mettre en cache (les requêtes en saisie libre en sont pleines)
+                return {}
+            members = (dict(posting) if len(posting) <= CHAMPION_LIST_SIZE
+                       else dict(heapq.nlargest(CHAMPION_LIST_SIZE, posting.items(), key=lambda item: item[1])))
+            champions = [members, min(members.values())]
+            self.champion_lists[term] = champions
+        return champions[0]
+
+    def similar(self, postmortem_id: str, limit: int = 5) -> Optional[Dict]:
+        """Post-mortems les plus proches d'un post-mortem indexé (None s'il est inconnu)"""
+        started = time.perf_counter()
+        with self.lock:
+            if postmortem_id not in self.term_counts:
+                return None
+            results = self.top_k(self.vectors[postmortem_id], limit, exclude=postmortem_id)
+        return {'id': postmortem_id, 'results': results,
+                'took_ms': round((time.perf_counter() - started) * 1000, 3)}
+
+    def suggest(self, text: str, limit: int = 5) -> Dict:
+        """Post-mortems les plus proches d'un texte en cours de saisie"""
+        started = time.perf_counter()
+        with self.lock:
+            results = self.top_k(self.vectorize(Counter(tokenize(text))), limit)
+        return {'results': results, 'took_ms': round((time.perf_counter() - started) * 1000, 3)}
+
+    def top_k(self, vector: Dict[str, float], limit: int, exclude: Optional[str] = None) -> List[Dict]:
+        """Cosinus (vecteurs normés: produit scalaire) accumulé terme par terme sur les champions"""
+        terms: List[Tuple[str, float]] = heapq.nlargest(MAX_QUERY_TERMS, vector.items(), key=lambda item: item[1])
+        scores: Dict[str, float] = {}
+        for term, weight in terms:
+            for postmortem_id, document_weight in self.champions(term).items():
+                scores[postmortem_id] = scores.get(postmortem_id, 0.0) + weight * document_weight
+        scores.pop(exclude, None)
+
+        # Score exact des meilleurs candidats: un document absent d'une liste de champions y contribue aussi
+        candidates = heapq.nlargest(limit * RERANK_FACTOR, scores, key=scores.get)
+        exact = {postmortem_id: sum(weight * self.vectors[postmortem_id].get(term, 0.0) for term, weight in terms)
+                 for postmortem_id in candidates}
+
+        results = []
+        for postmortem_id, score in heapq.nlargest(limit, exact.items(), key=lambda item: item[1]):
+            document = self.vectors[postmortem_id]
+            shared = heapq.nlargest(EXPLAIN_TERMS, (term for term, _ in terms if term in document),
+                                    key=lambda term: vector[term] * document[term])
+            results.append({**self.summaries[postmortem_id], 'score': round(score, 4), 'terms': shared})
+        return results
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Stockage SQLite des post-mortems
+Documents en colonne JSON, colonnes générées indexées pour les listes et filtres,
+table FTS5 pour la recherche plein texte, et import unique depuis le répertoire JSON
+"""
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from postmortem_index import (FILTER_FIELDS, MAX_ID_ATTEMPTS, POSTMORTEM_ID_PATTERN, SORT_FIELDS,
+                              VersionConflict, decode_cursor, document_version, encode_cursor,
+                              new_postmortem_id)
+from postmortem_search import FIELD_WEIGHTS, field_segments, find_snippet, query_terms
+
+logger = logging.getLogger(__name__)
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-16000",      # ~16 Mo de cache de pages
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=134217728",    # 128 Mo
+    "PRAGMA busy_timeout=5000"
+)
+
+SUMMARY_COLUMNS = ('id', 'title', 'incident_date', 'status', 'published', 'owner', 'created_at')
+
+FTS_FIELDS = tuple(FIELD_WEIGHTS)
+
+SCHEMA = (
+    '''
+    CREATE TABLE IF NOT EXISTS postmortems (
+        id TEXT PRIMARY KEY,
+        document TEXT NOT NULL CHECK (json_valid(document)),
+        version INTEGER NOT NULL DEFAULT 1,
+        updated_at REAL NOT NULL,
+        title TEXT GENERATED ALWAYS AS (coalesce(json_extract(document, '$.title'), 'Sans titre')) VIRTUAL,
+        incident_date TEXT GENERATED ALWAYS AS (coalesce(json_extract(document, '$.incident_date'), '')) VIRTUAL,
+        status TEXT GENERATED ALWAYS AS (coalesce(json_extract(document, '$.status'), 'Brouillon')) VIRTUAL,
+        published TEXT GENERATED ALWAYS AS (coalesce(json_extract(document, '$.published'), '')) VIRTUAL,
+        owner TEXT GENERATED ALWAYS AS (coalesce(json_extract(document, '$.owner'), '')) VIRTUAL,
+        created_at TEXT GENERATED ALWAYS AS (coalesce(json_extract(document, '$.created_at'), '')) VIRTUAL
+    )
+    ''',
+    f'''
+    CREATE VIRTUAL TABLE IF NOT EXISTS postmortems_fts USING fts5(
+        {', '.join(FTS_FIELDS)},
+        tokenize = "unicode61 remove_diacritics 2"
+    )
+    '''
+)
+
+INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_postmortems_incident_date ON postmortems(incident_date, id)",
+    "CREATE INDEX IF NOT EXISTS idx_postmortems_published ON postmortems(published, id)",
+    "CREATE INDEX IF NOT EXISTS idx_postmortems_status ON postmortems(status COLLATE NOCASE, incident_date)",
+    "CREATE INDEX IF NOT EXISTS idx_postmortems_owner ON postmortems(owner COLLATE NOCASE, incident_date)"
+)
+
+UPSERT_POSTMORTEM = '''
+    INSERT INTO postmortems (id, document, updated_at) VALUES (?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET
+        document = excluded.document,
+        version = postmortems.version + 1,
+        updated_at = excluded.updated_at
+    RETURNING rowid
+'''
+
+INSERT_POSTMORTEM = "INSERT INTO postmortems (id, document, updated_at) VALUES (?, ?, ?) RETURNING rowid"
+
+# Compare-and-swap sur le numéro de version porté par le document
+UPDATE_POSTMORTEM_IF_VERSION = '''
+    UPDATE postmortems SET document = ?, version = version + 1, updated_at = ?
+    WHERE id = ? AND coalesce(json_extract(document, '$.version'), 0) = ?
+    RETURNING rowid
+'''
+
+# Pondération des colonnes FTS alignée sur l'index en mémoire
+BM25_WEIGHTS = ', '.join(str(FIELD_WEIGHTS[field]) for field in FTS_FIELDS)
+
+# Les lignes FTS partagent le rowid du document: mise à jour et jointure sans parcours
+SEARCH_POSTMORTEMS = f'''
+    SELECT p.id, -bm25(postmortems_fts, {BM25_WEIGHTS}) AS score, p.document
+    FROM postmortems_fts f JOIN postmortems p ON p.rowid = f.rowid
+    WHERE postmortems_fts MATCH ?
+    ORDER BY bm25(postmortems_fts, {BM25_WEIGHTS})
+    LIMIT ?
+'''
+
+
+def match_expression(terms: List[str]) -> str:
+    """Requête FTS5 équivalente: un des termes, en préfixe pour couvrir les pluriels"""
+    return ' OR '.join(f'"{term}"*' for term in terms)
+
+
+class SQLitePostmortemStore:
+    """Backend SQLite, même interface que PostmortemIndex pour l'application"""
+
+    def __init__(self, db_path: str = "data/postmortems.db"):
+        self.db_path = db_path
+        self.lock = threading.RLock()
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        for pragma in PRAGMAS:
+            self.conn.execute(pragma)
+        with self.lock, self.conn:
+            for statement in SCHEMA + INDEXES:
+                self.conn.execute(statement)
+        self.listeners: List[Callable[[str, Optional[Dict]], None]] = []
+
+    def write(self, postmortem_id: str, document: Dict):
+        """Upsert du document et de ses textes FTS (dans la transaction courante)"""
+        rowid = self.conn.execute(
+            UPSERT_POSTMORTEM, (postmortem_id, json.dumps(document, ensure_ascii=False), time.time())
+        ).fetchone()[0]
+        self.index_text(rowid, document)
+
+    def index_text(self, rowid: int, document: Dict):
+        """(Ré)écrit la ligne FTS d'un document"""
+        texts = {field: [] for field in FTS_FIELDS}
+        for field, text in field_segments(document):
+            texts[field].append(text)
+        self.conn.execute("DELETE FROM postmortems_fts WHERE rowid = ?", (rowid,))
+        self.conn.execute(
+            f"INSERT INTO postmortems_fts (rowid, {', '.join(FTS_FIELDS)}) VALUES (?{', ?' * len(FTS_FIELDS)})",
+            (rowid, *('\n'.join(texts[field]) for field in FTS_FIELDS))
+        )
+
+    def save(self, postmortem_id: str, document: Dict):
+        """Enregistre un post-mortem et notifie les abonnés"""
+        with self.lock, self.conn:
+            self.write(postmortem_id, document)
+        self.notify(postmortem_id, document)
+
+    def replace_many(self, items: List[Tuple[str, Dict]]) -> List[Dict]:
+        """Remplace un lot de post-mortems en une transaction, chacun en version courante + 1 (1 s'il est nouveau)
+
+        Tout ou rien: une erreur annule le lot et est levée.
+        """
+        written = []
+        with self.lock, self.conn:
+            # Verrou d'écriture pris avant de lire les versions: aucune mise à jour ne s'intercale
+            self.conn.execute("BEGIN IMMEDIATE")
+            for postmortem_id, document in items:
+                row = self.conn.execute("SELECT document FROM postmortems WHERE id = ?",
+                                        (postmortem_id,)).fetchone()
+                current = json.loads(row['document']) if row else {}
+                replaced = {**document, 'id': postmortem_id, 'version': document_version(current) + 1}
+                if current:
+                    replaced.setdefault('created_at', current.get('created_at'))
+                self.write(postmortem_id, replaced)
+                written.append(replaced)
+        for document in written:
+            self.notify(document['id'], document)
+        return written
+
+    def notify(self, postmortem_id: str, document: Optional[Dict]):
+        """Prévient les abonnés d'une écriture"""
+        for listener in self.listeners:
+            listener(postmortem_id, document)
+
+    def create(self, document: Dict) -> str:
+        """Crée un post-mortem sous un identifiant neuf (version 1); retourne l'identifiant"""
+        for _ in range(MAX_ID_ATTEMPTS):
+            postmortem_id = new_postmortem_id()
+            created = {**document, 'id': postmortem_id, 'version': 1}
+            try:
+                with self.lock, self.conn:
+                    rowid = self.conn.execute(
+                        INSERT_POSTMORTEM, (postmortem_id, json.dumps(created, ensure_ascii=False), time.time())
+                    ).fetchone()[0]
+                    self.index_text(rowid, created)
+            except sqlite3.IntegrityError:
+                # Identifiant pris par un autre processus à la même microseconde
+                continue
+            self.notify(postmortem_id, created)
+            return postmortem_id
+        raise RuntimeError(f"Aucun identifiant libre après {MAX_ID_ATTEMPTS} tentatives")
+
+    def update(self, postmortem_id: str, document: Dict, expected_version: int) -> int:
+        """Remplace un post-mortem si sa version est toujours expected_version; retourne la nouvelle version"""
+        with self.lock, self.conn:
+            current = self.conn.execute("SELECT document FROM postmortems WHERE id = ?",
+                                        (postmortem_id,)).fetchone()
+            if current is None:
+                raise KeyError(postmortem_id)
+            current = json.loads(current['document'])
+            updated = {**document, 'id': postmortem_id, 'version': expected_version + 1}
+            updated.setdefault('created_at', current.get('created_at'))
+
+            # La condition sur la version rend l'écriture sûre même entre processus
+            row = self.conn.execute(
+                UPDATE_POSTMORTEM_IF_VERSION,
+                (json.dumps(updated, ensure_ascii=False), time.time(), postmortem_id, expected_version)
+            ).fetchone()
+            if row is None:
+                raise VersionConflict(postmortem_id, expected_version, document_version(current))
+            self.index_text(row[0], updated)
+        self.notify(postmortem_id, updated)
+        return updated['version']
+
+    def delete(self, postmortem_id: str):
+        """Supprime un post-mortem"""
+        with self.lock, self.conn:
+            row = self.conn.execute("DELETE FROM postmortems WHERE id = ? RETURNING rowid", (postmortem_id,)).fetchone()
+            if row:
+                self.conn.execute("DELETE FROM postmortems_fts WHERE rowid = ?", (row[0],))
+        self.notify(postmortem_id, None)
+
+    def import_directory(self, directory: str, batch_size: int = 500) -> Tuple[int, int]:
+        """Importe les fichiers JSON d'un répertoire par transactions groupées; retourne (importés, erreurs)"""
+        imported = errors = 0
+        batch: List[Tuple[str, Dict]] = []
+
+        def flush():
+            with self.lock, self.conn:
+                for postmortem_id, document in batch:
+                    self.write(postmortem_id, document)
+            batch.clear()
+
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if not entry.name.endswith('.json') or not entry.is_file():
+                    continue
+                postmortem_id = entry.name[:-5]
+                try:
+                    with open(entry.path, 'r', encoding='utf-8') as f:
+                        document = json.load(f)
+                except (OSError, json.JSONDecodeError) as e:
+                    logger.error(f"[ERROR] {entry.name} ignoré: {e}")
+                    errors += 1
+                    continue
+                batch.append((postmortem_id, document))
+                imported += 1
+                if len(batch) >= batch_size:
+                    flush()
+        if batch:
+            flush()
+        return imported, errors
+
+    def get(self, postmortem_id: str) -> Optional[Dict]:
+        """Document complet"""
+        if not POSTMORTEM_ID_PATTERN.match(postmortem_id):
+            return None
+        with self.lock:
+            row = self.conn.execute("SELECT document FROM postmortems WHERE id = ?", (postmortem_id,)).fetchone()
+        return json.loads(row['document']) if row else None
+
+    def version_of(self, postmortem_id: str) -> Optional[tuple]:
+        """Version d'un document: (date de mise à jour en ns, numéro incrémenté à chaque écriture)"""
+        with self.lock:
+            row = self.conn.execute("SELECT version, updated_at FROM postmortems WHERE id = ?",
+                                    (postmortem_id,)).fetchone()
+        return (int(row['updated_at'] * 1e9), row['version']) if row else None
+
+    def sync(self) -> int:
+        """Rien à rafraîchir: la base est toujours à jour"""
+        return 0
+
+    def list(self) -> List[Dict]:
+        """Résumés triés par date d'incident décroissante"""
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM postmortems ORDER BY incident_date DESC, id DESC"
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def query(self, sort: str = 'incident_date', descending: bool = True, filters: Optional[Dict[str, str]] = None,
+              date_from: Optional[str] = None, date_to: Optional[str] = None,
+              cursor: Optional[str] = None, limit: int = 50) -> Tuple[List[Dict], Optional[str]]:
+        """Même sémantique que PostmortemIndex.query, résolue par les index SQLite"""
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"Tri non supporté: {sort} (valeurs: {', '.join(SORT_FIELDS)})")
+
+        conditions, params = [], []
+        for field, value in (filters or {}).items():
+            if field not in FILTER_FIELDS:
+                raise ValueError(f"Filtre non supporté: {field}")
+            conditions.append(f"{field} = ? COLLATE NOCASE")
+            params.append(value)
+        if date_from:
+            conditions.append("incident_date >= ?")
+            params.append(date_from)
+        if date_to:
+            conditions.append("incident_date < ?")
+            params.append(date_to + '\uffff')
+        if cursor:
+            conditions.append(f"({sort}, id) {'<' if descending else '>'} (?, ?)")
+            params.extend(decode_cursor(cursor))
+
+        direction = 'DESC' if descending else 'ASC'
+        sql = (f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM postmortems"
+               f"{' WHERE ' + ' AND '.join(conditions) if conditions else ''}"
+               f" ORDER BY {sort} {direction}, id {direction} LIMIT ?")
+        with self.lock:
+            rows = [dict(row) for row in self.conn.execute(sql, (*params, limit + 1))]
+
+        next_cursor = encode_cursor(rows[limit - 1][sort], rows[limit - 1]['id']) if len(rows) > limit else None
+        return rows[:limit], next_cursor
+
+    def search(self, query: str, limit: int = 20) -> Dict:
+        """Recherche FTS5 classée par BM25, au même format que SearchIndex.search"""
+        started = time.perf_counter()
+        terms = query_terms(query)
+        results, total = [], 0
+        if terms:
+            expression = match_expression(terms)
+            with self.lock:
+                rows = self.conn.execute(SEARCH_POSTMORTEMS, (expression, limit)).fetchall()
+                total = self.conn.execute("SELECT count(*) FROM postmortems_fts WHERE postmortems_fts MATCH ?",
+                                          (expression,)).fetchone()[0]
+            for row in rows:
+                document = json.loads(row['document'])
+                field, snippet = find_snippet(field_segments(document), set(terms))
+                results.append({
+                    'id': row['id'],
+                    'title': document.get('title', 'Sans titre'),
+                    'incident_date': document.get('incident_date', ''),
+                    'status': document.get('status', 'Brouillon'),
+                    'score': round(row['score'], 4),
+                    'field': field,
+                    'snippet': snippet
+                })
+
+        return {
+            'query': query,
+            'terms': terms,
+            'total': total,
+            'results': results,
+            'took_ms': round((time.perf_counter() - started) * 1000, 3)
+        }
+
+    def iter_documents(self) -> Iterator[Tuple[str, Dict]]:
+        """Parcourt tous les documents"""
+        with self.lock:
+            rows = self.conn.execute("SELECT id, document FROM postmortems").fetchall()
+        for row in rows:
+            yield row['id'], json.loads(row['document'])
+
+    def subscribe(self, listener: Callable[[str, Optional[Dict]], None], replay: bool = True):
+        """Abonne un index secondaire aux écritures (documents existants rejoués si replay)"""
+        self.listeners.append(listener)
+        if not replay:
+            return
+        for postmortem_id, document in self.iter_documents():
+            listener(postmortem_id, document)
+
+    def count(self) -> int:
+        """Nombre de post-mortems stockés"""
+        with self.lock:
+            return self.conn.execute("SELECT count(*) FROM postmortems").fetchone()[0]
+
+    def close(self):
+        """Ferme la connexion"""
+        with self.lock:
+            self.conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import des post-mortems JSON dans la base SQLite')
+    parser.add_argument('--db', default='data/postmortems.db',
+                       help='Chemin de la base de données (défaut: data/postmortems.db)')
+    parser.add_argument('--import-dir', default='data/postmortems',
+                       help='Répertoire des fichiers JSON à importer (défaut: data/postmortems)')
+    parser.add_argument('--verbose', '-v', action='store_true',
+                       help='Mode verbeux')
+
+    args = parser.parse_args()
+
+    # Configuration du logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+    if args.verbose:
+        logging.getLogger().setLevel(logging.DEBUG)
+
+    try:
+        store = SQLitePostmortemStore(args.db)
+        started = time.perf_counter()
+        imported, errors = store.import_directory(args.import_dir)
+        logger.info(f"[OK] {imported} post-mortems importés depuis {args.import_dir} "
+                    f"en {time.perf_counter() - started:.2f}s ({errors} erreurs), "
+                    f"{store.count()} dans {args.db}")
+        store.close()
+        if errors:
+            sys.exit(1)
+    except Exception as e:
+        logger.error(f"[ERROR] Erreur lors de l'import: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
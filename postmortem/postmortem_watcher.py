@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Surveillance du répertoire des post-mortems
+Thread d'arrière-plan qui applique à l'index en mémoire (et à ses abonnés: recherche,
+cache de rendu, statistiques) les fichiers ajoutés, modifiés ou supprimés hors de
+l'application (copy_postmortems.py, kubectl cp, synchronisation git). inotify sous
+Linux, scrutation périodique sinon; les fichiers illisibles sont mis en quarantaine.
+"""
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from postmortem_index import POSTMORTEM_ID_PATTERN, PostmortemIndex
+
+logger = logging.getLogger(__name__)
+
+# Constantes de <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+
+# struct inotify_event: wd, mask, cookie, len, puis le nom (len octets)
+EVENT_HEADER = struct.Struct('iIII')
+READ_BUFFER_BYTES = 64 * 1024
+
+# Intervalle de scrutation sans inotify, et de vérification complète avec inotify
+POLL_INTERVAL = 2.0
+RESCAN_INTERVAL = 60.0
+# Un fichier illisible modifié plus récemment est peut-être en cours d'écriture: on attend
+QUARANTINE_GRACE_SECONDS = 2.0
+
+
+class Inotify:
+    """Surveillance inotify d'un répertoire par ctypes (Linux uniquement)"""
+
+    def __init__(self, directory: str):
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, os.strerror(errno), directory)
+
+    def read(self, timeout: float) -> List[Tuple[int, str]]:
+        """Événements (masque, nom) reçus dans le délai (liste vide sinon)"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        data = os.read(self.fd, READ_BUFFER_BYTES)
+        events = []
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            _, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            events.append((mask, os.fsdecode(data[offset:offset + length].rstrip(b'\0'))))
+            offset += length
+        return events
+
+    def close(self):
+        """Libère le descripteur inotify"""
+        os.close(self.fd)
+
+
+class PostmortemWatcher:
+    """Applique les changements du répertoire à l'index, hors des threads de requête"""
+
+    def __init__(self, index: PostmortemIndex, quarantine_dir: str = None, poll_interval: float = POLL_INTERVAL):
+        self.index = index
+        self.quarantine_dir = quarantine_dir or os.path.join(index.directory, 'quarantine')
+        self.poll_interval = poll_interval
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.mode = None
+
+        # Fichiers illisibles trop récents pour être mis en quarantaine, revus au prochain réveil
+        self.pending: Dict[str, float] = {}
+        self.applied = 0
+        self.quarantined = 0
+
+    def start(self) -> 'PostmortemWatcher':
+        """Démarre la surveillance dans un thread démon"""
+        self.thread = threading.Thread(target=self.run, name='postmortem-watcher', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self, timeout: float = 5.0):
+        """Arrête la surveillance"""
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout)
+
+    def run(self):
+        """Boucle du thread: inotify tant que possible, scrutation sinon"""
+        warned = False
+        while not self.stop_event.is_set():
+            try:
+                inotify = Inotify(self.index.directory)
+            except (OSError, AttributeError) as e:
+                if not warned:
+                    logger.warning(f"[WARN] inotify indisponible ({e}), scrutation de {self.index.directory} "
+                                   f"toutes les {self.poll_interval}s")
+                    warned = True
+                self.mode = 'polling'
+                self.safely(self.scan)
+                self.stop_event.wait(self.poll_interval)
+                continue
+
+            self.mode = 'inotify'
+            logger.info(f"[INFO] Surveillance inotify de {self.index.directory}")
+            try:
+                self.safely(lambda: self.watch(inotify))
+            finally:
+                inotify.close()
+
+    def safely(self, operation):
+        """Exécute une étape de surveillance sans laisser une erreur arrêter le thread"""
+        try:
+            operation()
+        except Exception as e:
+            logger.error(f"[ERROR] Erreur de surveillance des post-mortems: {e}")
+            self.stop_event.wait(self.poll_interval)
+
+    def watch(self, inotify: Inotify):
+        """Applique les événements inotify jusqu'à l'arrêt ou la disparition du répertoire"""
+        # Rattrape les changements antérieurs à la mise en place de la surveillance
+        self.scan()
+        last_scan = time.monotonic()
+        while not self.stop_event.is_set():
+            events = inotify.read(QUARANTINE_GRACE_SECONDS / 4 if self.pending else 1.0)
+            ids = set(self.pending)
+            full_scan = time.monotonic() - last_scan >= RESCAN_INTERVAL
+            for mask, name in events:
+                if mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                    logger.warning(f"[WARN] Répertoire {self.index.directory} supprimé ou déplacé")
+                    return
+                if mask & IN_Q_OVERFLOW:
+                    # Événements perdus: on compare tout le répertoire à l'index
+                    full_scan = True
+                elif name.endswith('.json') and POSTMORTEM_ID_PATTERN.match(name[:-5]):
+                    ids.add(name[:-5])
+            if full_scan:
+                ids.update(self.index.changed_ids())
+                last_scan = time.monotonic()
+            for postmortem_id in ids:
+                self.apply(postmortem_id)
+
+    def scan(self):
+        """Applique tous les fichiers qui diffèrent de l'index"""
+        for postmortem_id in set(self.index.changed_ids()) | set(self.pending):
+            self.apply(postmortem_id)
+
+    def apply(self, postmortem_id: str):
+        """Réindexe un post-mortem; met en quarantaine un fichier illisible"""
+        try:
+            if self.index.reload(postmortem_id):
+                self.applied += 1
+            self.pending.pop(postmortem_id, None)
+        except ValueError as e:
+            self.malformed(postmortem_id, e)
+        except OSError as e:
+            logger.error(f"[ERROR] Lecture impossible du post-mortem {postmortem_id}: {e}")
+
+    def malformed(self, postmortem_id: str, error: Exception):
+        """Quarantaine d'un fichier illisible, une fois son écriture vraisemblablement terminée"""
+        path = self.index.path_for(postmortem_id)
+        try:
+            age = time.time() - os.stat(path).st_mtime
+        except FileNotFoundError:
+            self.pending.pop(postmortem_id, None)
+            return
+        if age < QUARANTINE_GRACE_SECONDS:
+            self.pending.setdefault(postmortem_id, time.monotonic())
+            return
+        self.pending.pop(postmortem_id, None)
+
+        os.makedirs(self.quarantine_dir, exist_ok=True)
+        target = os.path.join(self.quarantine_dir, f"{postmortem_id}.{time.strftime('%Y%m%d_%H%M%S')}.json")
+        try:
+            os.replace(path, target)
+        except FileNotFoundError:
+            return
+        self.quarantined += 1
+        logger.error(f"[ERROR] Post-mortem {postmortem_id} illisible ({error}), mis en quarantaine: {target}")
+        # Le document disparaît de l'index (sa dernière version valide n'est plus sur disque)
+        self.index.reload(postmortem_id)
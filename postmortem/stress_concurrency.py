@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Test de charge concurrent de la création et de la mise à jour des post-mortems
+Plusieurs processus (comme des workers gunicorn) créent, lisent et mettent à jour
+en parallèle; vérifie l'unicité des IDs, l'absence de lectures partielles et de
+mises à jour perdues
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+from postmortem_index import PostmortemIndex, VersionConflict
+from postmortem_sqlite import SQLitePostmortemStore
+
+# Configuration du logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+COUNTER_ID = 'incident_stress_counter'
+
+
+def open_backend(backend: str, workdir: str):
+    """Backend ouvert dans le processus courant (une connexion ou un index par worker)"""
+    if backend == 'sqlite':
+        return SQLitePostmortemStore(os.path.join(workdir, 'postmortems.db'))
+    return PostmortemIndex(os.path.join(workdir, 'postmortems'))
+
+
+def creator_process(backend: str, workdir: str, threads: int, per_thread: int, results):
+    """Un worker: 'threads' créateurs concurrents de 'per_thread' post-mortems chacun"""
+    storage = open_backend(backend, workdir)
+    created: List[str] = []
+    lock = threading.Lock()
+
+    def create_many(thread_index: int):
+        for i in range(per_thread):
+            postmortem_id = storage.create({
+                'title': f"Stress {os.getpid()}-{thread_index}-{i}",
+                'status': 'Brouillon',
+                'timeline': [{'time': '00:00', 'description': 'x' * random.randint(100, 5000)}]
+            })
+            with lock:
+                created.append(postmortem_id)
+
+    workers = [threading.Thread(target=create_many, args=(t,)) for t in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    results.put(('created', created))
+
+
+def reader_process(backend: str, workdir: str, stop, results):
+    """Relit en boucle les documents présents; compte les lectures partielles ou invalides"""
+    storage = open_backend(backend, workdir)
+    directory = os.path.join(workdir, 'postmortems')
+    reads = torn = 0
+    while not stop.is_set():
+        if backend == 'sqlite':
+            ids = [summary['id'] for summary in storage.query(limit=50)[0]]
+        else:
+            ids = [name[:-5] for name in os.listdir(directory) if name.endswith('.json')][-50:]
+        for postmortem_id in ids:
+            if backend == 'sqlite':
+                document = storage.get(postmortem_id)
+                valid = document is not None
+            else:
+                # Lecture brute du fichier, sans cache: un fichier partiel échouerait au parsing
+                try:
+                    with open(os.path.join(directory, f"{postmortem_id}.json"), 'r', encoding='utf-8') as f:
+                        document = json.load(f)
+                    valid = document.get('id') == postmortem_id
+                except FileNotFoundError:
+                    continue
+                except json.JSONDecodeError:
+                    valid = False
+            reads += 1
+            torn += 0 if valid else 1
+    results.put(('reads', (reads, torn)))
+
+
+def updater_process(backend: str, workdir: str, threads: int, per_thread: int, results):
+    """Incréments concurrents d'un compteur avec réessai sur conflit de version"""
+    storage = open_backend(backend, workdir)
+    applied = conflicts = 0
+    lock = threading.Lock()
+
+    def increment_many():
+        nonlocal applied, conflicts
+        for _ in range(per_thread):
+            while True:
+                document = storage.get(COUNTER_ID) if backend == 'sqlite' else storage.read_file(COUNTER_ID)
+                try:
+                    storage.update(COUNTER_ID, {**document, 'counter': document['counter'] + 1},
+                                   document['version'])
+                    with lock:
+                        applied += 1
+                    break
+                except VersionConflict:
+                    with lock:
+                        conflicts += 1
+
+    workers = [threading.Thread(target=increment_many) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    results.put(('updates', (applied, conflicts)))
+
+
+def run_stress(backend: str, workdir: str, processes: int, threads: int, per_thread: int,
+               readers: int, updaters: int) -> Dict:
+    """Lance créateurs, lecteurs et updaters en parallèle et agrège les résultats"""
+    storage = open_backend(backend, workdir)
+    storage.save(COUNTER_ID, {'id': COUNTER_ID, 'title': 'Compteur', 'counter': 0, 'version': 1})
+
+    results = multiprocessing.Queue()
+    stop = multiprocessing.Event()
+    started = time.perf_counter()
+    reader_procs = [multiprocessing.Process(target=reader_process, args=(backend, workdir, stop, results))
+                    for _ in range(readers)]
+    writer_procs = [multiprocessing.Process(target=creator_process,
+                                            args=(backend, workdir, threads, per_thread, results))
+                    for _ in range(processes)]
+    writer_procs += [multiprocessing.Process(target=updater_process,
+                                             args=(backend, workdir, threads, per_thread, results))
+                     for _ in range(updaters)]
+    for process in reader_procs + writer_procs:
+        process.start()
+
+    # Les résultats sont lus avant join: une file pleine bloquerait la fin des processus
+    collected = [results.get() for _ in writer_procs]
+    stop.set()
+    collected += [results.get() for _ in reader_procs]
+    for process in reader_procs + writer_procs:
+        process.join()
+    elapsed = time.perf_counter() - started
+
+    created = [pid for kind, value in collected if kind == 'created' for pid in value]
+    reads = [value for kind, value in collected if kind == 'reads']
+    updates = [value for kind, value in collected if kind == 'updates']
+    final = open_backend(backend, workdir).get(COUNTER_ID)
+    return {
+        'elapsed': elapsed,
+        'created': len(created),
+        'unique_ids': len(set(created)),
+        'stored': sum(1 for pid in set(created) if storage.get(pid) is not None),
+        'reads': sum(r for r, _ in reads),
+        'torn_reads': sum(t for _, t in reads),
+        'updates_applied': sum(a for a, _ in updates),
+        'update_conflicts': sum(c for _, c in updates),
+        'counter': final['counter'],
+        'counter_version': final['version']
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Test de charge concurrent des post-mortems')
+    parser.add_argument('--backend', choices=['file', 'sqlite'], default='file',
+                       help='Backend de stockage (défaut: file)')
+    parser.add_argument('--processes', type=int, default=8,
+                       help='Processus créateurs (défaut: 8)')
+    parser.add_argument('--threads', type=int, default=32,
+                       help='Threads par processus (défaut: 32, soit 256 créateurs)')
+    parser.add_argument('--per-thread', type=int, default=5,
+                       help='Opérations par thread (défaut: 5)')
+    parser.add_argument('--readers', type=int, default=4,
+                       help='Processus lecteurs (défaut: 4)')
+    parser.add_argument('--updaters', type=int, default=2,
+                       help='Processus de mises à jour concurrentes (défaut: 2)')
+    parser.add_argument('--workdir',
+                       help='Répertoire de travail (défaut: répertoire temporaire supprimé à la fin)')
+
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='postmortem-stress-')
+    try:
+        report = run_stress(args.backend, workdir, args.processes, args.threads, args.per_thread,
+                            args.readers, args.updaters)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    creators = args.processes * args.threads
+    logger.info(f"[INFO] {creators} créateurs, {args.readers} lecteurs, {args.updaters * args.threads} updaters "
+                f"({args.backend}) en {report['elapsed']:.1f}s")
+    logger.info(f"[INFO] Créés: {report['created']}, IDs uniques: {report['unique_ids']}, "
+                f"relus: {report['stored']}")
+    logger.info(f"[INFO] Lectures: {report['reads']}, partielles ou invalides: {report['torn_reads']}")
+    logger.info(f"[INFO] Mises à jour: {report['updates_applied']} appliquées, {report['update_conflicts']} "
+                f"conflits réessayés, compteur final {report['counter']} (version {report['counter_version']})")
+
+    failures = []
+    if report['unique_ids'] != report['created'] or report['stored'] != report['created']:
+        failures.append("IDs en collision ou documents perdus")
+    if report['torn_reads']:
+        failures.append("lectures de fichiers partiels")
+    if report['counter'] != report['updates_applied']:
+        failures.append("mises à jour perdues")
+
+    if failures:
+        logger.error(f"[ERROR] Échec: {', '.join(failures)}")
+        sys.exit(1)
+    logger.info("[OK] Aucune collision, lecture partielle ni mise à jour perdue")
+
+
+if __name__ == "__main__":
+    main()
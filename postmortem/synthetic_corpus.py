@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Générateur de corpus synthétique de post-mortems
+Produit N post-mortems réalistes au schéma de data/postmortems/incident_20241215_091500.json
+(résumés, impacts, causes racines, timeline, leçons, actions, glossaire), reproductibles
+à graine égale, pour les benchmarks et tests de charge
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+# Configuration du logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Composant -> (produits affectés, description pour le glossaire)
+COMPONENTS = {
+    'Prometheus': (['Grafana', 'AlertManager', 'Dashboards de monitoring'], "Système de monitoring et d'alerting"),
+    'Grafana': (['Dashboards de monitoring', 'Rapports SLO'], "Plateforme de visualisation des métriques"),
+    'PostgreSQL': (['API de redirection', 'Service URL Shortener', 'Back-office'], "Base de données relationnelle"),
+    'Redis': (['Cache de sessions', 'API Gateway', 'Files de tâches'], "Base clé-valeur en mémoire"),
+    'Kafka': (['Pipeline d\'ingestion', 'Notifications', 'Audit'], "Plateforme de streaming d'événements"),
+    'Nginx': (['Applications web', 'API publique'], "Serveur web et reverse proxy"),
+    'etcd': (['API Kubernetes', 'Déploiements'], "Magasin clé-valeur distribué de Kubernetes"),
+    'CoreDNS': (['Résolution DNS interne', 'Services Kubernetes'], "Serveur DNS du cluster"),
+    'Ingress': (['Applications web', 'API publique', 'Dashboard admin'], "Point d'entrée HTTP du cluster"),
+    'Kubelet': (['Pods applicatifs', 'Jobs batch'], "Agent de nœud Kubernetes"),
+    'Vault': (['Gestion des secrets', 'Certificats TLS'], "Gestionnaire de secrets"),
+    'Elasticsearch': (['Recherche de logs', 'Kibana'], "Moteur de recherche et d'indexation"),
+    'RabbitMQ': (['Files de messages', 'Notifications'], "Broker de messages AMQP"),
+    'API Gateway': (['API publique', 'Applications mobiles'], "Passerelle d'API"),
+    'Keycloak': (['Service d\'authentification OAuth2', 'Dashboard admin'], "Fournisseur d'identité"),
+}
+
+# Scénarios de panne: (symptôme, cause technique, déclencheur, correctif, action préventive)
+FAILURES = [
+    ("saturation mémoire", "une fuite mémoire dans le module {module} a saturé les {count} Go alloués à {component}",
+     "le pic de trafic de {hour}h a multiplié les allocations", "redémarrage de {component} et augmentation des limites mémoire",
+     "Ajouter des alertes sur la consommation mémoire de {component}"),
+    ("latence élevée", "une requête sans index sur la table {table} provoquait des scans complets sur {count}M de lignes",
+     "le déploiement de la version {version} a activé la nouvelle requête", "ajout de l'index manquant et rollback de la version {version}",
+     "Tester en charge les requêtes de {component} avant chaque déploiement"),
+    ("certificat expiré", "le certificat TLS de {component} a expiré sans renouvellement automatique",
+     "l'expiration à {hour}h a rejeté toutes les connexions TLS", "renouvellement manuel du certificat et redémarrage des clients",
+     "Automatiser le renouvellement des certificats de {component}"),
+    ("quota dépassé", "le quota de {count} connexions de {component} a été atteint",
+     "un job batch a ouvert des connexions sans les libérer", "arrêt du job et purge des connexions inactives",
+     "Limiter les connexions par client de {component}"),
+    ("perte réseau", "une règle de network policy supprimée a isolé {component} du reste du cluster",
+     "la synchronisation GitOps a appliqué une configuration incomplète", "restauration de la network policy depuis git",
+     "Valider les network policies en préproduction"),
+    ("disque plein", "les logs de {component} ont rempli le volume de {count} Go",
+     "la rotation des logs était désactivée depuis la version {version}", "purge des logs et réactivation de la rotation",
+     "Surveiller l'espace disque des volumes de {component}"),
+    ("fuite de connexions", "le pool de connexions de {module} ne rendait pas les connexions en erreur",
+     "une série de timeouts de {component} a épuisé le pool", "redémarrage des instances de {module} et correctif du pool",
+     "Ajouter un circuit breaker devant {component}"),
+    ("timeout en cascade", "des réessais sans backoff vers {component} ont amplifié la charge d'un facteur {count}",
+     "un ralentissement ponctuel de {component} à {hour}h", "désactivation des réessais et délestage du trafic",
+     "Implémenter des réessais avec backoff exponentiel vers {component}"),
+    ("mise à jour échouée", "la mise à jour de {component} vers la version {version} a échoué silencieusement",
+     "le système de mise à jour automatique s'est lancé à {hour}h", "rollback vers la version précédente et restauration de la configuration",
+     "Ajouter des tests de validation avant les mises à jour de {component}"),
+    ("configuration erronée", "une valeur invalide du paramètre {module} a été déployée sur {component}",
+     "une modification manuelle de la configuration sans revue", "correction du paramètre et redéploiement",
+     "Imposer une revue des changements de configuration de {component}"),
+    ("réplication interrompue", "la réplication de {component} s'est arrêtée après une partition réseau",
+     "la bascule automatique a promu un réplica en retard de {count} minutes", "resynchronisation des réplicas depuis la sauvegarde",
+     "Surveiller le retard de réplication de {component}"),
+    ("erreurs 502", "les health checks de {component} échouaient après le changement de port",
+     "le déploiement de la version {version} a modifié le port d'écoute", "correction des health checks et redéploiement",
+     "Tester les health checks dans la pipeline de déploiement"),
+]
+
+MODULES = ['auth-service', 'billing-worker', 'url-resolver', 'session-manager', 'export-job', 'search-api',
+           'notification-worker', 'metrics-exporter', 'pool_size', 'max_connections', 'gc_interval']
+TABLES = ['urls', 'sessions', 'events', 'users', 'audit_logs', 'payments']
+DETECTIONS = ["Alerte Prometheus sur le taux d'erreurs", "Détection manuelle par un ingénieur d'astreinte",
+              "Signalement de clients au support", "Alerte de latence p99 sur le SLO",
+              "Synthetic monitoring en échec", "Alerte AlertManager sur l'indisponibilité"]
+OWNERS = ['Équipe SRE', 'Équipe DevOps', 'Équipe Security', 'Équipe Platform', 'Équipe Data']
+STATUSES = ['Final', 'Brouillon', 'En revue']
+ACTION_TYPES = ['prevent', 'mitigate', 'investigate', 'remediate']
+PRIORITIES = ['P0', 'P1', 'P2']
+
+TIMELINE_STEPS = [
+    ("Début de l'incident", "Premiers signes d'incident ({symptom}) sur {component}"),
+    ("Détection", "{detection}"),
+    ("Mobilisation de l'équipe", "L'astreinte {owner} ouvre un canal d'incident"),
+    ("Investigation initiale", "Analyse des logs et des métriques de {component}"),
+    ("Identification de la cause", "Découverte que {cause}"),
+    ("Tentative de mitigation", "Délestage du trafic vers {product}"),
+    ("Correctif appliqué", "{fix}"),
+    ("Stabilisation", "Retour progressif des métriques de {component} à la normale"),
+    ("Validation complète", "Vérification des dashboards et des alertes de {product}"),
+]
+
+LESSONS_WELL = ["La communication entre les équipes a été efficace", "Le runbook de {component} était à jour",
+                "Le rollback a fonctionné du premier coup", "Les sauvegardes étaient récentes et valides",
+                "L'astreinte a été mobilisée en moins de 10 minutes"]
+LESSONS_POORLY = ["Absence d'alerte spécifique sur {component}", "Changement déployé sans test de charge",
+                  "Pas de rollback automatique", "Documentation de {component} incomplète",
+                  "Dépendance non identifiée entre {component} et {product}"]
+LESSONS_LUCKY = ["L'incident est survenu en dehors des heures de pointe", "Aucune donnée n'a été perdue",
+                 "Un ingénieur expert de {component} était disponible"]
+
+
+def synthetic_postmortem(index: int, rng: random.Random) -> Dict:
+    """Post-mortem synthétique cohérent: un composant, un scénario de panne, des dates et une équipe"""
+    component = rng.choice(list(COMPONENTS))
+    products, definition = COMPONENTS[component]
+    symptom, cause, trigger, fix, prevention = rng.choice(FAILURES)
+    owner = rng.choice(OWNERS)
+    values = {
+        'component': component,
+        'module': rng.choice(MODULES),
+        'table': rng.choice(TABLES),
+        'count': rng.choice([2, 4, 8, 16, 32, 64, 128, 500]),
+        'version': f"{rng.randint(1, 9)}.{rng.randint(0, 30)}.{rng.randint(0, 9)}",
+        'hour': rng.randint(0, 23),
+    }
+    cause, trigger, fix, prevention = (text.format(**values) for text in (cause, trigger, fix, prevention))
+    affected = rng.sample(products, rng.randint(1, len(products)))
+    detection = rng.choice(DETECTIONS)
+
+    start = datetime(2019, 1, 1) + timedelta(minutes=rng.randint(0, 7 * 365 * 24 * 60))
+    minutes = int(rng.lognormvariate(4.3, 0.9)) + 5
+    end = start + timedelta(minutes=minutes)
+    duration = f"{minutes // 60}h{minutes % 60:02d}" if minutes >= 60 else f"{minutes}min"
+    iso = lambda moment: moment.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    context = {'symptom': symptom, 'component': component, 'detection': detection, 'owner': owner,
+               'cause': cause, 'fix': fix[0].upper() + fix[1:], 'product': affected[0]}
+    steps = TIMELINE_STEPS[:2] + rng.sample(TIMELINE_STEPS[2:-1], rng.randint(3, 6)) + TIMELINE_STEPS[-1:]
+    steps = [TIMELINE_STEPS[i] for i in sorted(TIMELINE_STEPS.index(step) for step in steps)]
+    offsets = sorted(rng.sample(range(1, max(minutes, len(steps) + 1)), len(steps) - 1))
+    timeline = [{'time': (start + timedelta(minutes=offset)).strftime('%H:%M'), 'title': title,
+                 'description': description.format(**context)}
+                for offset, (title, description) in zip([0] + offsets, steps)]
+
+    fill = lambda texts, count: [text.format(**context) for text in rng.sample(texts, count)]
+    revenue = rng.randint(0, 50) * 100
+    return {
+        'id': f"incident_synthetic_{index:06d}",
+        'title': f"Panne {component} - {symptom.capitalize()} sur {affected[0]}",
+        'owner': owner,
+        'shared_with': "Équipes SRE, Engineering, Management",
+        'status': rng.choice(STATUSES),
+        'incident_date': iso(start),
+        'published': (end + timedelta(days=rng.randint(1, 10))).strftime('%Y-%m-%d'),
+        'created_at': iso(end + timedelta(hours=rng.randint(1, 48))),
+        'executive_summary': {
+            'impact': f"L'incident a causé une dégradation de {', '.join(affected)} pendant {duration}.",
+            'root_cause': f"{cause[0].upper()}{cause[1:]}."
+        },
+        'problem_summary': {
+            'duration': duration,
+            'start_time': iso(start),
+            'end_time': iso(end),
+            'residual_effects': f"{iso(end)} - Rattrapage des traitements en attente",
+            'products_affected': ', '.join(affected),
+            'percentage_affected': f"{rng.randint(5, 100)}% des utilisateurs",
+            'user_impact': f"{symptom.capitalize()} sur {', '.join(affected)}",
+            'revenue_impact': f"Impact estimé à {revenue} €" if revenue else "Aucun impact direct sur les revenus",
+            'detection': detection,
+            'resolution': f"{fix[0].upper()}{fix[1:]}."
+        },
+        'impact': {
+            'user_impact': {
+                'requests_lost': f"{rng.randint(1, 900) * 1000} requêtes",
+                'data_source': "Logs applicatifs et métriques Prometheus",
+                'additional_symptoms': f"{symptom.capitalize()}, alertes en cascade sur {affected[0]}"
+            },
+            'revenue_impact': {
+                'revenue_loss': f"{revenue} €",
+                'revenue_period': f"{start.strftime('%H:%M')} - {end.strftime('%H:%M')} ({duration})",
+                'indirect_impacts': "Perte de confiance des utilisateurs et charge accrue du support"
+            },
+            'team_impact': {
+                'team_hours': f"{rng.randint(2, 40)} heures d'investigation et de résolution",
+                'customer_support': f"{rng.randint(0, 300)} tickets ouverts",
+                'secondary_effects': f"Retard des livraisons de l'{owner.lower()}"
+            }
+        },
+        'root_causes': {
+            'technical_cause': f"{cause[0].upper()}{cause[1:]}.",
+            'trigger': f"{trigger[0].upper()}{trigger[1:]}.",
+            'system_reaction': f"L'incident ({symptom}) sur {component} s'est propagé à {', '.join(affected)}.",
+            'non_idempotent_operation': f"La reprise de {values['module']} n'était pas idempotente.",
+            'missing_protections': f"Aucune protection de {component} contre ce scénario ({symptom}).",
+            'late_detection': f"Détection après {rng.randint(2, 60)} minutes: {detection.lower()}."
+        },
+        'timeline': timeline,
+        'lessons_learned': {
+            'things_that_went_well': fill(LESSONS_WELL, 2),
+            'things_that_went_poorly': {
+                'outage': fill(LESSONS_POORLY, 2),
+                'recovery': fill(LESSONS_POORLY, 1)
+            },
+            'where_we_got_lucky': fill(LESSONS_LUCKY, 1)
+        },
+        'action_items': [
+            {
+                'description': description,
+                'type': rng.choice(ACTION_TYPES),
+                'priority': rng.choice(PRIORITIES),
+                'owner': rng.choice(OWNERS),
+                'tracking_bug': f"{owner.split()[-1].upper()[:3]}-{rng.randint(100, 999)}"
+            }
+            for description in [prevention, f"Documenter la procédure de récupération de {component}",
+                                f"Revoir les alertes de {affected[0]}"][:rng.randint(1, 3)]
+        ],
+        'glossary': {component: definition},
+        'appendix': f"Logs de {component}, captures des dashboards et chronologie détaillée de l'incident."
+    }
+
+
+def generate_corpus(directory: str, count: int, seed: int = 42) -> List[str]:
+    """Écrit 'count' post-mortems synthétiques dans un répertoire; retourne leurs ids"""
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    ids = []
+    for index in range(count):
+        postmortem = synthetic_postmortem(index, rng)
+        with open(os.path.join(directory, f"{postmortem['id']}.json"), 'w', encoding='utf-8') as f:
+            json.dump(postmortem, f, indent=2, ensure_ascii=False)
+        ids.append(postmortem['id'])
+    return ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Génère un corpus synthétique de post-mortems')
+    parser.add_argument('--count', type=int, default=1000,
+                       help='Nombre de post-mortems (défaut: 1000)')
+    parser.add_argument('--output', default='data/synthetic',
+                       help='Répertoire de sortie (défaut: data/synthetic)')
+    parser.add_argument('--seed', type=int, default=42,
+                       help='Graine aléatoire (défaut: 42)')
+
+    args = parser.parse_args()
+
+    try:
+        ids = generate_corpus(args.output, args.count, args.seed)
+    except OSError as e:
+        logger.error(f"[ERROR] Erreur d'écriture du corpus: {e}")
+        sys.exit(1)
+    logger.info(f"[OK] {len(ids)} post-mortems synthétiques écrits dans {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -189,7 +189,6 @@ def check_python_dependencies():
         "typing",
         "dataclasses",
         "threading",
-        "schedule",
         "sqlite3"
     ]
     
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Backtest des politiques d'alerte burn rate pour le lab SRE
+Rejoue un historique minute par minute de compteurs good/total et évalue
+une grille de seuils et de paires de fenêtres en une seule passe vectorisée
+"""
+
+import json
+import logging
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import requests
+
+# Configuration du logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+STEP_SECONDS = 60
+# Prometheus limite le nombre de points par série retournés par query_range
+PROMETHEUS_CHUNK = timedelta(days=7)
+
+
+class SLIHistory:
+    """Historique minute par minute des compteurs good/total d'un SLI"""
+
+    def __init__(self, timestamps: np.ndarray, good: np.ndarray, total: np.ndarray,
+                 incident: Optional[np.ndarray] = None):
+        self.timestamps = timestamps
+        self.good = good
+        self.total = total
+        self.incident = incident
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @classmethod
+    def from_samples(cls, samples: List[Tuple[float, float, float]],
+                     incident_flags: Optional[Dict[float, bool]] = None) -> 'SLIHistory':
+        """Construit un historique régulier (trous remplis par des zéros)"""
+        if not samples:
+            raise ValueError("Historique vide")
+
+        samples.sort(key=lambda s: s[0])
+        first = int(samples[0][0] // STEP_SECONDS)
+        last = int(samples[-1][0] // STEP_SECONDS)
+        length = last - first + 1
+
+        good = np.zeros(length)
+        total = np.zeros(length)
+        idx = np.array([int(s[0] // STEP_SECONDS) - first for s in samples])
+        np.add.at(good, idx, [s[1] for s in samples])
+        np.add.at(total, idx, [s[2] for s in samples])
+
+        incident = None
+        if incident_flags:
+            incident = np.zeros(length, dtype=bool)
+            for ts, flag in incident_flags.items():
+                if flag:
+                    incident[int(ts // STEP_SECONDS) - first] = True
+
+        timestamps = (np.arange(length) + first) * float(STEP_SECONDS)
+        return cls(timestamps, good, total, incident)
+
+    @classmethod
+    def load_ndjson(cls, path: str) -> 'SLIHistory':
+        """Charge un export NDJSON ({"timestamp", "good", "total", "incident"?} par ligne)"""
+        samples = []
+        incident_flags = {}
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                    ts = record['timestamp']
+                    if isinstance(ts, str):
+                        ts = datetime.fromisoformat(ts.replace('Z', '+00:00')).timestamp()
+                    samples.append((float(ts), float(record['good']), float(record['total'])))
+                    if 'incident' in record:
+                        incident_flags[float(ts)] = bool(record['incident'])
+                except (ValueError, KeyError) as e:
+                    logger.warning(f"Ligne {line_number} ignorée: {e}")
+        return cls.from_samples(samples, incident_flags)
+
+    @classmethod
+    def load_cache(cls, path: str) -> 'SLIHistory':
+        """Charge le cache local (.npz)"""
+        with np.load(path) as data:
+            incident = data['incident'] if 'incident' in data.files else None
+            return cls(data['timestamps'], data['good'], data['total'], incident)
+
+    def save_cache(self, path: str):
+        """Sauvegarde l'historique dans le cache local (.npz)"""
+        arrays = {'timestamps': self.timestamps, 'good': self.good, 'total': self.total}
+        if self.incident is not None:
+            arrays['incident'] = self.incident
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load_prometheus(cls, prometheus_url: str, sli_config: Dict, days: int) -> 'SLIHistory':
+        """Récupère l'historique depuis Prometheus par tranches de 7 jours"""
+        session = requests.Session()
+        measurement = sli_config['measurement']
+        end_time = datetime.now()
+        start_time = end_time - timedelta(days=days)
+
+        counts: Dict[str, Dict[float, float]] = {'good': {}, 'total': {}}
+        chunk_start = start_time
+        while chunk_start < end_time:
+            chunk_end = min(chunk_start + PROMETHEUS_CHUNK, end_time)
+            for key, query in (('good', measurement['good_query']), ('total', measurement['valid_query'])):
+                response = session.get(
+                    f"{prometheus_url.rstrip('/')}/api/v1/query_range",
+                    params={
+                        'query': query,
+                        'start': int(chunk_start.timestamp()),
+                        'end': int(chunk_end.timestamp()),
+                        'step': str(STEP_SECONDS)
+                    },
+                    timeout=60
+                )
+                response.raise_for_status()
+                for result in response.json()['data']['result']:
+                    for ts, value in result.get('values', []):
+                        counts[key][float(ts)] = counts[key].get(float(ts), 0.0) + float(value)
+            chunk_start = chunk_end
+
+        samples = [(ts, counts['good'].get(ts, 0.0), total) for ts, total in counts['total'].items()]
+        return cls.from_samples(samples)
+
+    @classmethod
+    def synthetic(cls, days: int, requests_per_minute: float = 1000.0,
+                  incidents: int = 8, seed: int = 42) -> 'SLIHistory':
+        """Génère un historique synthétique avec des incidents injectés"""
+        rng = np.random.default_rng(seed)
+        length = days * 24 * 60
+        total = rng.poisson(requests_per_minute, length).astype(float)
+        error_ratio = np.full(length, 0.0002)
+        incident = np.zeros(length, dtype=bool)
+
+        for _ in range(incidents):
+            start = int(rng.integers(0, length - 600))
+            duration = int(rng.integers(15, 360))
+            error_ratio[start:start + duration] = rng.uniform(0.003, 0.08)
+            incident[start:start + duration] = True
+
+        bad = rng.binomial(total.astype(int), error_ratio).astype(float)
+        now = int(time.time() // STEP_SECONDS) * STEP_SECONDS
+        timestamps = now - (length - np.arange(length)) * float(STEP_SECONDS)
+        return cls(timestamps, total - bad, total, incident)
+
+
+def find_segments(mask: np.ndarray) -> List[Tuple[int, int]]:
+    """Retourne les segments [début, fin) où le masque est vrai"""
+    padded = np.concatenate(([False], mask, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    return list(zip(edges[::2], edges[1::2]))
+
+
+def detect_incidents(history: SLIHistory, slo_target: float, burn_threshold: float = 10.0,
+                     min_minutes: int = 5, merge_gap: int = 15) -> List[Tuple[int, int]]:
+    """Incidents de référence: étiquettes de l'export ou périodes de burn rate soutenu"""
+    if history.incident is not None:
+        return find_segments(history.incident)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        error_ratio = np.where(history.total > 0, 1 - history.good / history.total, 0.0)
+    mask = error_ratio / (1 - slo_target) >= burn_threshold
+
+    segments = []
+    for start, end in find_segments(mask):
+        if segments and start - segments[-1][1] <= merge_gap:
+            segments[-1] = (segments[-1][0], end)
+        else:
+            segments.append((start, end))
+    return [(s, e) for s, e in segments if e - s >= min_minutes]
+
+
+def window_burn_rates(history: SLIHistory, windows: List[int], slo_target: float) -> np.ndarray:
+    """Matrice (fenêtres x minutes) des burn rates glissants via sommes cumulées"""
+    bad_cum = np.concatenate(([0.0], np.cumsum(history.total - history.good)))
+    total_cum = np.concatenate(([0.0], np.cumsum(history.total)))
+    length = len(history)
+    index = np.arange(1, length + 1)
+
+    burn = np.empty((len(windows), length))
+    for i, window in enumerate(windows):
+        lower = np.maximum(index - window, 0)
+        bad = bad_cum[index] - bad_cum[lower]
+        total = total_cum[index] - total_cum[lower]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            burn[i] = np.where(total > 0, bad / total, 0.0)
+    return burn / (1 - slo_target)
+
+
+def backtest(history: SLIHistory, slo_target: float, thresholds: List[float],
+             window_pairs: List[Tuple[int, int]], incidents: List[Tuple[int, int]],
+             grace_minutes: int = 60) -> List[Dict]:
+    """Évalue toutes les politiques (paire de fenêtres x seuil) en une passe"""
+    windows = sorted({w for pair in window_pairs for w in pair})
+    position = {w: i for i, w in enumerate(windows)}
+    burn = window_burn_rates(history, windows, slo_target)
+
+    long_idx = [position[long] for long, _ in window_pairs]
+    short_idx = [position[short] for _, short in window_pairs]
+    # Condition ET: le min des deux burn rates doit dépasser le seuil
+    combined = np.minimum(burn[long_idx], burn[short_idx])
+    threshold_array = np.asarray(thresholds, dtype=float)
+    firing = combined[:, None, :] >= threshold_array[None, :, None]
+
+    onsets = firing.copy()
+    onsets[..., 1:] &= ~firing[..., :-1]
+
+    # Zone d'incident élargie du délai de grâce pour qualifier les faux positifs
+    length = len(history)
+    incident_zone = np.zeros(length, dtype=bool)
+    for start, end in incidents:
+        incident_zone[start:min(length, end + grace_minutes)] = True
+    false_positives = (onsets & ~incident_zone).sum(axis=-1)
+
+    bad_cum = np.concatenate(([0.0], np.cumsum(history.total - history.good)))
+    period_budget = (1 - slo_target) * history.total.sum()
+
+    shape = firing.shape[:2]
+    detected = np.zeros(shape, dtype=int)
+    detection_sum = np.zeros(shape)
+    detection_max = np.zeros(shape)
+    budget_before_alert = np.zeros(shape)
+
+    for start, end in incidents:
+        stop = min(length, end + grace_minutes)
+        segment = firing[..., start:stop]
+        hit = segment.any(axis=-1)
+        delay = np.where(hit, segment.argmax(axis=-1), stop - start)
+        detected += hit
+        detection_sum += np.where(hit, delay, 0)
+        detection_max = np.maximum(detection_max, np.where(hit, delay, 0))
+        alert_at = np.minimum(start + delay, end)
+        budget_before_alert += (bad_cum[alert_at] - bad_cum[start]) / period_budget
+
+    results = []
+    for p, (long, short) in enumerate(window_pairs):
+        for t, threshold in enumerate(thresholds):
+            hits = int(detected[p, t])
+            results.append({
+                'long_window_minutes': long,
+                'short_window_minutes': short,
+                'burn_rate_threshold': float(threshold),
+                'incidents': len(incidents),
+                'detected': hits,
+                'missed': len(incidents) - hits,
+                'false_positives': int(false_positives[p, t]),
+                'mean_detection_minutes': float(detection_sum[p, t] / hits) if hits else None,
+                'max_detection_minutes': float(detection_max[p, t]) if hits else None,
+                'budget_consumed_before_alert': float(budget_before_alert[p, t])
+            })
+
+    results.sort(key=lambda r: (
+        r['missed'],
+        r['false_positives'],
+        r['mean_detection_minutes'] if r['mean_detection_minutes'] is not None else float('inf')
+    ))
+    return results
+
+
+def build_window_pairs(slo_config: Dict, long_windows: List[int],
+                       short_windows: List[int]) -> List[Tuple[int, int]]:
+    """Combine les fenêtres demandées et celles des politiques configurées"""
+    pairs = {(long, short) for long in long_windows for short in short_windows if short < long}
+    policies = slo_config.get('alerting', {}).get('multi_window_burn_rate', {}).get('policies', {})
+    for policy in policies.values():
+        pairs.add((policy['long_window_minutes'], policy['short_window_minutes']))
+    return sorted(pairs)
+
+
+def parse_int_list(value: str) -> List[int]:
+    """Parse une liste d'entiers séparés par des virgules"""
+    return [int(v) for v in value.split(',') if v]
+
+
+def parse_float_list(value: str) -> List[float]:
+    """Parse une liste de flottants séparés par des virgules"""
+    return [float(v) for v in value.split(',') if v]
+
+
+def print_report(results: List[Dict], top: int):
+    """Affiche le classement des politiques"""
+    print("\n" + "="*100)
+    print("[INFO] BACKTEST DES POLITIQUES D'ALERTE BURN RATE")
+    print("="*100)
+    print(f"{'Longue':>8} {'Courte':>8} {'Seuil':>7} {'Détectés':>9} {'Manqués':>8} "
+          f"{'Faux pos.':>10} {'Délai moy.':>11} {'Délai max':>10} {'Budget avant alerte':>20}")
+    print("-" * 100)
+    for r in results[:top]:
+        mean_delay = f"{r['mean_detection_minutes']:.1f}min" if r['mean_detection_minutes'] is not None else "-"
+        max_delay = f"{r['max_detection_minutes']:.0f}min" if r['max_detection_minutes'] is not None else "-"
+        print(f"{r['long_window_minutes']:>7}m {r['short_window_minutes']:>7}m "
+              f"{r['burn_rate_threshold']:>6.1f}x {r['detected']:>9} {r['missed']:>8} "
+              f"{r['false_positives']:>10} {mean_delay:>11} {max_delay:>10} "
+              f"{r['budget_consumed_before_alert']*100:>19.2f}%")
+    print("="*100)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backtest des politiques d\'alerte burn rate')
+    parser.add_argument('--config', default='slo_config.json',
+                       help='Fichier de configuration SLO (défaut: slo_config.json)')
+    parser.add_argument('--sli', default='availability',
+                       help='SLI à rejouer (défaut: availability)')
+    parser.add_argument('--source', choices=['cache', 'ndjson', 'prometheus', 'synthetic'],
+                       default='cache', help='Source de l\'historique (défaut: cache)')
+    parser.add_argument('--input', help='Fichier NDJSON à charger (source ndjson)')
+    parser.add_argument('--cache', default='sli_history.npz',
+                       help='Fichier de cache local (défaut: sli_history.npz)')
+    parser.add_argument('--prometheus', default='http://localhost:9090',
+                       help='URL de Prometheus (défaut: http://localhost:9090)')
+    parser.add_argument('--days', type=int, default=30,
+                       help='Jours d\'historique (défaut: 30)')
+    parser.add_argument('--thresholds', type=parse_float_list,
+                       default=[1, 2, 3, 4, 6, 8, 10, 14.4, 20],
+                       help='Seuils de burn rate séparés par des virgules')
+    parser.add_argument('--long-windows', type=parse_int_list,
+                       default=[30, 60, 120, 360, 720, 1440],
+                       help='Fenêtres longues en minutes')
+    parser.add_argument('--short-windows', type=parse_int_list,
+                       default=[5, 10, 30, 60, 120],
+                       help='Fenêtres courtes en minutes')
+    parser.add_argument('--incident-burn-rate', type=float, default=10.0,
+                       help='Burn rate définissant un incident de référence (défaut: 10)')
+    parser.add_argument('--grace', type=int, default=60,
+                       help='Délai de grâce après un incident en minutes (défaut: 60)')
+    parser.add_argument('--top', type=int, default=20,
+                       help='Nombre de politiques affichées (défaut: 20)')
+    parser.add_argument('--json', help='Écrit tous les résultats dans ce fichier JSON')
+
+    args = parser.parse_args()
+
+    try:
+        with open(args.config, 'r') as f:
+            slo_config = json.load(f)
+        sli_config = slo_config['slis'][args.sli]
+        slo_target = sli_config['slo_target']
+
+        if args.source == 'ndjson':
+            if not args.input:
+                parser.error("--input est requis avec --source ndjson")
+            history = SLIHistory.load_ndjson(args.input)
+        elif args.source == 'prometheus':
+            history = SLIHistory.load_prometheus(args.prometheus, sli_config, args.days)
+            history.save_cache(args.cache)
+            logger.info(f"Historique mis en cache dans {args.cache}")
+        elif args.source == 'synthetic':
+            history = SLIHistory.synthetic(args.days)
+        else:
+            history = SLIHistory.load_cache(args.cache)
+
+        window_pairs = build_window_pairs(slo_config, args.long_windows, args.short_windows)
+        incidents = detect_incidents(history, slo_target, args.incident_burn_rate)
+        logger.info(f"{len(history)} minutes d'historique, {len(incidents)} incidents de référence, "
+                    f"{len(window_pairs) * len(args.thresholds)} politiques")
+
+        started = time.perf_counter()
+        results = backtest(history, slo_target, args.thresholds, window_pairs, incidents, args.grace)
+        logger.info(f"Backtest terminé en {time.perf_counter() - started:.2f}s")
+
+        print_report(results, args.top)
+
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(results, f, indent=2)
+
+    except KeyboardInterrupt:
+        logger.info("\n[STOP] Backtest interrompu par l'utilisateur")
+        sys.exit(1)
+    except Exception as e:
+        logger.error(f"[ERROR] Erreur lors du backtest: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
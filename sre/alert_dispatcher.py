@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+File d'envoi des alertes SLO pour le lab SRE
+Les alertes d'un cycle sont regroupées, dédupliquées puis livrées par un
+worker en arrière-plan avec retry et backoff, sans bloquer l'évaluation
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, HistogramMetricFamily
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DISPATCH_CONFIG = {
+    'queue_size': 100,
+    'suppression_minutes': 30,
+    'max_retries': 3,
+    'backoff_seconds': 1,
+    'backoff_multiplier': 2,
+    'max_backoff_seconds': 30
+}
+
+LATENCY_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def alert_key(alert: Dict) -> Tuple:
+    """Identité d'une alerte pour la déduplication"""
+    return (
+        alert.get('service'),
+        alert.get('slo'),
+        alert.get('name', alert.get('type')),
+        alert.get('severity'),
+        alert.get('window_hours'),
+        alert.get('state')
+    )
+
+
+class AlertDispatcher:
+    """File bornée d'alertes vidée par un worker de livraison"""
+
+    def __init__(self, deliver: Callable[[List[Dict]], None], config: Optional[Dict] = None):
+        # deliver(alerts) doit lever une exception en cas d'échec pour déclencher un retry
+        self.deliver = deliver
+        self.config = {**DEFAULT_DISPATCH_CONFIG, **(config or {})}
+        self.queue: queue.Queue = queue.Queue(maxsize=self.config['queue_size'])
+        self.suppression_seconds = self.config['suppression_minutes'] * 60
+        self.last_sent: Dict[Tuple, float] = {}
+
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.lock = threading.Lock()
+
+        # Compteurs exposés en métriques
+        self.enqueued = 0
+        self.delivered = 0
+        self.failed = 0
+        self.dropped = 0
+        self.suppressed = 0
+        self.retries = 0
+        self.latency_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+
+    def deduplicate(self, alerts: List[Dict], now: float) -> List[Dict]:
+        """Retire les alertes identiques déjà envoyées dans la fenêtre de suppression"""
+        fresh = []
+        seen = set()
+        with self.lock:
+            # Purge des clés expirées pour borner la mémoire
+            self.last_sent = {
+                key: sent_at for key, sent_at in self.last_sent.items()
+                if now - sent_at < self.suppression_seconds
+            }
+            for alert in alerts:
+                key = alert_key(alert)
+                if key in seen or key in self.last_sent:
+                    self.suppressed += 1
+                    continue
+                seen.add(key)
+                fresh.append(alert)
+        return fresh
+
+    def dispatch(self, alerts: List[Dict]) -> bool:
+        """Met en file les alertes d'un cycle (un seul envoi), sans jamais bloquer"""
+        now = time.time()
+        batch = self.deduplicate(alerts, now)
+        if not batch:
+            return False
+
+        try:
+            self.queue.put_nowait((now, batch))
+        except queue.Full:
+            with self.lock:
+                self.dropped += len(batch)
+            logger.error(f"File d'alertes pleine: {len(batch)} alertes abandonnées")
+            return False
+
+        with self.lock:
+            for alert in batch:
+                self.last_sent[alert_key(alert)] = now
+            self.enqueued += len(batch)
+        return True
+
+    def deliver_with_retry(self, batch: List[Dict]) -> bool:
+        """Livre un lot avec backoff exponentiel; False si toutes les tentatives échouent"""
+        delay = self.config['backoff_seconds']
+        for attempt in range(self.config['max_retries'] + 1):
+            try:
+                self.deliver(batch)
+                return True
+            except Exception as e:
+                if attempt == self.config['max_retries'] or self.stop_event.is_set():
+                    logger.error(f"Échec de livraison de {len(batch)} alertes: {e}")
+                    return False
+                logger.warning(f"Livraison en échec (tentative {attempt + 1}), nouvel essai dans {delay}s: {e}")
+                with self.lock:
+                    self.retries += 1
+                self.stop_event.wait(delay)
+                delay = min(delay * self.config['backoff_multiplier'], self.config['max_backoff_seconds'])
+        return False
+
+    def observe_latency(self, seconds: float):
+        """Enregistre la latence entre mise en file et livraison"""
+        with self.lock:
+            self.latency_sum += seconds
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    self.latency_counts[i] += 1
+                    break
+            else:
+                self.latency_counts[-1] += 1
+
+    def run(self):
+        """Boucle du worker: vide la file jusqu'à l'arrêt"""
+        while not (self.stop_event.is_set() and self.queue.empty()):
+            try:
+                enqueued_at, batch = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            try:
+                if self.deliver_with_retry(batch):
+                    self.observe_latency(time.time() - enqueued_at)
+                    with self.lock:
+                        self.delivered += len(batch)
+                else:
+                    with self.lock:
+                        self.failed += len(batch)
+                        # Une alerte non livrée peut être renvoyée au cycle suivant
+                        for alert in batch:
+                            self.last_sent.pop(alert_key(alert), None)
+            finally:
+                self.queue.task_done()
+
+    def start(self) -> threading.Thread:
+        """Démarre le worker de livraison"""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name='alert-dispatcher', daemon=True)
+            self.thread.start()
+        return self.thread
+
+    def stop(self, timeout: float = 10):
+        """Arrête le worker après avoir tenté de vider la file"""
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout)
+
+    def flush(self, timeout: float = 30) -> bool:
+        """Attend la livraison des alertes en file (collecte unique)"""
+        deadline = time.monotonic() + timeout
+        while self.queue.unfinished_tasks:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def metric_families(self) -> List:
+        """Métriques de la file (profondeur, livraisons, latence)"""
+        with self.lock:
+            depth = GaugeMetricFamily('slo_alert_queue_depth', 'Lots d\'alertes en attente de livraison')
+            depth.add_metric([], self.queue.qsize())
+
+            alerts = CounterMetricFamily('slo_alert_dispatch', 'Alertes traitées par la file',
+                                         labels=['outcome'])
+            for outcome, value in (('enqueued', self.enqueued), ('delivered', self.delivered),
+                                   ('failed', self.failed), ('dropped', self.dropped),
+                                   ('suppressed', self.suppressed)):
+                alerts.add_metric([outcome], value)
+
+            retries = CounterMetricFamily('slo_alert_delivery_retries', 'Nouvelles tentatives de livraison')
+            retries.add_metric([], self.retries)
+
+            buckets = []
+            cumulative = 0
+            for bound, count in zip(list(LATENCY_BUCKETS) + [float('inf')], self.latency_counts):
+                cumulative += count
+                buckets.append(('+Inf' if bound == float('inf') else str(bound), cumulative))
+            latency = HistogramMetricFamily('slo_alert_delivery_latency_seconds',
+                                            'Délai entre mise en file et livraison des alertes')
+            latency.add_metric([], buckets, self.latency_sum)
+
+        return [depth, alerts, retries, latency]
+
+    def collect(self):
+        # Permet d'enregistrer directement le dispatcher dans un CollectorRegistry
+        return iter(self.metric_families())
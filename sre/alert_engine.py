@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Moteur d'alertes burn rate multi-fenêtres pour le lab SRE
+Évalue en continu les conditions fenêtre longue ET fenêtre courte par sévérité
+à partir de buffers circulaires de compteurs good/total
+"""
+
+import logging
+import random
+import time
+import argparse
+from typing import Dict, List, Optional, Tuple, Iterable
+
+logger = logging.getLogger(__name__)
+
+# Politiques par défaut (recommandations du SRE Workbook pour un SLO sur 30 jours)
+DEFAULT_POLICIES = {
+    'page_fast': {
+        'long_window_minutes': 60,
+        'short_window_minutes': 5,
+        'burn_rate_threshold': 14.4,
+        'severity': 'critical',
+        'description': "2% de l'error budget consommé en 1 heure"
+    },
+    'page_slow': {
+        'long_window_minutes': 360,
+        'short_window_minutes': 30,
+        'burn_rate_threshold': 6.0,
+        'severity': 'critical',
+        'description': "5% de l'error budget consommé en 6 heures"
+    },
+    'ticket': {
+        'long_window_minutes': 1440,
+        'short_window_minutes': 120,
+        'burn_rate_threshold': 3.0,
+        'severity': 'warning',
+        'description': "10% de l'error budget consommé en 24 heures"
+    }
+}
+
+
+class RollingWindow:
+    """Fenêtre glissante de compteurs good/total sur un buffer circulaire"""
+
+    __slots__ = ('size', 'good', 'total', 'good_sum', 'total_sum', 'head')
+
+    def __init__(self, size: int):
+        self.size = max(1, size)
+        self.good = [0.0] * self.size
+        self.total = [0.0] * self.size
+        self.good_sum = 0.0
+        self.total_sum = 0.0
+        self.head = None  # Index absolu du slot le plus récent
+
+    def advance(self, slot: int):
+        """Avance la fenêtre jusqu'au slot donné en vidant les slots expirés"""
+        head = self.head
+        if head is None:
+            self.head = slot
+            return
+        if slot <= head:
+            return
+
+        if slot - head >= self.size:
+            # Toute la fenêtre a expiré
+            for i in range(self.size):
+                self.good[i] = 0.0
+                self.total[i] = 0.0
+            self.good_sum = 0.0
+            self.total_sum = 0.0
+        else:
+            good, total = self.good, self.total
+            for s in range(head + 1, slot + 1):
+                i = s % self.size
+                self.good_sum -= good[i]
+                self.total_sum -= total[i]
+                good[i] = 0.0
+                total[i] = 0.0
+                if i == 0:
+                    # Recalcul périodique pour éviter la dérive des sommes flottantes
+                    self.good_sum = sum(good)
+                    self.total_sum = sum(total)
+        self.head = slot
+
+    def add(self, slot: int, good: float, total: float) -> bool:
+        """Ajoute un échantillon; retourne False s'il est trop ancien pour la fenêtre"""
+        self.advance(slot)
+        if self.head - slot >= self.size:
+            return False
+
+        i = slot % self.size
+        self.good[i] += good
+        self.total[i] += total
+        self.good_sum += good
+        self.total_sum += total
+        return True
+
+    def error_ratio(self) -> float:
+        """Ratio d'erreurs sur la fenêtre"""
+        if self.total_sum <= 0:
+            return 0.0
+        return max(0.0, 1.0 - self.good_sum / self.total_sum)
+
+
+class _SLOState:
+    """État d'un SLO: fenêtres partagées entre politiques et seuils précalculés"""
+
+    __slots__ = ('slo_id', 'slo_target', 'budget', 'policies', 'windows', 'rules')
+
+    def __init__(self, slo_id: str, slo_target: float, policies: Dict[str, Dict], step_seconds: int):
+        self.slo_id = slo_id
+        self.slo_target = slo_target
+        self.policies = policies
+        self.budget = 1.0 - slo_target
+        self.windows = {}
+        self.rules = []
+
+        for name, policy in policies.items():
+            long_minutes = policy['long_window_minutes']
+            short_minutes = policy['short_window_minutes']
+            for minutes in (long_minutes, short_minutes):
+                if minutes not in self.windows:
+                    self.windows[minutes] = RollingWindow(int(minutes * 60 // step_seconds))
+            self.rules.append((
+                name,
+                policy,
+                self.windows[long_minutes],
+                self.windows[short_minutes],
+                policy['burn_rate_threshold'] * self.budget
+            ))
+
+
+class MultiWindowBurnRateEngine:
+    """Évaluateur streaming des alertes burn rate multi-fenêtres"""
+
+    def __init__(self, policies: Optional[Dict[str, Dict]] = None, step_seconds: int = 60):
+        self.policies = policies or DEFAULT_POLICIES
+        self.step_seconds = step_seconds
+        self.slos: Dict[str, _SLOState] = {}
+
+    @staticmethod
+    def policies_from_slo_config(slo_config: Dict) -> Tuple[Dict[str, Dict], int]:
+        """Politiques et pas d'évaluation définis dans slo_config.json"""
+        alerting = slo_config.get('alerting', {})
+        multi_window = alerting.get('multi_window_burn_rate', {})
+        policies = multi_window.get('policies')
+
+        if not policies:
+            # Dérive des politiques depuis les alertes burn rate simples
+            policies = {}
+            for name, config in alerting.get('burn_rate_alerts', {}).items():
+                long_minutes = config['window_minutes']
+                policies[name] = {
+                    'long_window_minutes': long_minutes,
+                    'short_window_minutes': max(1, long_minutes // 12),
+                    'burn_rate_threshold': config['burn_rate_threshold'],
+                    'severity': config['severity'],
+                    'description': config['description']
+                }
+
+        return policies, multi_window.get('step_seconds', 60)
+
+    @classmethod
+    def from_slo_config(cls, slo_config: Dict) -> 'MultiWindowBurnRateEngine':
+        """Construit le moteur depuis slo_config.json (SLIs avec good_query)"""
+        engine = cls(*cls.policies_from_slo_config(slo_config))
+        service = slo_config.get('service', 'default')
+        for sli_name, sli_config in slo_config.get('slis', {}).items():
+            if 'good_query' in sli_config.get('measurement', {}):
+                engine.add_slo(f"{service}:{sli_name}", sli_config['slo_target'])
+        return engine
+
+    @classmethod
+    def from_slo_configs(cls, slo_configs: List[Dict]) -> 'MultiWindowBurnRateEngine':
+        """Construit un moteur partagé par plusieurs services, alimenté par requêtes groupées
+
+        Chaque service garde ses propres politiques (surcharges 'alerting' comprises); le pas
+        d'évaluation est commun à tous. Seuls les SLIs avec good_filter (évaluables par
+        BatchedSLOEvaluator) sont enregistrés.
+        """
+        engine = cls(*cls.policies_from_slo_config(slo_configs[0]))
+        for slo_config in slo_configs:
+            service = slo_config.get('service', 'default')
+            policies, step_seconds = cls.policies_from_slo_config(slo_config)
+            if step_seconds != engine.step_seconds:
+                raise ValueError(f"Pas d'évaluation multi-fenêtres de {service} ({step_seconds}s) différent "
+                                 f"de celui des autres services ({engine.step_seconds}s)")
+            for sli_name, sli_config in slo_config.get('slis', {}).items():
+                if 'good_filter' in sli_config.get('measurement', {}):
+                    engine.add_slo(f"{service}:{sli_name}", sli_config['slo_target'], policies)
+        return engine
+
+    @property
+    def max_window_minutes(self) -> int:
+        """Plus grande fenêtre utilisée par les politiques"""
+        policy_sets = [self.policies] + [state.policies for state in self.slos.values()]
+        return max(policy['long_window_minutes'] for policies in policy_sets for policy in policies.values())
+
+    def add_slo(self, slo_id: str, slo_target: float, policies: Optional[Dict[str, Dict]] = None):
+        """Enregistre un SLO à évaluer (avec les politiques du moteur par défaut)"""
+        if slo_target >= 1.0:
+            raise ValueError(f"SLO target invalide pour {slo_id}: {slo_target}")
+        self.slos[slo_id] = _SLOState(slo_id, slo_target, policies or self.policies, self.step_seconds)
+
+    def observe(self, slo_id: str, timestamp: float, good: float, total: float):
+        """Ajoute un échantillon good/total au SLO (O(1) par fenêtre)"""
+        slot = int(timestamp // self.step_seconds)
+        for window in self.slos[slo_id].windows.values():
+            window.add(slot, good, total)
+
+    def observe_many(self, slo_id: str, samples: Iterable[Tuple[float, float, float]]) -> int:
+        """Ajoute une série d'échantillons (timestamp, good, total)"""
+        count = 0
+        for timestamp, good, total in samples:
+            self.observe(slo_id, timestamp, good, total)
+            count += 1
+        return count
+
+    def burn_rates(self, slo_id: str, timestamp: Optional[float] = None) -> Dict[int, float]:
+        """Burn rate courant par fenêtre (en minutes)"""
+        state = self.slos[slo_id]
+        if timestamp is not None:
+            slot = int(timestamp // self.step_seconds)
+            for window in state.windows.values():
+                window.advance(slot)
+        return {
+            minutes: window.error_ratio() / state.budget
+            for minutes, window in state.windows.items()
+        }
+
+    def evaluate(self, timestamp: Optional[float] = None,
+                 slo_ids: Optional[Iterable[str]] = None) -> List[Dict]:
+        """Évalue les conditions fenêtre longue ET fenêtre courte de chaque politique"""
+        slot = int(timestamp // self.step_seconds) if timestamp is not None else None
+        alerts = []
+
+        for slo_id in (slo_ids if slo_ids is not None else self.slos):
+            state = self.slos[slo_id]
+            if slot is not None:
+                for window in state.windows.values():
+                    window.advance(slot)
+
+            for name, policy, long_window, short_window, error_threshold in state.rules:
+                long_error = long_window.error_ratio()
+                if long_error < error_threshold or error_threshold <= 0:
+                    continue
+                short_error = short_window.error_ratio()
+                if short_error < error_threshold:
+                    continue
+
+                alerts.append({
+                    'slo': slo_id,
+                    'name': name,
+                    'type': name,
+                    'severity': policy['severity'],
+                    'description': policy['description'],
+                    'message': f"{slo_id}: {policy['description']}",
+                    'burn_rate': long_error / state.budget,
+                    'short_burn_rate': short_error / state.budget,
+                    'threshold': policy['burn_rate_threshold'],
+                    'long_window_minutes': policy['long_window_minutes'],
+                    'short_window_minutes': policy['short_window_minutes'],
+                    'window_hours': policy['long_window_minutes'] / 60
+                })
+
+        return alerts
+
+
+def run_benchmark(slo_count: int, minutes: int):
+    """Mesure le débit d'ingestion et d'évaluation du moteur"""
+    engine = MultiWindowBurnRateEngine()
+    for i in range(slo_count):
+        engine.add_slo(f"svc-{i}:availability", 0.999)
+
+    rng = random.Random(42)
+    start_ts = time.time() - minutes * 60
+    slo_ids = list(engine.slos)
+
+    started = time.perf_counter()
+    evaluations = 0
+    for minute in range(minutes):
+        ts = start_ts + minute * 60
+        for slo_id in slo_ids:
+            total = 1000.0
+            engine.observe(slo_id, ts, total - rng.random() * 5, total)
+        engine.evaluate(ts)
+        evaluations += slo_count
+    elapsed = time.perf_counter() - started
+
+    pairs = evaluations * len(engine.policies)
+    print(f"SLOs: {slo_count}, minutes simulées: {minutes}")
+    print(f"Durée: {elapsed:.2f}s")
+    print(f"Échantillons ingérés/s: {evaluations / elapsed:,.0f}")
+    print(f"Paires SLO/politique évaluées/s: {pairs / elapsed:,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Moteur d\'alertes burn rate multi-fenêtres')
+    parser.add_argument('--benchmark', action='store_true',
+                       help='Lance un benchmark du moteur')
+    parser.add_argument('--slos', type=int, default=1000,
+                       help='Nombre de SLOs simulés (défaut: 1000)')
+    parser.add_argument('--minutes', type=int, default=120,
+                       help='Minutes simulées (défaut: 120)')
+
+    args = parser.parse_args()
+
+    if args.benchmark:
+        run_benchmark(args.slos, args.minutes)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
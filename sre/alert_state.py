@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Cycle de vie des alertes SLO pour le lab SRE
+Machine à états pending -> firing -> resolved par (service, SLI, alerte, fenêtre,
+sévérité): seules les transitions sont écrites en base et notifiées
+"""
+
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+FIRING = 'firing'
+RESOLVED = 'resolved'
+ACTIVE_STATES = (PENDING, FIRING)
+
+
+def alert_sli(alert: Dict) -> str:
+    """SLI concerné par une alerte (moteur multi-fenêtres: 'service:sli')"""
+    if 'slo' in alert:
+        return alert['slo'].split(':', 1)[-1]
+    return alert.get('sli', 'availability')
+
+
+def alert_state_key(alert: Dict) -> str:
+    """Clé stable d'une alerte: service, SLI, nom, fenêtre et sévérité"""
+    return '|'.join(str(part) for part in (
+        alert.get('service'),
+        alert_sli(alert),
+        alert.get('name', alert.get('type')),
+        alert.get('window_hours'),
+        alert.get('severity')
+    ))
+
+
+def parse_db_timestamp(value: str) -> float:
+    """Horodatage SQLite (CURRENT_TIMESTAMP, UTC) en epoch"""
+    return datetime.strptime(value[:19], '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc).timestamp()
+
+
+class AlertStateMachine:
+    """États courants des alertes, reconstruits depuis la table alerts au démarrage"""
+
+    def __init__(self, pending_minutes: float = 0):
+        # Durée pendant laquelle la condition doit tenir avant de passer en firing
+        self.pending_seconds = pending_minutes * 60
+        self.active: Dict[str, Dict] = {}
+
+    def restore(self, rows: Iterable[Dict]):
+        """Recharge les alertes pending/firing persistées"""
+        for row in rows:
+            self.active[row['alert_key']] = {
+                'state': row['state'],
+                'since': parse_db_timestamp(row['timestamp']),
+                'alert': {
+                    'type': row['alert_type'],
+                    'severity': row['severity'],
+                    'message': row['message'],
+                    'burn_rate': row['burn_rate'],
+                    'threshold': row['threshold'],
+                    'service': row['service']
+                }
+            }
+        if self.active:
+            logger.info(f"{len(self.active)} alertes actives restaurées depuis la base")
+
+    def update(self, alerts: List[Dict], now: float, services: Optional[Set[str]] = None) -> List[Dict]:
+        """Applique les conditions d'un cycle et retourne les transitions
+
+        Les alertes actives absentes du cycle passent en resolved, uniquement pour
+        les services évalués (tous si services vaut None).
+        """
+        transitions = []
+        seen = set()
+
+        for alert in alerts:
+            key = alert_state_key(alert)
+            if key in seen:
+                continue
+            seen.add(key)
+
+            current = self.active.get(key)
+            if current is None:
+                state = FIRING if self.pending_seconds <= 0 else PENDING
+                self.active[key] = {'state': state, 'since': now, 'alert': alert}
+                transitions.append(self.transition(key, alert, None, state))
+            else:
+                current['alert'] = alert
+                if current['state'] == PENDING and now - current['since'] >= self.pending_seconds:
+                    current['state'] = FIRING
+                    transitions.append(self.transition(key, alert, PENDING, FIRING))
+
+        for key in list(self.active):
+            current = self.active[key]
+            if key in seen or (services is not None and current['alert'].get('service') not in services):
+                continue
+            del self.active[key]
+            transitions.append(self.transition(key, current['alert'], current['state'], RESOLVED))
+
+        return transitions
+
+    @staticmethod
+    def transition(key: str, alert: Dict, previous: Optional[str], state: str) -> Dict:
+        """Décrit un changement d'état"""
+        return {'key': key, 'alert': alert, 'previous': previous, 'state': state}
+
+    @staticmethod
+    def notifications(transitions: List[Dict]) -> List[Dict]:
+        """Alertes à notifier: passage en firing, ou résolution d'une alerte qui notifiait"""
+        notify = []
+        for transition in transitions:
+            if transition['state'] == FIRING or (
+                    transition['state'] == RESOLVED and transition['previous'] == FIRING):
+                notify.append({**transition['alert'], 'state': transition['state']})
+        return notify
+
+    def firing(self) -> List[Dict]:
+        """Alertes actuellement en firing"""
+        return [entry['alert'] for entry in self.active.values() if entry['state'] == FIRING]
+
+    def active_alerts(self, service: Optional[str] = None) -> List[Dict]:
+        """Alertes pending ou firing (d'un service si précisé), avec leur état"""
+        return [{**entry['alert'], 'state': entry['state']} for entry in self.active.values()
+                if service is None or entry['alert'].get('service') in (service, None)]
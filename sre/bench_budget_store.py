@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark d'écriture de l'historique d'error budget
+Compare l'écriture historique (une connexion et un commit par ligne) au
+BudgetStore (connexion WAL longue durée, executemany par cycle)
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from budget_store import BudgetStore
+
+WINDOWS = [1, 6, 24]
+
+
+def legacy_store_metrics(db_path: str, timestamp: str, window_hours: int, burn_rate: float):
+    """Écriture telle que faite avant BudgetStore: connexion, insert et commit par appel"""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute('''
+        INSERT INTO error_budget_metrics
+        (timestamp, window_hours, burn_rate, error_budget_consumed, availability,
+         time_to_exhaustion_hours, alerts)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', (timestamp, window_hours, burn_rate, 0.1, 0.999, 12.0, json.dumps([])))
+    conn.commit()
+    conn.close()
+
+
+def bench_legacy(db_path: str, cycles: int) -> float:
+    """Durée d'écriture de 'cycles' cycles avec l'ancienne méthode"""
+    store = BudgetStore(db_path)
+    store.close()
+    # L'ancienne base était en journal rollback, sans index
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=DELETE")
+    for index in ('idx_metrics_window_ts', 'idx_metrics_ts'):
+        conn.execute(f"DROP INDEX IF EXISTS {index}")
+    conn.close()
+
+    start = datetime(2024, 1, 1)
+    started = time.perf_counter()
+    for minute in range(cycles):
+        timestamp = (start + timedelta(minutes=minute)).strftime('%Y-%m-%d %H:%M:%S')
+        for window_hours in WINDOWS:
+            legacy_store_metrics(db_path, timestamp, window_hours, 1.0)
+    return time.perf_counter() - started
+
+
+def bench_store(db_path: str, cycles: int) -> float:
+    """Durée d'écriture de 'cycles' cycles avec BudgetStore"""
+    store = BudgetStore(db_path)
+    start = datetime(2024, 1, 1)
+    started = time.perf_counter()
+    for minute in range(cycles):
+        timestamp = (start + timedelta(minutes=minute)).strftime('%Y-%m-%d %H:%M:%S')
+        store.write_cycle([
+            {
+                'timestamp': timestamp,
+                'window_hours': window_hours,
+                'burn_rate': 1.0,
+                'error_budget_consumed': 0.1,
+                'availability': 0.999,
+                'time_to_exhaustion_hours': 12.0,
+                'alerts': [],
+                'service': 'url-shortener'
+            }
+            for window_hours in WINDOWS
+        ])
+    elapsed = time.perf_counter() - started
+    store.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark d\'écriture de l\'historique d\'error budget')
+    parser.add_argument('--days', type=int, default=365,
+                       help='Jours d\'échantillons à 1 minute écrits avec BudgetStore (défaut: 365)')
+    parser.add_argument('--legacy-cycles', type=int, default=2000,
+                       help='Cycles écrits avec l\'ancienne méthode, extrapolés (défaut: 2000)')
+    parser.add_argument('--dir', default=None,
+                       help='Répertoire des bases temporaires (défaut: répertoire temporaire système)')
+
+    args = parser.parse_args()
+    cycles = args.days * 24 * 60
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        legacy_elapsed = bench_legacy(os.path.join(tmp, 'legacy.db'), args.legacy_cycles)
+        legacy_rate = args.legacy_cycles * len(WINDOWS) / legacy_elapsed
+
+        store_elapsed = bench_store(os.path.join(tmp, 'store.db'), cycles)
+        store_rate = cycles * len(WINDOWS) / store_elapsed
+
+        print(f"Échantillons: {args.days} jours à 1 minute, {len(WINDOWS)} fenêtres "
+              f"({cycles * len(WINDOWS):,} lignes)")
+        print(f"Ancienne méthode: {legacy_rate:,.0f} lignes/s "
+              f"(estimé {cycles * len(WINDOWS) / legacy_rate / 60:,.1f} min pour la période)")
+        print(f"BudgetStore:      {store_rate:,.0f} lignes/s ({store_elapsed:,.1f}s mesurées)")
+        print(f"Gain: x{store_rate / legacy_rate:,.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark de l'évaluation multi-services groupée
+Lance un faux Prometheus HTTP local et mesure le temps d'évaluation en
+fonction du nombre de SLOs
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+from slo_registry import BatchedSLOEvaluator, expand_slo_config
+
+BUCKETS = ['0.05', '0.1', '0.25', '0.5', '1', '2.5', '+Inf']
+SERVICE_MATCHER = re.compile(r'=~"([^"]*)"')
+
+
+class FakePrometheusHandler(BaseHTTPRequestHandler):
+    """Répond aux requêtes groupées avec un échantillon par service"""
+
+    latency_seconds = 0.0
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        form = parse_qs(self.rfile.read(length).decode())
+        query = form['query'][0]
+        services = SERVICE_MATCHER.search(query).group(1).replace('\\', '').split('|')
+        label = re.search(r'sum by \((\w+)', query).group(1)
+
+        result = []
+        if self.path.endswith('/query_range'):
+            start, end, step = (int(float(form[key][0])) for key in ('start', 'end', 'step'))
+            value = '59.94' if 'status' in query else '60'
+            for service in services:
+                result.append({'metric': {label: service},
+                               'values': [[ts, value] for ts in range(start, end + 1, step)]})
+        for service in ([] if result else services):
+            if '_bucket' in query:
+                for i, le in enumerate(BUCKETS):
+                    result.append({'metric': {label: service, 'le': le},
+                                   'value': [time.time(), str(600 + 70 * i)]})
+            else:
+                value = 999.0 if 'status' in query else 1000.0
+                result.append({'metric': {label: service}, 'value': [time.time(), str(value)]})
+
+        # Simule le coût réseau et d'évaluation d'une requête
+        time.sleep(self.latency_seconds)
+        result_type = 'matrix' if self.path.endswith('/query_range') else 'vector'
+        body = json.dumps({'status': 'success', 'data': {'resultType': result_type, 'result': result}}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def build_configs(base_config: dict, count: int) -> list:
+    """Génère une configuration multi-services de 'count' services"""
+    base = {key: value for key, value in base_config.items() if key != 'service'}
+    base['services'] = [{'service': f'service-{i:04d}'} for i in range(count)]
+    return expand_slo_config(base)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de l\'évaluation multi-services')
+    parser.add_argument('--config', default='slo_config.json',
+                       help='Configuration SLO servant de modèle (défaut: slo_config.json)')
+    parser.add_argument('--counts', default='10,50,100,250,500',
+                       help='Nombres de services à évaluer (défaut: 10,50,100,250,500)')
+    parser.add_argument('--latency-ms', type=float, default=20.0,
+                       help='Latence simulée par requête Prometheus (défaut: 20ms)')
+
+    args = parser.parse_args()
+
+    with open(args.config, 'r', encoding='utf-8-sig') as f:
+        base_config = json.load(f)
+
+    FakePrometheusHandler.latency_seconds = args.latency_ms / 1000
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakePrometheusHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    windows = [60, 360, 1440]
+    print(f"{'Services':>9} {'SLOs':>6} {'Requêtes':>9} {'Durée':>9} {'ms/SLO':>8} {'Requêtes naïves':>16}")
+    try:
+        for count in [int(c) for c in args.counts.split(',')]:
+            configs = build_configs(base_config, count)
+            evaluator = BatchedSLOEvaluator(configs, url)
+            slo_count = sum(len(members) for members in evaluator.ratio_groups.values())
+            slo_count += sum(len(members) for members in evaluator.latency_groups.values())
+
+            started = time.perf_counter()
+            results = evaluator.evaluate(windows)
+            elapsed = time.perf_counter() - started
+            assert len(results) == count
+
+            # Approche naïve: une requête par service, par SLI et par fenêtre (2 pour un ratio)
+            naive_queries = len(windows) * sum(
+                2 if sli['measurement'].get('type') == 'ratio' else 1
+                for config in configs for sli in config['slis'].values()
+                if 'good_filter' in sli['measurement'] or sli['measurement'].get('type') == 'histogram'
+            )
+            print(f"{count:>9} {slo_count:>6} {evaluator.queries_sent:>9} {elapsed:>8.3f}s "
+                  f"{elapsed * 1000 / slo_count:>8.3f} {naive_queries:>16}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Prévision en ligne de l'épuisement de l'error budget
+Moyenne exponentielle et régression linéaire pondérée du burn rate, mises à
+jour en O(1) par échantillon, avec intervalles de confiance sur l'ETA
+"""
+
+import math
+from statistics import NormalDist
+from typing import Dict, Iterable, Optional, Tuple
+
+# Au-delà, l'origine des temps est recentrée pour garder des sommes bien conditionnées
+REBASE_HOURS = 1000.0
+
+STATE_FIELDS = ('t0', 'last_ts', 'samples', 'w', 'sx', 'sy', 'sxx', 'sxy', 'syy',
+                'ewma_burn_rate', 'last_burn_rate', 'last_consumed')
+
+
+def exhaustion_hours(remaining: float, burn_rate: float, slope: float) -> Optional[float]:
+    """Temps pour consommer 'remaining' avec un burn rate linéaire burn_rate + slope * t
+
+    Racine positive de slope/2 t² + burn_rate t - remaining = 0 (None si jamais atteint).
+    """
+    if remaining <= 0:
+        return 0.0
+    discriminant = burn_rate * burn_rate + 2 * slope * remaining
+    if discriminant < 0:
+        return None
+    denominator = burn_rate + math.sqrt(discriminant)
+    if denominator <= 0:
+        return None
+    return 2 * remaining / denominator
+
+
+class BudgetForecaster:
+    """Statistiques glissantes par (service, SLI, fenêtre), sans relecture de l'historique"""
+
+    def __init__(self, half_life_hours: float = 6.0, confidence: float = 0.9, min_samples: int = 3):
+        # Oubli exponentiel: un échantillon perd la moitié de son poids en half_life_hours
+        self.decay_per_hour = math.log(2) / half_life_hours
+        self.confidence = confidence
+        self.z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        self.min_samples = min_samples
+        self.states: Dict[str, Dict] = {}
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict]) -> 'BudgetForecaster':
+        """Construit le prévisionniste depuis la section 'forecast' de la configuration SLO"""
+        config = config or {}
+        return cls(config.get('half_life_hours', 6.0), config.get('confidence', 0.9),
+                   config.get('min_samples', 3))
+
+    @staticmethod
+    def key(service: str, sli: str, window_hours) -> str:
+        """Clé d'une série suivie"""
+        return f"{service}:{sli}:{window_hours}h"
+
+    def restore(self, states: Dict[str, Dict]):
+        """Recharge les états persistés"""
+        for key, state in states.items():
+            if all(field in state for field in STATE_FIELDS):
+                self.states[key] = state
+
+    def observe(self, key: str, timestamp: float, burn_rate: float, consumed: float) -> bool:
+        """Intègre un échantillon en O(1); ignore les échantillons antérieurs au dernier"""
+        state = self.states.get(key)
+        if state is None:
+            state = dict.fromkeys(STATE_FIELDS, 0.0)
+            state.update(t0=timestamp, last_ts=timestamp, samples=0, ewma_burn_rate=burn_rate)
+            self.states[key] = state
+        elif timestamp < state['last_ts']:
+            return False
+
+        decay = math.exp(-self.decay_per_hour * (timestamp - state['last_ts']) / 3600)
+        for field in ('w', 'sx', 'sy', 'sxx', 'sxy', 'syy'):
+            state[field] *= decay
+        state['ewma_burn_rate'] += (1 - decay) * (burn_rate - state['ewma_burn_rate'])
+
+        x = (timestamp - state['t0']) / 3600
+        if x > REBASE_HOURS:
+            self.rebase(state, x)
+            x = 0.0
+
+        state['w'] += 1
+        state['sx'] += x
+        state['sy'] += burn_rate
+        state['sxx'] += x * x
+        state['sxy'] += x * burn_rate
+        state['syy'] += burn_rate * burn_rate
+        state['samples'] += 1
+        state['last_ts'] = timestamp
+        state['last_burn_rate'] = burn_rate
+        state['last_consumed'] = consumed
+        return True
+
+    @staticmethod
+    def rebase(state: Dict, shift: float):
+        """Déplace l'origine des temps de 'shift' heures (sommes translatées, sans historique)"""
+        state['sxx'] += -2 * shift * state['sx'] + shift * shift * state['w']
+        state['sxy'] -= shift * state['sy']
+        state['sx'] -= shift * state['w']
+        state['t0'] += shift * 3600
+
+    def fit(self, state: Dict, x_now: float) -> Optional[Tuple[float, float, float, float]]:
+        """Burn rate ajusté à x_now, pente, et leurs erreurs standard"""
+        w = state['w']
+        if state['samples'] < self.min_samples or w <= 2:
+            return None
+        sxx = state['sxx'] - state['sx'] ** 2 / w
+        if sxx <= 1e-12:
+            return None
+        sxy = state['sxy'] - state['sx'] * state['sy'] / w
+        syy = state['syy'] - state['sy'] ** 2 / w
+
+        slope = sxy / sxx
+        x_mean = state['sx'] / w
+        fitted = state['sy'] / w + slope * (x_now - x_mean)
+        residual_variance = max(0.0, syy - slope * sxy) / (w - 2)
+        slope_error = math.sqrt(residual_variance / sxx)
+        fitted_error = math.sqrt(residual_variance * (1 / w + (x_now - x_mean) ** 2 / sxx))
+        return fitted, slope, fitted_error, slope_error
+
+    def forecast(self, key: str, now: Optional[float] = None) -> Optional[Dict]:
+        """ETA d'épuisement (heures) avec bornes de confiance, None si série inconnue"""
+        state = self.states.get(key)
+        if state is None:
+            return None
+        now = now if now is not None else state['last_ts']
+        remaining = max(0.0, 1 - state['last_consumed'])
+
+        result = {
+            'key': key,
+            'samples': state['samples'],
+            'remaining': remaining,
+            'burn_rate': state['last_burn_rate'],
+            'ewma_burn_rate': state['ewma_burn_rate'],
+            'trend_per_hour': None,
+            'confidence': self.confidence,
+            'eta_ewma_hours': exhaustion_hours(remaining, state['ewma_burn_rate'], 0.0)
+        }
+
+        fit = self.fit(state, (now - state['t0']) / 3600)
+        if fit is None:
+            # Pas assez d'échantillons: même estimation que le burn rate courant
+            eta = exhaustion_hours(remaining, state['last_burn_rate'], 0.0)
+            result.update(eta_hours=eta, eta_lower_hours=eta, eta_upper_hours=eta)
+            return result
+
+        fitted, slope, fitted_error, slope_error = fit
+        result.update(
+            trend_per_hour=slope,
+            eta_hours=exhaustion_hours(remaining, fitted, slope),
+            # Borne basse: burn rate et tendance pessimistes; borne haute: optimistes
+            eta_lower_hours=exhaustion_hours(remaining, fitted + self.z * fitted_error,
+                                             slope + self.z * slope_error),
+            eta_upper_hours=exhaustion_hours(remaining, fitted - self.z * fitted_error,
+                                             slope - self.z * slope_error)
+        )
+        return result
+
+    def forecast_all(self, now: Optional[float] = None) -> Dict[str, Dict]:
+        """Prévisions de toutes les séries suivies"""
+        return {key: self.forecast(key, now) for key in self.states}
+
+    def export_states(self, keys: Optional[Iterable[str]] = None) -> Dict[str, Dict]:
+        """États à persister (tous, ou seulement les clés mises à jour)"""
+        keys = self.states.keys() if keys is None else keys
+        return {key: dict(self.states[key]) for key in keys if key in self.states}
@@ -0,0 +1,606 @@
+#!/usr/bin/env python3
+"""
+Stockage SQLite de l'error budget pour le lab SRE
+Une connexion longue durée en mode WAL, écritures groupées par cycle,
+requêtes paramétrées sur des index couvrants et paliers de rétention
+(brut -> agrégats horaires -> agrégats journaliers) compactés en arrière-plan
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    # NORMAL suffit en WAL: pas de corruption possible, seule la dernière transaction peut être perdue
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-16000",      # ~16 Mo de cache de pages
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=134217728",    # 128 Mo
+    "PRAGMA busy_timeout=5000"
+)
+
+SCHEMA = (
+    '''
+    CREATE TABLE IF NOT EXISTS error_budget_metrics (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+        window_hours INTEGER,
+        burn_rate REAL,
+        error_budget_consumed REAL,
+        availability REAL,
+        time_to_exhaustion_hours REAL,
+        alerts TEXT,
+        service TEXT
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS alerts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+        alert_type TEXT,
+        severity TEXT,
+        message TEXT,
+        burn_rate REAL,
+        threshold REAL,
+        resolved BOOLEAN DEFAULT FALSE,
+        service TEXT,
+        state TEXT,
+        resolved_at DATETIME,
+        alert_key TEXT
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS error_budget_rollup_hourly (
+        bucket DATETIME NOT NULL,
+        service TEXT NOT NULL DEFAULT '',
+        window_hours INTEGER NOT NULL,
+        samples INTEGER,
+        burn_rate_avg REAL,
+        burn_rate_min REAL,
+        burn_rate_max REAL,
+        error_budget_consumed_avg REAL,
+        error_budget_consumed_max REAL,
+        availability_avg REAL,
+        availability_min REAL,
+        time_to_exhaustion_min REAL,
+        alert_count INTEGER,
+        PRIMARY KEY (bucket, service, window_hours)
+    ) WITHOUT ROWID
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS error_budget_rollup_daily (
+        bucket DATETIME NOT NULL,
+        service TEXT NOT NULL DEFAULT '',
+        window_hours INTEGER NOT NULL,
+        samples INTEGER,
+        burn_rate_avg REAL,
+        burn_rate_min REAL,
+        burn_rate_max REAL,
+        error_budget_consumed_avg REAL,
+        error_budget_consumed_max REAL,
+        availability_avg REAL,
+        availability_min REAL,
+        time_to_exhaustion_min REAL,
+        alert_count INTEGER,
+        PRIMARY KEY (bucket, service, window_hours)
+    ) WITHOUT ROWID
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS rollup_state (
+        tier TEXT PRIMARY KEY,
+        watermark DATETIME
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS forecast_state (
+        key TEXT PRIMARY KEY,
+        state TEXT NOT NULL,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+    '''
+)
+
+INDEXES = (
+    # Index couvrant des lectures par fenêtre: pas d'accès à la table pour les tendances
+    '''CREATE INDEX IF NOT EXISTS idx_metrics_window_ts
+       ON error_budget_metrics (window_hours, timestamp, burn_rate, error_budget_consumed, availability)''',
+    '''CREATE INDEX IF NOT EXISTS idx_metrics_ts ON error_budget_metrics (timestamp)''',
+    '''CREATE INDEX IF NOT EXISTS idx_alerts_ts ON alerts (timestamp, severity)''',
+    # Index partiel: seules les alertes pending/firing sont recherchées par clé
+    '''CREATE INDEX IF NOT EXISTS idx_alerts_active
+       ON alerts (alert_key) WHERE state IN ('pending', 'firing')'''
+)
+
+INSERT_METRIC = '''
+    INSERT INTO error_budget_metrics
+    (timestamp, window_hours, burn_rate, error_budget_consumed, availability,
+     time_to_exhaustion_hours, alerts, service)
+    VALUES (COALESCE(?, CURRENT_TIMESTAMP), ?, ?, ?, ?, ?, ?, ?)
+'''
+
+INSERT_ALERT = '''
+    INSERT INTO alerts (timestamp, alert_type, severity, message, burn_rate, threshold, service,
+                        state, alert_key)
+    VALUES (COALESCE(?, CURRENT_TIMESTAMP), ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+UPDATE_ALERT_STATE = '''
+    UPDATE alerts
+    SET state = ?1, burn_rate = ?2,
+        resolved = (?1 = 'resolved'),
+        resolved_at = CASE WHEN ?1 = 'resolved' THEN CURRENT_TIMESTAMP END
+    WHERE alert_key = ?3 AND state IN ('pending', 'firing')
+'''
+
+# Agrégats par bucket de ?1 secondes, moyenne mobile sur ?5 buckets précédents
+SELECT_BUCKETS_RAW = '''
+    SELECT *, AVG(burn_rate_avg) OVER (
+        PARTITION BY window_hours ORDER BY bucket ROWS BETWEEN ?5 PRECEDING AND CURRENT ROW
+    ) AS burn_rate_moving_avg
+    FROM (
+        SELECT datetime((CAST(strftime('%s', timestamp) AS INTEGER) / ?1) * ?1, 'unixepoch') AS bucket,
+               window_hours, COUNT(*) AS samples,
+               MIN(burn_rate) AS burn_rate_min, AVG(burn_rate) AS burn_rate_avg, MAX(burn_rate) AS burn_rate_max,
+               MAX(error_budget_consumed) AS error_budget_consumed_max, AVG(availability) AS availability_avg,
+               SUM(CASE WHEN alerts IS NOT NULL AND alerts != '[]' THEN 1 ELSE 0 END) AS alert_count
+        FROM error_budget_metrics
+        WHERE timestamp > datetime('now', ?2) AND (?3 IS NULL OR window_hours = ?3)
+              AND (?4 IS NULL OR service = ?4)
+        GROUP BY bucket, window_hours
+    )
+    ORDER BY bucket DESC, window_hours
+'''
+
+# Même agrégation depuis un palier d'agrégats (moyennes pondérées par le nombre d'échantillons)
+SELECT_BUCKETS_ROLLUP = '''
+    SELECT *, AVG(burn_rate_avg) OVER (
+        PARTITION BY window_hours ORDER BY bucket ROWS BETWEEN ?5 PRECEDING AND CURRENT ROW
+    ) AS burn_rate_moving_avg
+    FROM (
+        SELECT datetime((CAST(strftime('%s', bucket) AS INTEGER) / ?1) * ?1, 'unixepoch') AS bucket,
+               window_hours, SUM(samples) AS samples,
+               MIN(burn_rate_min) AS burn_rate_min,
+               SUM(burn_rate_avg * samples) / SUM(samples) AS burn_rate_avg,
+               MAX(burn_rate_max) AS burn_rate_max,
+               MAX(error_budget_consumed_max) AS error_budget_consumed_max,
+               SUM(availability_avg * samples) / SUM(samples) AS availability_avg,
+               SUM(alert_count) AS alert_count
+        FROM {table}
+        WHERE bucket > datetime('now', ?2) AND (?3 IS NULL OR window_hours = ?3)
+              AND (?4 IS NULL OR service = ?4)
+        GROUP BY 1, window_hours
+    )
+    ORDER BY bucket DESC, window_hours
+'''
+
+SELECT_ALERT_COUNTS = '''
+    SELECT severity, COUNT(*) AS total,
+           SUM(CASE WHEN state IN ('pending', 'firing') THEN 1 ELSE 0 END) AS active
+    FROM alerts
+    WHERE timestamp > datetime('now', ?1) AND (?2 IS NULL OR service = ?2)
+    GROUP BY severity
+'''
+
+# Dernière ligne par (service, fenêtre), limitée au dernier jour pour rester sur l'index
+# (avec MAX(), SQLite renvoie les autres colonnes de la ligne qui porte le maximum)
+SELECT_LATEST = '''
+    SELECT *, MAX(timestamp) AS latest_timestamp FROM error_budget_metrics
+    WHERE timestamp > datetime('now', '-1 day')
+    GROUP BY service, window_hours
+    ORDER BY service, window_hours
+'''
+
+UPSERT_FORECAST = '''
+    INSERT OR REPLACE INTO forecast_state (key, state, updated_at) VALUES (?, ?, CURRENT_TIMESTAMP)
+'''
+
+SELECT_ACTIVE_ALERTS = '''
+    SELECT * FROM alerts WHERE state IN ('pending', 'firing') ORDER BY timestamp
+'''
+
+SELECT_HISTORY = '''
+    SELECT * FROM error_budget_metrics
+    WHERE timestamp > datetime('now', ?)
+    ORDER BY timestamp DESC
+'''
+
+# Agrégation d'une plage [?, ?) du brut vers les buckets horaires
+ROLLUP_HOURLY = '''
+    INSERT OR REPLACE INTO error_budget_rollup_hourly
+    SELECT strftime('%Y-%m-%d %H:00:00', timestamp), COALESCE(service, ''), window_hours,
+           COUNT(*), AVG(burn_rate), MIN(burn_rate), MAX(burn_rate),
+           AVG(error_budget_consumed), MAX(error_budget_consumed),
+           AVG(availability), MIN(availability), MIN(time_to_exhaustion_hours),
+           SUM(CASE WHEN alerts IS NOT NULL AND alerts != '[]' THEN 1 ELSE 0 END)
+    FROM error_budget_metrics
+    WHERE timestamp >= ? AND timestamp < ?
+    GROUP BY 1, 2, 3
+'''
+
+# Agrégation des buckets horaires en buckets journaliers (moyennes pondérées)
+ROLLUP_DAILY = '''
+    INSERT OR REPLACE INTO error_budget_rollup_daily
+    SELECT strftime('%Y-%m-%d 00:00:00', bucket), service, window_hours,
+           SUM(samples), SUM(burn_rate_avg * samples) / SUM(samples), MIN(burn_rate_min), MAX(burn_rate_max),
+           SUM(error_budget_consumed_avg * samples) / SUM(samples), MAX(error_budget_consumed_max),
+           SUM(availability_avg * samples) / SUM(samples), MIN(availability_min), MIN(time_to_exhaustion_min),
+           SUM(alert_count)
+    FROM error_budget_rollup_hourly
+    WHERE bucket >= ? AND bucket < ?
+    GROUP BY 1, 2, 3
+'''
+
+SELECT_ROLLUP_HISTORY = '''
+    SELECT bucket AS timestamp, window_hours, burn_rate_avg AS burn_rate,
+           error_budget_consumed_avg AS error_budget_consumed, availability_avg AS availability,
+           time_to_exhaustion_min AS time_to_exhaustion_hours, NULLIF(service, '') AS service,
+           samples, burn_rate_min, burn_rate_max, alert_count
+    FROM {table}
+    WHERE bucket > datetime('now', ?)
+    ORDER BY bucket DESC
+'''
+
+# Paliers du plus fin au plus grossier: (nom, table, résolution en minutes, format de bucket, source)
+TIERS = (
+    ('raw', 'error_budget_metrics', 1, None, None),
+    ('hourly', 'error_budget_rollup_hourly', 60, '%Y-%m-%d %H:00:00', ROLLUP_HOURLY),
+    ('daily', 'error_budget_rollup_daily', 1440, '%Y-%m-%d 00:00:00', ROLLUP_DAILY)
+)
+
+
+class BudgetStore:
+    """Accès SQLite partagé par le tracker (thread-safe)"""
+
+    def __init__(self, db_path: str = "error_budget.db", storage_config: Optional[Dict] = None):
+        self.db_path = db_path
+        storage_config = storage_config or {}
+        # Rétentions en jours; None = conservation illimitée (comportement sans compaction)
+        self.retention_days = {
+            'raw': storage_config.get('raw_retention_days'),
+            'hourly': storage_config.get('hourly_retention_days'),
+            'daily': None
+        }
+        self.alert_retention_days = storage_config.get('alert_retention_days')
+        self.compaction_batch_hours = storage_config.get('compaction_batch_hours', 24)
+        self.delete_batch_size = storage_config.get('delete_batch_size', 5000)
+        self.compaction_thread = None
+        self.stop_event = threading.Event()
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        for pragma in PRAGMAS:
+            self.conn.execute(pragma)
+        self.init_schema()
+
+    def init_schema(self):
+        """Crée tables et index, migre les bases existantes"""
+        with self.lock, self.conn:
+            for statement in SCHEMA:
+                self.conn.execute(statement)
+
+            # Migration: colonne service des bases créées avant le suivi multi-services
+            for table in ('error_budget_metrics', 'alerts'):
+                columns = [row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")]
+                if 'service' not in columns:
+                    self.conn.execute(f"ALTER TABLE {table} ADD COLUMN service TEXT")
+
+            # Migration: cycle de vie des alertes (les anciennes lignes restent sans état)
+            columns = [row[1] for row in self.conn.execute("PRAGMA table_info(alerts)")]
+            for column, column_type in (('state', 'TEXT'), ('resolved_at', 'DATETIME'), ('alert_key', 'TEXT')):
+                if column not in columns:
+                    self.conn.execute(f"ALTER TABLE alerts ADD COLUMN {column} {column_type}")
+
+            for statement in INDEXES:
+                self.conn.execute(statement)
+        logger.info("Base de données initialisée")
+
+    @staticmethod
+    def metric_params(row: Dict) -> tuple:
+        """Paramètres d'insertion d'une ligne de métriques"""
+        return (
+            row.get('timestamp'),
+            row['window_hours'],
+            row['burn_rate'],
+            row['error_budget_consumed'],
+            row['availability'],
+            row.get('time_to_exhaustion_hours'),
+            json.dumps(row.get('alerts', [])),
+            row.get('service')
+        )
+
+    @staticmethod
+    def alert_params(alert: Dict, state: str, key: str) -> tuple:
+        """Paramètres d'insertion d'une alerte"""
+        return (
+            alert.get('timestamp'),
+            alert['type'],
+            alert['severity'],
+            alert['message'],
+            alert['burn_rate'],
+            alert['threshold'],
+            alert.get('service'),
+            state,
+            key
+        )
+
+    def write_cycle(self, metric_rows: Iterable[Dict], alert_transitions: Iterable[Dict] = (),
+                    forecast_states: Optional[Dict[str, Dict]] = None):
+        """Écrit toutes les lignes d'un cycle de collecte en une transaction
+
+        Les alertes ne sont écrites que sur transition d'état: insertion à l'ouverture,
+        mise à jour de la ligne active ensuite. Les états du prévisionniste mis à jour
+        pendant le cycle sont enregistrés dans la même transaction.
+        """
+        inserts = []
+        updates = []
+        for transition in alert_transitions:
+            if transition['previous'] is None:
+                inserts.append(self.alert_params(transition['alert'], transition['state'], transition['key']))
+            else:
+                updates.append((transition['state'], transition['alert']['burn_rate'], transition['key']))
+
+        with self.lock, self.conn:
+            self.conn.executemany(INSERT_METRIC, [self.metric_params(row) for row in metric_rows])
+            self.conn.executemany(UPDATE_ALERT_STATE, updates)
+            self.conn.executemany(INSERT_ALERT, inserts)
+            self.conn.executemany(UPSERT_FORECAST, [
+                (key, json.dumps(state)) for key, state in (forecast_states or {}).items()
+            ])
+
+    def load_forecast_states(self) -> Dict[str, Dict]:
+        """États persistés du prévisionniste d'épuisement"""
+        with self.lock:
+            rows = self.conn.execute("SELECT key, state FROM forecast_state").fetchall()
+        return {key: json.loads(state) for key, state in rows}
+
+    def get_buckets(self, hours: int = 24, bucket_minutes: int = 60, window_hours: Optional[int] = None,
+                    service: Optional[str] = None, moving_buckets: int = 6) -> List[Dict]:
+        """Min/moy/max du burn rate par bucket de temps, calculés par SQLite
+
+        Le palier lu est le plus grossier compatible avec la taille de bucket; la
+        colonne burn_rate_moving_avg couvre les moving_buckets derniers buckets.
+        """
+        # Le brut est à jour à la minute près: il est préféré tant qu'il couvre la plage
+        raw_days = self.retention_days['raw']
+        tier = 'raw' if raw_days is None or hours <= raw_days * 24 else self.choose_tier(hours, bucket_minutes)
+        if tier == 'raw':
+            query = SELECT_BUCKETS_RAW
+        else:
+            table = next(t for name, t, _, _, _ in TIERS if name == tier)
+            query = SELECT_BUCKETS_ROLLUP.format(table=table)
+
+        params = (int(bucket_minutes) * 60, f'-{int(hours)} hours', window_hours, service,
+                  max(0, int(moving_buckets) - 1))
+        with self.lock:
+            cursor = self.conn.execute(query, params)
+            columns = [description[0] for description in cursor.description]
+            rows = cursor.fetchall()
+        return [dict(zip(columns, row), tier=tier) for row in rows]
+
+    def get_alert_counts(self, hours: int = 24, service: Optional[str] = None) -> Dict[str, Dict]:
+        """Nombre d'alertes (totales et actives) par sévérité"""
+        with self.lock:
+            rows = self.conn.execute(SELECT_ALERT_COUNTS, (f'-{int(hours)} hours', service)).fetchall()
+        return {severity: {'total': total, 'active': active} for severity, total, active in rows}
+
+    def get_latest(self) -> List[Dict]:
+        """Dernières métriques écrites pour chaque service et fenêtre"""
+        with self.lock:
+            cursor = self.conn.execute(SELECT_LATEST)
+            columns = [description[0] for description in cursor.description]
+            rows = cursor.fetchall()
+
+        results = []
+        for row in rows:
+            result = dict(zip(columns, row))
+            result['alerts'] = json.loads(result['alerts']) if result['alerts'] else []
+            results.append(result)
+        return results
+
+    def data_version(self) -> tuple:
+        """Version des données: change à chaque écriture, de cette connexion ou d'un autre processus"""
+        with self.lock:
+            return self.conn.total_changes, self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def load_active_alerts(self) -> List[Dict]:
+        """Alertes pending/firing, pour reconstruire la machine à états au démarrage"""
+        with self.lock:
+            cursor = self.conn.execute(SELECT_ACTIVE_ALERTS)
+            columns = [description[0] for description in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def tier_current(self, tier: str, bucket_format: str, resolution_minutes: int) -> bool:
+        """Vrai si les agrégats d'un palier sont à jour à un bucket près"""
+        with self.lock:
+            watermark = self.get_watermark(tier)
+            if watermark is None:
+                return False
+            oldest_current = self.conn.execute(
+                "SELECT strftime(?, datetime('now', ?))", (bucket_format, f'-{int(resolution_minutes)} minutes')
+            ).fetchone()[0]
+        return watermark >= oldest_current
+
+    def choose_tier(self, hours: float, resolution_minutes: Optional[int] = None) -> str:
+        """Palier le plus grossier qui couvre la plage et respecte la résolution demandée"""
+        # Un palier d'agrégats en retard (compaction jamais lancée ou pas encore rattrapée) est
+        # ignoré: les paliers plus fins ne sont purgés que sous son watermark et restent complets
+        usable = [
+            (name, resolution) for name, _, resolution, bucket_format, _ in TIERS
+            if name == 'raw' or self.tier_current(name, bucket_format, resolution)
+        ]
+        covering = [
+            (name, resolution) for name, resolution in usable
+            if self.retention_days[name] is None or hours <= self.retention_days[name] * 24
+        ]
+        if not covering:
+            return usable[-1][0]
+
+        wanted = resolution_minutes or 1
+        fitting = [name for name, resolution in covering if resolution <= wanted]
+        # À défaut de palier assez fin sur toute la plage, on prend le plus fin qui la couvre
+        return fitting[-1] if fitting else covering[0][0]
+
+    def get_history(self, hours: int = 24, resolution_minutes: Optional[int] = None,
+                    decode_alerts: bool = True) -> List[Dict]:
+        """Lignes de métriques des N dernières heures, plus récentes d'abord
+
+        Avec la rétention activée, les plages longues sont servies par les agrégats
+        horaires ou journaliers (champ 'tier' de chaque ligne). Avec decode_alerts=False,
+        'alerts' reste en JSON brut et se décode à la demande via alerts_of().
+        """
+        tier = self.choose_tier(hours, resolution_minutes)
+        table = next(t for name, t, _, _, _ in TIERS if name == tier)
+        query = SELECT_HISTORY if tier == 'raw' else SELECT_ROLLUP_HISTORY.format(table=table)
+
+        with self.lock:
+            cursor = self.conn.execute(query, (f'-{int(hours)} hours',))
+            columns = [description[0] for description in cursor.description]
+            rows = cursor.fetchall()
+
+        results = []
+        for row in rows:
+            result = dict(zip(columns, row))
+            if decode_alerts:
+                self.alerts_of(result)
+            else:
+                result.setdefault('alerts', None)
+            result['tier'] = tier
+            results.append(result)
+        return results
+
+    @staticmethod
+    def alerts_of(row: Dict) -> List[Dict]:
+        """Alertes d'une ligne d'historique, décodées une seule fois à la première lecture"""
+        alerts = row.get('alerts')
+        if not isinstance(alerts, list):
+            alerts = json.loads(alerts) if alerts else []
+            row['alerts'] = alerts
+        return alerts
+
+    @property
+    def retention_enabled(self) -> bool:
+        """Vrai si une rétention est configurée (et donc la compaction utile)"""
+        return any(days is not None for days in self.retention_days.values()) or \
+            self.alert_retention_days is not None
+
+    def get_watermark(self, tier: str) -> Optional[str]:
+        """Début du premier bucket non finalisé d'un palier"""
+        row = self.conn.execute("SELECT watermark FROM rollup_state WHERE tier = ?", (tier,)).fetchone()
+        return row[0] if row else None
+
+    def rollup_step(self, tier: str, bucket_format: str, rollup_sql: str, source_table: str,
+                    source_column: str, span_hours: int) -> bool:
+        """Agrège au plus span_hours de source; retourne True s'il reste du travail"""
+        watermark = self.get_watermark(tier)
+        if watermark is None:
+            row = self.conn.execute(
+                f"SELECT strftime(?, MIN({source_column})) FROM {source_table}", (bucket_format,)
+            ).fetchone()
+            if row[0] is None:
+                return False
+            watermark = row[0]
+
+        current_bucket, upper = self.conn.execute(
+            "SELECT strftime(?, 'now'), strftime(?, datetime(?, ?))",
+            (bucket_format, bucket_format, watermark, f'+{int(span_hours)} hours')
+        ).fetchone()
+
+        if upper < current_bucket:
+            self.conn.execute(rollup_sql, (watermark, upper))
+            new_watermark = upper
+        else:
+            # Le bucket courant est réagrégé à chaque passe tant qu'il n'est pas terminé
+            self.conn.execute(rollup_sql, (watermark, '9999-12-31'))
+            new_watermark = current_bucket
+
+        self.conn.execute(
+            "INSERT OR REPLACE INTO rollup_state (tier, watermark) VALUES (?, ?)",
+            (tier, new_watermark)
+        )
+        return new_watermark < current_bucket
+
+    def purge_step(self, table: str, column: str, retention_days: Optional[int],
+                   rolled_up_until: Optional[str], condition: str = '') -> bool:
+        """Supprime un lot de lignes expirées (déjà agrégées); retourne True s'il en reste"""
+        if retention_days is None:
+            return False
+
+        cutoff = self.conn.execute(
+            "SELECT datetime('now', ?)", (f'-{int(retention_days)} days',)
+        ).fetchone()[0]
+        if rolled_up_until is not None:
+            cutoff = min(cutoff, rolled_up_until)
+
+        key = 'rowid' if table != 'error_budget_rollup_hourly' else 'bucket'
+        deleted = self.conn.execute(
+            f"DELETE FROM {table} WHERE {key} IN "
+            f"(SELECT {key} FROM {table} WHERE {column} < ? {condition} LIMIT ?)",
+            (cutoff, self.delete_batch_size)
+        ).rowcount
+        return deleted >= self.delete_batch_size
+
+    def compact_step(self) -> bool:
+        """Une passe de compaction courte (verrou et transaction brefs); True s'il reste du travail"""
+        if not self.retention_enabled:
+            return False
+
+        with self.lock, self.conn:
+            more = self.rollup_step('hourly', TIERS[1][3], ROLLUP_HOURLY, 'error_budget_metrics',
+                                    'timestamp', self.compaction_batch_hours)
+            # Les agrégats journaliers ne sont construits que sur des heures déjà agrégées
+            if not more:
+                more = self.rollup_step('daily', TIERS[2][3], ROLLUP_DAILY, 'error_budget_rollup_hourly',
+                                        'bucket', self.compaction_batch_hours * 24)
+
+            more |= self.purge_step('error_budget_metrics', 'timestamp',
+                                    self.retention_days['raw'], self.get_watermark('hourly'))
+            more |= self.purge_step('error_budget_rollup_hourly', 'bucket',
+                                    self.retention_days['hourly'], self.get_watermark('daily'))
+            # Une alerte encore active est conservée quelle que soit son ancienneté
+            more |= self.purge_step('alerts', 'timestamp', self.alert_retention_days, None,
+                                    "AND (state IS NULL OR state = 'resolved')")
+        return more
+
+    def compact(self, max_steps: Optional[int] = None) -> int:
+        """Enchaîne les passes de compaction jusqu'à épuisement du travail"""
+        steps = 0
+        while max_steps is None or steps < max_steps:
+            steps += 1
+            if not self.compact_step():
+                break
+        return steps
+
+    def compaction_loop(self, interval_seconds: float):
+        """Boucle de compaction incrémentale en arrière-plan"""
+        while not self.stop_event.is_set():
+            try:
+                # Passes successives séparées d'une courte pause pour laisser passer les écritures
+                while self.compact_step() and not self.stop_event.is_set():
+                    time.sleep(0.05)
+            except sqlite3.Error as e:
+                logger.error(f"Erreur lors de la compaction: {e}")
+            self.stop_event.wait(interval_seconds)
+
+    def start_compaction(self, interval_seconds: float = 300) -> Optional[threading.Thread]:
+        """Démarre la compaction en arrière-plan si une rétention est configurée"""
+        if not self.retention_enabled or self.compaction_thread:
+            return self.compaction_thread
+
+        self.compaction_thread = threading.Thread(
+            target=self.compaction_loop, args=(interval_seconds,),
+            name='budget-compaction', daemon=True
+        )
+        self.compaction_thread.start()
+        logger.info(f"Compaction de l'historique démarrée (intervalle: {interval_seconds}s)")
+        return self.compaction_thread
+
+    def close(self):
+        """Ferme la connexion (checkpoint WAL inclus)"""
+        self.stop_event.set()
+        with self.lock:
+            self.conn.close()
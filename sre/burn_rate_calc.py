@@ -9,11 +9,15 @@ import requests
 import time
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple, Optional
+from typing import Callable, Dict, List, Tuple, Optional, Union
 import argparse
 import sys
 import numpy as np
 
+from alert_engine import MultiWindowBurnRateEngine
+from latency_sli import parse_bucket_vector, group_latency_slis, compute_latency_slis
+from slo_registry import load_slo_configs, BatchedSLOEvaluator
+
 # Configuration du logging
 logging.basicConfig(
     level=logging.INFO,
@@ -21,11 +25,39 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def fetch_event_counts(query_range: Callable[[str, datetime, datetime], List[Dict]], measurement: Dict,
+                       start_time: datetime, end_time: datetime) -> List[Tuple[float, float, float]]:
+    """Récupère les compteurs good/total par pas de temps d'un SLI (query_range: requête sur une plage)"""
+    good_results = query_range(measurement['good_query'], start_time, end_time)
+    valid_results = query_range(measurement['valid_query'], start_time, end_time)
+    
+    good_by_ts = {}
+    for result in good_results:
+        for ts, value in result.get('values', []):
+            try:
+                good_by_ts[float(ts)] = good_by_ts.get(float(ts), 0.0) + float(value)
+            except ValueError:
+                continue
+    
+    totals_by_ts = {}
+    for result in valid_results:
+        for ts, value in result.get('values', []):
+            try:
+                totals_by_ts[float(ts)] = totals_by_ts.get(float(ts), 0.0) + float(value)
+            except ValueError:
+                continue
+    
+    return [
+        (ts, good_by_ts.get(ts, 0.0), total)
+        for ts, total in sorted(totals_by_ts.items())
+    ]
+
 class BurnRateCalculator:
     """Calculateur de burn rate pour l'error budget"""
     
-    def __init__(self, slo_config_path: str, prometheus_url: str = "http://localhost:9090"):
-        self.slo_config = self.load_slo_config(slo_config_path)
+    def __init__(self, slo_config_path: Union[str, Dict], prometheus_url: str = "http://localhost:9090"):
+        self.slo_config = (slo_config_path if isinstance(slo_config_path, dict)
+                           else self.load_slo_config(slo_config_path))
         self.prometheus_url = prometheus_url.rstrip('/')
         self.session = requests.Session()
         
@@ -69,6 +101,50 @@ class BurnRateCalculator:
             logger.error(f"Erreur lors de la requête Prometheus: {e}")
             return []
     
+    def query_prometheus_instant(self, query: str, at_time: datetime) -> List[Dict]:
+        """Exécute une requête Prometheus instantanée"""
+        try:
+            response = self.session.get(
+                f"{self.prometheus_url}/api/v1/query",
+                params={'query': query, 'time': int(at_time.timestamp())},
+                timeout=30
+            )
+            
+            if response.status_code == 200:
+                data = response.json()
+                if data['status'] == 'success':
+                    return data['data']['result']
+                else:
+                    logger.error(f"Erreur Prometheus: {data.get('error', 'Unknown error')}")
+                    return []
+            else:
+                logger.error(f"Erreur HTTP: {response.status_code}")
+                return []
+                
+        except Exception as e:
+            logger.error(f"Erreur lors de la requête Prometheus: {e}")
+            return []
+    
+    def calculate_latency_slis(self, window_minutes: int,
+                               end_time: Optional[datetime] = None) -> Dict[str, Dict]:
+        """Calcule les SLIs de latence depuis les buckets bruts (une requête par fenêtre)"""
+        end_time = end_time or datetime.now()
+        results = {}
+        
+        for bucket_query, sli_names in group_latency_slis(self.slo_config).items():
+            vector = self.query_prometheus_instant(
+                bucket_query.format(window=f"{window_minutes}m"), end_time
+            )
+            bounds, cumulative = parse_bucket_vector(vector)
+            if len(bounds) == 0:
+                logger.warning(f"Aucun bucket de latence trouvé sur {window_minutes}min")
+                continue
+            results.update(compute_latency_slis(
+                self.slo_config, bounds, cumulative, window_minutes, sli_names
+            ))
+        
+        return results
+    
     def calculate_availability(self, start_time: datetime, end_time: datetime) -> float:
         """Calcule la disponibilité sur une période"""
         sli_config = self.slo_config['slis']['availability']
@@ -155,6 +231,19 @@ class BurnRateCalculator:
         
         return alerts
     
+    def evaluate_multi_window_alerts(self) -> List[Dict]:
+        """Évalue les alertes burn rate multi-fenêtres (fenêtre longue ET courte)"""
+        engine = MultiWindowBurnRateEngine.from_slo_config(self.slo_config)
+        now = datetime.now()
+        start_time = now - timedelta(minutes=engine.max_window_minutes)
+        
+        for slo_id in engine.slos:
+            sli_name = slo_id.split(':', 1)[1]
+            measurement = self.slo_config['slis'][sli_name]['measurement']
+            engine.observe_many(slo_id, fetch_event_counts(self.query_prometheus, measurement, start_time, now))
+        
+        return engine.evaluate(now.timestamp())
+    
     def calculate_rolling_burn_rates(self, hours_back: int = 24) -> Dict[str, Dict]:
         """Calcule les burn rates sur différentes fenêtres glissantes"""
         now = datetime.now()
@@ -178,13 +267,15 @@ class BurnRateCalculator:
             error_budget_consumed = self.calculate_error_budget_consumed(start_time, end_time)
             time_to_exhaustion = self.calculate_time_to_exhaustion(burn_rate)
             alerts = self.get_burn_rate_alerts(burn_rate, window_hours * 60)
+            latency = self.calculate_latency_slis(window_hours * 60, end_time)
             
             results[window_name] = {
                 'window_hours': window_hours,
                 'burn_rate': burn_rate,
                 'error_budget_consumed': error_budget_consumed,
                 'time_to_exhaustion_hours': time_to_exhaustion,
-                'alerts': alerts
+                'alerts': alerts,
+                'latency': latency
             }
         
         return results
@@ -218,6 +309,13 @@ class BurnRateCalculator:
             else:
                 print("[OK] Error budget stable")
             
+            # Affiche les SLIs de latence calculés depuis les buckets
+            for sli_name, latency in data['latency'].items():
+                print(f"{self.slo_config['slis'][sli_name]['name']}: {latency['value_seconds']:.3f}s "
+                      f"(seuil: {latency['threshold_seconds']}s), "
+                      f"requêtes sous le seuil: {latency['good_ratio']*100:.2f}%, "
+                      f"burn rate: {latency['burn_rate']:.2f}x")
+            
             # Affiche les alertes
             if data['alerts']:
                 print("🚨 ALERTES:")
@@ -230,6 +328,21 @@ class BurnRateCalculator:
             
             print()
         
+        # Alertes multi-fenêtres
+        print("🚨 ALERTES MULTI-FENÊTRES")
+        print("-" * 40)
+        multi_window_alerts = self.evaluate_multi_window_alerts()
+        if multi_window_alerts:
+            for alert in multi_window_alerts:
+                severity_icon = "🔴" if alert['severity'] == 'critical' else "🟡"
+                print(f"  {severity_icon} {alert['severity'].upper()} [{alert['name']}]: {alert['description']}")
+                print(f"     Burn rate {alert['long_window_minutes']}min: {alert['burn_rate']:.2f}x, "
+                      f"{alert['short_window_minutes']}min: {alert['short_burn_rate']:.2f}x "
+                      f"(seuil: {alert['threshold']}x)")
+        else:
+            print("[OK] Aucune alerte")
+        print()
+        
         # Recommandations
         print("[INFO] RECOMMANDATIONS")
         print("-" * 40)
@@ -266,7 +379,9 @@ class BurnRateCalculator:
 def main():
     parser = argparse.ArgumentParser(description='Calculateur de burn rate SRE')
     parser.add_argument('--config', default='slo_config.json',
-                       help='Fichier de configuration SLO (défaut: slo_config.json)')
+                       help='Fichier ou répertoire de configuration SLO (défaut: slo_config.json)')
+    parser.add_argument('--service',
+                       help='Service à analyser dans une configuration multi-services')
     parser.add_argument('--prometheus', default='http://localhost:9090',
                        help='URL de Prometheus (défaut: http://localhost:9090)')
     parser.add_argument('--hours', type=int, default=24,
@@ -280,8 +395,20 @@ def main():
         logging.getLogger().setLevel(logging.DEBUG)
     
     try:
-        calculator = BurnRateCalculator(args.config, args.prometheus)
-        calculator.print_burn_rate_report(args.hours)
+        configs = load_slo_configs(args.config)
+        if args.service:
+            configs = [config for config in configs if config['service'] == args.service]
+            if not configs:
+                logger.error(f"[ERROR] Service inconnu: {args.service}")
+                sys.exit(1)
+        
+        if len(configs) > 1:
+            # Plusieurs services: requêtes groupées 'sum by (service)'
+            evaluator = BatchedSLOEvaluator(configs, args.prometheus)
+            evaluator.print_report([hours * 60 for hours in (1, 6, 24) if hours <= args.hours])
+        else:
+            calculator = BurnRateCalculator(configs[0], args.prometheus)
+            calculator.print_burn_rate_report(args.hours)
     except KeyboardInterrupt:
         logger.info("\n[STOP] Calcul interrompu par l'utilisateur")
         sys.exit(1)
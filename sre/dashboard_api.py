@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+API HTTP en lecture seule du tableau de bord de l'error budget
+Sert le dernier état calculé et l'historique depuis la mémoire et la base,
+sans aucune requête Prometheus, avec ETag/Last-Modified pour des 304 à bas coût
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from budget_store import BudgetStore
+from budget_forecast import BudgetForecaster
+from slo_registry import load_slo_configs
+
+# Configuration du logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Réponses gardées en cache, les moins récemment servies sont évincées au-delà
+CACHE_SIZE = 64
+
+
+class DashboardAPI:
+    """Réponses JSON mises en cache par version des données"""
+
+    def __init__(self, store: BudgetStore, snapshot_source: Optional[Callable[[], Tuple[int, Dict]]] = None,
+                 forecast_config: Optional[Dict] = None):
+        self.store = store
+        # snapshot_source() -> (version, snapshot) quand le tracker tourne dans le même processus
+        self.snapshot_source = snapshot_source
+        # Section 'forecast' de la configuration SLO (mêmes paramètres que le tracker)
+        self.forecast_config = forecast_config
+        # (chemin, paramètres reconnus) -> (version, corps, ETag, date de modification)
+        self.cache: OrderedDict = OrderedDict()
+        self.lock = threading.Lock()
+        self.server: Optional[ThreadingHTTPServer] = None
+
+    def routes(self) -> Dict[str, Tuple[Callable, Tuple[str, ...]]]:
+        """Chemins servis, fonctions de construction des réponses et paramètres reconnus"""
+        return {
+            '/api/snapshot': (self.build_snapshot, ()),
+            '/api/history': (self.build_history, ('hours', 'resolution')),
+            '/api/alerts': (self.build_alerts, ()),
+            '/api/aggregates': (self.build_aggregates, ('hours', 'bucket', 'window', 'service')),
+            '/api/forecasts': (self.build_forecasts, ())
+        }
+
+    def version(self, path: str) -> tuple:
+        """Version des données d'une route, sans les relire"""
+        if path == '/api/snapshot' and self.snapshot_source:
+            return ('memory', self.snapshot_source()[0])
+        return self.store.data_version()
+
+    def build_snapshot(self, params: Dict) -> Dict:
+        """Dernier état calculé (mémoire du tracker, sinon dernières lignes en base)"""
+        if self.snapshot_source:
+            snapshot = self.snapshot_source()[1]
+            if snapshot:
+                return snapshot
+        return {'source': 'database', 'metrics': self.store.get_latest()}
+
+    def build_history(self, params: Dict) -> Dict:
+        """Historique sur 'hours' heures, au palier adapté à 'resolution' (minutes)"""
+        hours = int(params.get('hours', ['24'])[0])
+        resolution = params.get('resolution', [None])[0]
+        rows = self.store.get_history(hours, int(resolution) if resolution else None)
+        return {'hours': hours, 'count': len(rows), 'rows': rows}
+
+    def build_aggregates(self, params: Dict) -> Dict:
+        """Agrégats par bucket et alertes par sévérité, calculés par SQLite"""
+        hours = int(params.get('hours', ['24'])[0])
+        bucket_minutes = int(params.get('bucket', ['60'])[0])
+        window = params.get('window', [None])[0]
+        service = params.get('service', [None])[0]
+        return {
+            'hours': hours,
+            'bucket_minutes': bucket_minutes,
+            'buckets': self.store.get_buckets(hours, bucket_minutes, int(window) if window else None, service),
+            'alerts_by_severity': self.store.get_alert_counts(hours, service)
+        }
+
+    def build_forecasts(self, params: Dict) -> Dict:
+        """ETAs d'épuisement depuis l'état persisté du prévisionniste (aucun historique relu)"""
+        forecaster = BudgetForecaster.from_config(self.forecast_config)
+        forecaster.restore(self.store.load_forecast_states())
+        return {'forecasts': forecaster.forecast_all()}
+
+    def build_alerts(self, params: Dict) -> Dict:
+        """Alertes pending/firing"""
+        return {'alerts': self.store.load_active_alerts()}
+
+    def response(self, path: str, query: str) -> Optional[Tuple[bytes, str, float]]:
+        """Corps, ETag et date de modification, recalculés seulement si les données ont changé"""
+        route = self.routes().get(path)
+        if route is None:
+            return None
+        builder, names = route
+
+        # Seuls les paramètres reconnus entrent dans la clé (un cache-buster ne crée pas d'entrée)
+        query_params = parse_qs(query)
+        params = {name: query_params[name][:1] for name in names if name in query_params}
+        key = (path,) + tuple(params.get(name, [None])[0] for name in names)
+        version = self.version(path)
+        with self.lock:
+            cached = self.cache.get(key)
+            if cached:
+                self.cache.move_to_end(key)
+        if cached and cached[0] == version:
+            return cached[1:]
+
+        body = json.dumps(builder(params), default=str).encode()
+        etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+        # Une nouvelle version au contenu identique garde sa date de modification
+        last_modified = cached[3] if cached and cached[2] == etag else time.time()
+        with self.lock:
+            self.cache[key] = (version, body, etag, last_modified)
+            self.cache.move_to_end(key)
+            while len(self.cache) > CACHE_SIZE:
+                self.cache.popitem(last=False)
+        return body, etag, last_modified
+
+    def make_handler(self):
+        """Handler HTTP lié à cette API"""
+        api = self
+
+        class DashboardHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path == '/health':
+                    return self.send_body(200, b'{"status": "ok"}')
+
+                try:
+                    result = api.response(url.path, url.query)
+                except (ValueError, KeyError) as e:
+                    return self.send_body(400, json.dumps({'error': str(e)}).encode())
+                if result is None:
+                    return self.send_body(404, b'{"error": "Not found"}')
+
+                body, etag, last_modified = result
+                if self.not_modified(etag, last_modified):
+                    self.send_response(304)
+                    self.send_cache_headers(etag, last_modified)
+                    self.end_headers()
+                    return
+                self.send_body(200, body, etag, last_modified)
+
+            def not_modified(self, etag: str, last_modified: float) -> bool:
+                if_none_match = self.headers.get('If-None-Match')
+                if if_none_match:
+                    return etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match == '*'
+                if_modified_since = self.headers.get('If-Modified-Since')
+                if if_modified_since:
+                    try:
+                        return int(last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+                    except (TypeError, ValueError):
+                        return False
+                return False
+
+            def send_cache_headers(self, etag: str, last_modified: float):
+                self.send_header('ETag', etag)
+                self.send_header('Last-Modified', formatdate(last_modified, usegmt=True))
+                self.send_header('Cache-Control', 'no-cache')
+
+            def send_body(self, status: int, body: bytes, etag: Optional[str] = None,
+                          last_modified: Optional[float] = None):
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                if etag:
+                    self.send_cache_headers(etag, last_modified)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(f"{self.address_string()} - {format % args}")
+
+        return DashboardHandler
+
+    def start(self, port: int, addr: str = '0.0.0.0') -> threading.Thread:
+        """Démarre le serveur HTTP en arrière-plan"""
+        self.server = ThreadingHTTPServer((addr, port), self.make_handler())
+        thread = threading.Thread(target=self.server.serve_forever, name='dashboard-api', daemon=True)
+        thread.start()
+        logger.info(f"📊 API du tableau de bord sur http://{addr}:{port}/api/snapshot")
+        return thread
+
+    def stop(self):
+        """Arrête le serveur HTTP"""
+        if self.server:
+            self.server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='API en lecture seule du tableau de bord error budget')
+    parser.add_argument('--db', default='error_budget.db',
+                       help='Chemin de la base de données (défaut: error_budget.db)')
+    parser.add_argument('--config', default='slo_config.json',
+                       help='Fichier ou répertoire de configuration SLO (défaut: slo_config.json)')
+    parser.add_argument('--port', type=int, default=8090,
+                       help='Port HTTP (défaut: 8090)')
+    parser.add_argument('--verbose', '-v', action='store_true',
+                       help='Mode verbeux')
+
+    args = parser.parse_args()
+
+    if args.verbose:
+        logging.getLogger().setLevel(logging.DEBUG)
+
+    try:
+        forecast_config = load_slo_configs(args.config)[0].get('forecast')
+        api = DashboardAPI(BudgetStore(args.db), forecast_config=forecast_config)
+        thread = api.start(args.port)
+        while thread.is_alive():
+            thread.join(1)
+    except KeyboardInterrupt:
+        logger.info("\n[STOP] API arrêtée par l'utilisateur")
+    except Exception as e:
+        logger.error(f"[ERROR] Erreur: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
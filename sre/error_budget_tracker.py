@@ -9,12 +9,22 @@ import requests
 import time
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple, Union
 import argparse
 import sys
-import sqlite3
 import threading
-import schedule
+import asyncio
+from prometheus_client import CollectorRegistry, start_http_server
+
+from alert_engine import MultiWindowBurnRateEngine
+from burn_rate_calc import fetch_event_counts
+from slo_registry import load_slo_configs, BatchedSLOEvaluator
+from budget_store import BudgetStore
+from alert_dispatcher import AlertDispatcher
+from alert_state import AlertStateMachine, RESOLVED
+from monitor_scheduler import MonitorScheduler
+from dashboard_api import DashboardAPI
+from budget_forecast import BudgetForecaster
 
 # Configuration du logging
 logging.basicConfig(
@@ -26,20 +36,56 @@ logger = logging.getLogger(__name__)
 class ErrorBudgetTracker:
     """Suivi et surveillance de l'error budget"""
     
-    def __init__(self, slo_config_path: str, prometheus_url: str = "http://localhost:9090", 
+    def __init__(self, slo_config_path: Union[str, Dict, List[Dict]], prometheus_url: str = "http://localhost:9090", 
                  db_path: str = "error_budget.db"):
-        self.slo_config = self.load_slo_config(slo_config_path)
+        if isinstance(slo_config_path, list):
+            self.slo_configs = slo_config_path
+        elif isinstance(slo_config_path, dict):
+            self.slo_configs = [slo_config_path]
+        else:
+            self.slo_configs = [self.load_slo_config(slo_config_path)]
+        self.slo_config = self.slo_configs[0]
         self.prometheus_url = prometheus_url.rstrip('/')
         self.db_path = db_path
         self.session = requests.Session()
         
+        # Plusieurs services: évaluation groupée en requêtes 'sum by (service)'
+        self.batch_evaluator = None
+        if len(self.slo_configs) > 1:
+            self.batch_evaluator = BatchedSLOEvaluator(self.slo_configs, self.prometheus_url, self.session)
+        
         # Initialise la base de données
         self.init_database()
         
         # Configuration des alertes
         self.alert_webhook_url = None
         self.alert_email = None
-        
+        self.metrics_registry = None
+
+        # Dernier état calculé, servi tel quel par l'API du tableau de bord
+        self.snapshot: Dict = {}
+        self.snapshot_version = 0
+        # Livraison asynchrone: un webhook lent ne bloque pas la collecte
+        self.dispatcher = AlertDispatcher(
+            self.deliver_alerts, self.slo_config.get('alerting', {}).get('dispatch')
+        )
+
+        # Moteur d'alertes multi-fenêtres alimenté incrémentalement (requêtes groupées si plusieurs services)
+        if self.batch_evaluator:
+            self.alert_engine = MultiWindowBurnRateEngine.from_slo_configs(self.slo_configs)
+        else:
+            self.alert_engine = MultiWindowBurnRateEngine.from_slo_config(self.slo_config)
+        self.engine_cursors: Dict[str, datetime] = {}
+
+        # Cycle de vie des alertes, repris depuis la base après un redémarrage
+        lifecycle = self.slo_config.get('alerting', {}).get('lifecycle', {})
+        self.alert_states = AlertStateMachine(lifecycle.get('pending_minutes', 0))
+        self.alert_states.restore(self.store.load_active_alerts())
+
+        # Prévision d'épuisement incrémentale, reprise depuis l'état persisté
+        self.forecaster = BudgetForecaster.from_config(self.slo_config.get('forecast'))
+        self.forecaster.restore(self.store.load_forecast_states())
+
     def load_slo_config(self, config_path: str) -> Dict:
         """Charge la configuration des SLOs"""
         try:
@@ -50,41 +96,8 @@ class ErrorBudgetTracker:
             sys.exit(1)
     
     def init_database(self):
-        """Initialise la base de données SQLite"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Table pour stocker les métriques d'error budget
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS error_budget_metrics (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                window_hours INTEGER,
-                burn_rate REAL,
-                error_budget_consumed REAL,
-                availability REAL,
-                time_to_exhaustion_hours REAL,
-                alerts TEXT
-            )
-        ''')
-        
-        # Table pour stocker les alertes
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS alerts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                alert_type TEXT,
-                severity TEXT,
-                message TEXT,
-                burn_rate REAL,
-                threshold REAL,
-                resolved BOOLEAN DEFAULT FALSE
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
-        logger.info("Base de données initialisée")
+        """Initialise la base de données SQLite (connexion WAL longue durée)"""
+        self.store = BudgetStore(self.db_path, self.slo_config.get('storage'))
     
     def query_prometheus(self, query: str, start_time: datetime, end_time: datetime) -> List[Dict]:
         """Exécute une requête Prometheus"""
@@ -200,80 +213,151 @@ class ErrorBudgetTracker:
                 alerts.append(alert)
         
         return alerts
+
+    def update_alert_engine(self, now: datetime) -> List[Dict]:
+        """Alimente le moteur multi-fenêtres avec les seuls nouveaux échantillons et l'évalue"""
+        if not self.alert_engine.slos:
+            return []
+
+        default_start = now - timedelta(minutes=self.alert_engine.max_window_minutes)
+        if self.batch_evaluator:
+            # Une plage commune depuis le curseur le plus ancien, filtrée ensuite SLO par SLO
+            start_time = min(self.engine_cursors.get(slo_id, default_start) for slo_id in self.alert_engine.slos)
+            series = self.batch_evaluator.fetch_event_counts(start_time, now, self.alert_engine.step_seconds)
+        else:
+            series = {
+                slo_id: fetch_event_counts(self.query_prometheus,
+                                           self.slo_config['slis'][slo_id.split(':', 1)[1]]['measurement'],
+                                           self.engine_cursors.get(slo_id, default_start), now)
+                for slo_id in self.alert_engine.slos
+            }
+
+        for slo_id, samples in series.items():
+            if slo_id not in self.alert_engine.slos:
+                continue
+            # Ignore les échantillons déjà ingérés (jusqu'au curseur précédent inclus)
+            cursor = self.engine_cursors.get(slo_id)
+            cursor_ts = cursor.timestamp() if cursor else None
+            self.alert_engine.observe_many(
+                slo_id, (s for s in samples if cursor_ts is None or s[0] > cursor_ts)
+            )
+            if samples and (cursor_ts is None or samples[-1][0] > cursor_ts):
+                self.engine_cursors[slo_id] = datetime.fromtimestamp(samples[-1][0])
+
+        return self.alert_engine.evaluate(now.timestamp())
+
+    def metric_row(self, window_hours: int, burn_rate: float,
+                   error_budget_consumed: float, availability: float,
+                   time_to_exhaustion: Optional[float], alerts: List[Dict],
+                   service: Optional[str] = None) -> Dict:
+        """Construit une ligne de métriques à écrire en fin de cycle"""
+        service = service or self.slo_config['service']
+        for alert in alerts:
+            alert.setdefault('service', service)
+        return {
+            'window_hours': window_hours,
+            'burn_rate': burn_rate,
+            'error_budget_consumed': error_budget_consumed,
+            'availability': availability,
+            'time_to_exhaustion_hours': time_to_exhaustion,
+            'alerts': alerts,
+            'service': service
+        }
     
-    def store_metrics(self, window_hours: int, burn_rate: float, 
-                     error_budget_consumed: float, availability: float,
-                     time_to_exhaustion: Optional[float], alerts: List[Dict]):
-        """Stocke les métriques dans la base de données"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO error_budget_metrics 
-            (window_hours, burn_rate, error_budget_consumed, availability, 
-             time_to_exhaustion_hours, alerts)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (
-            window_hours,
-            burn_rate,
-            error_budget_consumed,
-            availability,
-            time_to_exhaustion,
-            json.dumps(alerts)
-        ))
-        
-        # Stocke les alertes
+    def process_alerts(self, metric_rows: List[Dict], cycle_alerts: List[Dict], services: set,
+                       sli_series: Optional[List[Dict]] = None):
+        """Écrit le cycle avec les seules transitions d'alertes et notifie ces transitions"""
+        now = time.time()
+        forecast_states = self.apply_forecasts(metric_rows, now, sli_series)
+        transitions = self.alert_states.update(cycle_alerts, now, services)
+        self.store.write_cycle(metric_rows, transitions, forecast_states)
+        self.publish_snapshot(metric_rows)
+        self.send_alerts(AlertStateMachine.notifications(transitions))
+    
+    def apply_forecasts(self, metric_rows: List[Dict], now: float,
+                        sli_series: Optional[List[Dict]] = None) -> Dict[str, Dict]:
+        """Met à jour le prévisionniste et renseigne l'ETA d'épuisement de chaque ligne
+
+        sli_series: budgets des autres SLIs (latence...), prévus sans ligne de métriques.
+        """
+        keys = []
+        for row in metric_rows:
+            key = BudgetForecaster.key(row['service'], 'availability', row['window_hours'])
+            self.forecaster.observe(key, now, row['burn_rate'], row['error_budget_consumed'])
+            row['forecast'] = self.forecaster.forecast(key, now)
+            row['time_to_exhaustion_hours'] = row['forecast']['eta_hours']
+            keys.append(key)
+        for series in sli_series or []:
+            key = BudgetForecaster.key(series['service'], series['sli'], series['window_hours'])
+            self.forecaster.observe(key, now, series['burn_rate'], series['error_budget_consumed'])
+            keys.append(key)
+        return self.forecaster.export_states(keys)
+    
+    def publish_snapshot(self, metric_rows: List[Dict]):
+        """Remplace le dernier état calculé (lecture sans recalcul par l'API)"""
+        self.snapshot = {
+            'source': 'memory',
+            'generated_at': datetime.now().isoformat(),
+            'metrics': metric_rows,
+            'firing_alerts': self.alert_states.firing()
+        }
+        self.snapshot_version += 1
+    
+    def get_snapshot(self) -> Tuple[int, Dict]:
+        """Version et contenu du dernier état calculé"""
+        return self.snapshot_version, self.snapshot
+    
+    def send_alerts(self, alerts: List[Dict]):
+        """Journalise les alertes du cycle et les met en file d'envoi (webhook, email, etc.)"""
         for alert in alerts:
-            cursor.execute('''
-                INSERT INTO alerts (alert_type, severity, message, burn_rate, threshold)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (
-                alert['type'],
-                alert['severity'],
-                alert['message'],
-                alert['burn_rate'],
-                alert['threshold']
-            ))
-        
-        conn.commit()
-        conn.close()
+            if alert.get('state') == RESOLVED:
+                logger.info(f"✅ RÉSOLUE {alert['severity'].upper()}: {alert['message']}")
+                continue
+            logger.warning(f"🚨 ALERTE {alert['severity'].upper()}: {alert['message']}")
+            logger.warning(f"   Burn rate: {alert['burn_rate']:.2f}x (seuil: {alert['threshold']}x)")
+        
+        if alerts and (self.alert_webhook_url or self.alert_email):
+            self.dispatcher.start()
+            self.dispatcher.dispatch(alerts)
     
-    def send_alert(self, alert: Dict):
-        """Envoie une alerte (webhook, email, etc.)"""
-        logger.warning(f"🚨 ALERTE {alert['severity'].upper()}: {alert['message']}")
-        logger.warning(f"   Burn rate: {alert['burn_rate']:.2f}x (seuil: {alert['threshold']}x)")
-        
-        # Ici, vous pourriez ajouter l'envoi d'emails, webhooks, etc.
+    def deliver_alerts(self, alerts: List[Dict]):
+        """Livre un lot d'alertes (appelé par le worker du dispatcher, lève en cas d'échec)"""
         if self.alert_webhook_url:
-            self.send_webhook_alert(alert)
+            self.send_webhook_alert(alerts)
         
         if self.alert_email:
-            self.send_email_alert(alert)
+            for alert in alerts:
+                self.send_email_alert(alert)
     
-    def send_webhook_alert(self, alert: Dict):
-        """Envoie une alerte via webhook"""
-        try:
-            payload = {
-                'text': f"🚨 {alert['severity'].upper()}: {alert['message']}",
-                'attachments': [{
-                    'color': 'danger' if alert['severity'] == 'critical' else 'warning',
-                    'fields': [
-                        {'title': 'Burn Rate', 'value': f"{alert['burn_rate']:.2f}x", 'short': True},
-                        {'title': 'Seuil', 'value': f"{alert['threshold']}x", 'short': True},
-                        {'title': 'Service', 'value': self.slo_config['service'], 'short': True},
-                        {'title': 'Timestamp', 'value': datetime.now().isoformat(), 'short': True}
-                    ]
-                }]
-            }
-            
-            response = self.session.post(self.alert_webhook_url, json=payload, timeout=10)
-            if response.status_code == 200:
-                logger.info("Alerte webhook envoyée")
-            else:
-                logger.error(f"Erreur envoi webhook: {response.status_code}")
-                
-        except Exception as e:
-            logger.error(f"Erreur envoi webhook: {e}")
+    def send_webhook_alert(self, alerts: List[Dict]):
+        """Envoie les alertes d'un cycle en un seul message webhook"""
+        firing = [alert for alert in alerts if alert.get('state') != RESOLVED]
+        if firing:
+            critical = any(alert['severity'] == 'critical' for alert in firing)
+            severity = 'critical' if critical else firing[0]['severity']
+            text = (f"🚨 {severity.upper()}: {firing[0]['message']}" if len(firing) == 1
+                    else f"🚨 {severity.upper()}: {len(firing)} alertes SLO")
+        else:
+            text = f"✅ RÉSOLU: {len(alerts)} alerte(s) SLO"
+        payload = {
+            'text': text,
+            'attachments': [{
+                'color': 'good' if alert.get('state') == RESOLVED else
+                         'danger' if alert['severity'] == 'critical' else 'warning',
+                'title': ('[RÉSOLU] ' if alert.get('state') == RESOLVED else '') + alert['message'],
+                'fields': [
+                    {'title': 'Burn Rate', 'value': f"{alert['burn_rate']:.2f}x", 'short': True},
+                    {'title': 'Seuil', 'value': f"{alert['threshold']}x", 'short': True},
+                    {'title': 'Service', 'value': alert.get('service', self.slo_config['service']), 'short': True},
+                    {'title': 'Timestamp', 'value': datetime.now().isoformat(), 'short': True}
+                ]
+            } for alert in alerts]
+        }
+        
+        response = self.session.post(self.alert_webhook_url, json=payload, timeout=10)
+        if response.status_code != 200:
+            raise requests.HTTPError(f"Erreur envoi webhook: {response.status_code}")
+        logger.info(f"Alertes webhook envoyées ({len(alerts)})")
     
     def send_email_alert(self, alert: Dict):
         """Envoie une alerte par email (placeholder)"""
@@ -287,77 +371,132 @@ class ErrorBudgetTracker:
         now = datetime.now()
         windows = [1, 6, 24]  # 1h, 6h, 24h
         
-        for window_hours in windows:
-            start_time = now - timedelta(hours=window_hours)
-            
-            # Calcule les métriques
-            availability = self.calculate_availability(start_time, now)
-            error_budget_consumed = self.calculate_error_budget_consumed(start_time, now)
-            burn_rate = self.calculate_burn_rate(start_time, now)
-            time_to_exhaustion = self.calculate_time_to_exhaustion(burn_rate)
-            
-            # Vérifie les alertes
-            alerts = self.check_alerts(burn_rate, window_hours)
-            
-            # Stocke les métriques
-            self.store_metrics(
-                window_hours, burn_rate, error_budget_consumed, 
-                availability, time_to_exhaustion, alerts
-            )
+        if self.batch_evaluator:
+            self.collect_services_metrics(now, windows)
+            return
+        
+        # Lignes écrites en une seule transaction en fin de cycle
+        metric_rows = [self.collect_window(now, window_hours) for window_hours in windows]
+        self.complete_cycle(metric_rows, self.collect_multi_window_alerts(now))
+    
+    def collect_window(self, now: datetime, window_hours: int) -> Dict:
+        """Calcule les métriques et alertes d'une fenêtre (indépendant des autres fenêtres)"""
+        start_time = now - timedelta(hours=window_hours)
+        
+        # Calcule les métriques
+        availability = self.calculate_availability(start_time, now)
+        error_budget_consumed = self.calculate_error_budget_consumed(start_time, now)
+        burn_rate = self.calculate_burn_rate(start_time, now)
+        # Renseigné en fin de cycle par le prévisionniste (aucune requête supplémentaire)
+        time_to_exhaustion = None
+        
+        # Vérifie les alertes
+        alerts = self.check_alerts(burn_rate, window_hours)
+        
+        logger.info(f"Fenêtre {window_hours}h - Burn rate: {burn_rate:.2f}x, "
+                   f"Error budget: {error_budget_consumed*100:.2f}%, "
+                   f"Alertes: {len(alerts)}")
+        
+        return self.metric_row(
+            window_hours, burn_rate, error_budget_consumed, 
+            availability, time_to_exhaustion, alerts
+        )
+    
+    def collect_multi_window_alerts(self, now: datetime) -> List[Dict]:
+        """Alertes multi-fenêtres (fenêtre longue ET fenêtre courte)"""
+        multi_window_alerts = self.update_alert_engine(now)
+        for alert in multi_window_alerts:
+            # Identifiant de SLO 'service:sli'
+            alert.setdefault('service', alert['slo'].split(':', 1)[0])
+        return multi_window_alerts
+    
+    def complete_cycle(self, metric_rows: List[Dict], multi_window_alerts: List[Dict]):
+        """Termine un cycle: écrit les métriques et transitions d'alertes, puis notifie en un envoi"""
+        cycle_alerts = [alert for row in metric_rows for alert in row['alerts']]
+        cycle_alerts.extend(multi_window_alerts)
+        self.process_alerts(metric_rows, cycle_alerts, {self.slo_config['service']})
+
+        logger.info(f"Alertes multi-fenêtres: {len(multi_window_alerts)}")
+
+    def collect_services_metrics(self, now: datetime, windows: List[int]):
+        """Collecte les métriques de tous les services en requêtes groupées"""
+        results = self.batch_evaluator.evaluate([hours * 60 for hours in windows], now)
+        metric_rows = []
+        sli_series = []
+        multi_window_alerts = self.collect_multi_window_alerts(now)
+        cycle_alerts = list(multi_window_alerts)
+        
+        for service, slis in results.items():
+            availability_windows = slis.get('availability', {})
             
-            # Envoie les alertes
-            for alert in alerts:
-                self.send_alert(alert)
+            # Budgets des autres SLIs (latence, taux d'erreur): prévision seule
+            for sli_name, sli_windows in slis.items():
+                if sli_name == 'availability':
+                    continue
+                for window_hours in windows:
+                    metrics = sli_windows.get(window_hours * 60)
+                    if metrics:
+                        sli_series.append({
+                            'service': service,
+                            'sli': sli_name,
+                            'window_hours': window_hours,
+                            'burn_rate': metrics['burn_rate'],
+                            'error_budget_consumed': metrics['error_budget_consumed']
+                        })
             
-            logger.info(f"Fenêtre {window_hours}h - Burn rate: {burn_rate:.2f}x, "
-                       f"Error budget: {error_budget_consumed*100:.2f}%, "
-                       f"Alertes: {len(alerts)}")
+            for window_hours in windows:
+                metrics = availability_windows.get(window_hours * 60)
+                if not metrics:
+                    continue
+                
+                burn_rate = metrics['burn_rate']
+                alerts = self.check_alerts(burn_rate, window_hours)
+                # ETA renseignée en fin de cycle par le prévisionniste
+                metric_rows.append(self.metric_row(
+                    window_hours, burn_rate, metrics['error_budget_consumed'],
+                    metrics['availability'], None, alerts, service
+                ))
+                cycle_alerts.extend(alerts)
+        
+        self.process_alerts(metric_rows, cycle_alerts, set(results), sli_series)
+        
+        logger.info(f"Alertes multi-fenêtres: {len(multi_window_alerts)}")
+        logger.info(f"{len(results)} services évalués en {self.batch_evaluator.queries_sent} requêtes cumulées")
     
     def get_historical_data(self, hours: int = 24) -> List[Dict]:
         """Récupère les données historiques"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT * FROM error_budget_metrics 
-            WHERE timestamp > datetime('now', '-{} hours')
-            ORDER BY timestamp DESC
-        '''.format(hours))
-        
-        columns = [description[0] for description in cursor.description]
-        results = []
-        
-        for row in cursor.fetchall():
-            result = dict(zip(columns, row))
-            result['alerts'] = json.loads(result['alerts']) if result['alerts'] else []
-            results.append(result)
-        
-        conn.close()
-        return results
+        return self.store.get_history(hours)
     
-    def print_dashboard(self):
-        """Affiche un tableau de bord de l'error budget"""
+    def print_dashboard(self, refresh: bool = True, hours: int = 24):
+        """Affiche un tableau de bord de l'error budget (refresh=False: lecture seule de la base)"""
         logger.info("[INFO] Tableau de bord de l'error budget...")
         
         # Collecte les métriques actuelles
-        self.collect_metrics()
-        
-        # Récupère les données historiques
-        historical_data = self.get_historical_data(24)
+        if refresh:
+            self.collect_metrics()
+        
+        # Dernières valeurs et agrégats calculés par SQLite (pas de relecture de l'historique brut)
+        service = self.slo_config['service']
+        latest_rows = [row for row in self.store.get_latest() if row['service'] in (service, None)]
+        latest = next((row for row in latest_rows if row['window_hours'] == 1),
+                      latest_rows[0] if latest_rows else None)
+        bucket_minutes = 60 if hours <= 48 else 1440
+        buckets = self.store.get_buckets(hours, bucket_minutes, window_hours=1, service=service)
+        alert_counts = self.store.get_alert_counts(hours, service)
         
         print("\n" + "="*80)
         print("[INFO] TABLEAU DE BORD ERROR BUDGET")
         print("="*80)
-        print(f"Service: {self.slo_config['service']}")
+        print(f"Service: {service}")
         print(f"SLO Target: {self.slo_config['slis']['availability']['slo_target_percentage']}%")
         print(f"Error Budget: {self.slo_config['error_budget_policy']['budget_percentage']*100}%")
-        print(f"Dernière mise à jour: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        updated_at = latest['timestamp'] if latest else datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        print(f"Dernière mise à jour: {updated_at}")
         print()
         
         # Affiche les métriques actuelles
-        if historical_data:
-            latest = historical_data[0]
-            print("📈 MÉTRIQUES ACTUELLES (1h)")
+        if latest:
+            print(f"📈 MÉTRIQUES ACTUELLES ({latest['window_hours']}h)")
             print("-" * 40)
             print(f"Burn Rate: {latest['burn_rate']:.2f}x")
             print(f"Error Budget Consommé: {latest['error_budget_consumed']*100:.2f}%")
@@ -369,48 +508,77 @@ class ErrorBudgetTracker:
                 else:
                     print(f"⏰ Temps jusqu'à épuisement: {latest['time_to_exhaustion_hours']:.1f}h")
             
-            if latest['alerts']:
-                print("🚨 ALERTES ACTIVES:")
-                for alert in latest['alerts']:
-                    severity_icon = "🔴" if alert['severity'] == 'critical' else "🟡"
-                    print(f"  {severity_icon} {alert['severity'].upper()}: {alert['message']}")
-            else:
-                print("[OK] Aucune alerte active")
+            forecast = self.forecaster.forecast(
+                BudgetForecaster.key(service, 'availability', latest['window_hours'])
+            )
+            if forecast and forecast['trend_per_hour'] is not None:
+                upper = forecast['eta_upper_hours']
+                lower = forecast['eta_lower_hours']
+                print(f"   Intervalle {forecast['confidence']:.0%}: "
+                      f"{'non atteint' if lower is None else f'{lower:.1f}h'} - "
+                      f"{'non atteint' if upper is None else f'{upper:.1f}h'} "
+                      f"(tendance: {forecast['trend_per_hour']:+.3f}x/h)")
+        
+        # Alertes pending/firing du cycle de vie (fenêtres simples et multi-fenêtres)
+        active_alerts = self.alert_states.active_alerts(service)
+        if active_alerts:
+            print("🚨 ALERTES ACTIVES:")
+            for alert in active_alerts:
+                severity_icon = "🔴" if alert['severity'] == 'critical' else "🟡"
+                print(f"  {severity_icon} {alert['severity'].upper()} ({alert['state']}): {alert['message']}")
+        else:
+            print("[OK] Aucune alerte active")
         
         print()
         
-        # Affiche les tendances
-        if len(historical_data) > 1:
-            print("[INFO] TENDANCES (24h)")
+        # Affiche les tendances (buckets du plus récent au plus ancien)
+        if len(buckets) > 1:
+            print(f"[INFO] TENDANCES ({hours}h)")
             print("-" * 40)
             
-            # Calcule les tendances
-            burn_rates = [d['burn_rate'] for d in historical_data[:6]]  # 6 dernières heures
-            if len(burn_rates) >= 2:
-                trend = "[UP]" if burn_rates[0] > burn_rates[-1] else "[DOWN]"
-                print(f"Tendance burn rate: {trend}")
-                print(f"Burn rate moyen: {sum(burn_rates)/len(burn_rates):.2f}x")
+            recent = buckets[:6]
+            trend = "[UP]" if recent[0]['burn_rate_avg'] > recent[-1]['burn_rate_avg'] else "[DOWN]"
+            print(f"Tendance burn rate: {trend}")
+            print(f"Burn rate moyen: {recent[0]['burn_rate_moving_avg']:.2f}x "
+                  f"(moyenne mobile sur {len(recent)} buckets de {bucket_minutes}min)")
+            print(f"{'Bucket':<20} {'Min':>8} {'Moy':>8} {'Max':>8} {'Alertes':>8}")
+            for bucket in recent:
+                print(f"{bucket['bucket']:<20} {bucket['burn_rate_min']:>7.2f}x {bucket['burn_rate_avg']:>7.2f}x "
+                      f"{bucket['burn_rate_max']:>7.2f}x {bucket['alert_count']:>8}")
+        
+        if alert_counts:
+            print()
+            print(f"🚨 ALERTES PAR SÉVÉRITÉ ({hours}h)")
+            print("-" * 40)
+            for severity, counts in sorted(alert_counts.items()):
+                print(f"{severity.upper()}: {counts['total']} (actives: {counts['active']})")
         
         print("="*80)
     
-    def start_monitoring(self, interval_minutes: int = 5):
+    def start_monitoring(self, interval_minutes: float = 5, jitter_seconds: float = 0):
         """Démarre la surveillance continue"""
-        logger.info(f"🔄 Démarrage de la surveillance (intervalle: {interval_minutes}min)")
+        logger.info(f"🔄 Démarrage de la surveillance (intervalle: {interval_minutes * 60:g}s)")
+        
+        # Rétention et agrégation de l'historique en arrière-plan
+        storage = self.slo_config.get('storage', {})
+        self.store.start_compaction(storage.get('compaction_interval_seconds', 300))
         
-        # Planifie la collecte des métriques
-        schedule.every(interval_minutes).minutes.do(self.collect_metrics)
+        # Planificateur asyncio: cadence fixe, fenêtres évaluées en parallèle
+        scheduler = MonitorScheduler(self, interval_minutes * 60, jitter_seconds)
+        if self.metrics_registry:
+            self.metrics_registry.register(scheduler)
         
         try:
-            while True:
-                schedule.run_pending()
-                time.sleep(60)  # Vérifie chaque minute
+            asyncio.run(scheduler.run())
         except KeyboardInterrupt:
             logger.info("[STOP] Surveillance arrêtée par l'utilisateur")
 
 def main():
     parser = argparse.ArgumentParser(description='Suivi de l\'error budget SRE')
     parser.add_argument('--config', default='slo_config.json',
-                       help='Fichier de configuration SLO (défaut: slo_config.json)')
+                       help='Fichier ou répertoire de configuration SLO (défaut: slo_config.json)')
+    parser.add_argument('--service',
+                       help='Service à suivre dans une configuration multi-services')
     parser.add_argument('--prometheus', default='http://localhost:9090',
                        help='URL de Prometheus (défaut: http://localhost:9090)')
     parser.add_argument('--db', default='error_budget.db',
@@ -419,10 +587,22 @@ def main():
     parser.add_argument('--email', help='Email pour les alertes')
     parser.add_argument('--monitor', action='store_true',
                        help='Démarre la surveillance continue')
-    parser.add_argument('--interval', type=int, default=5,
+    parser.add_argument('--interval', type=float, default=5,
                        help='Intervalle de surveillance en minutes (défaut: 5)')
+    parser.add_argument('--interval-seconds', type=float,
+                       help='Intervalle de surveillance en secondes (prioritaire sur --interval)')
+    parser.add_argument('--jitter', type=float, default=0,
+                       help='Décalage aléatoire maximal de chaque cycle en secondes (défaut: 0)')
     parser.add_argument('--dashboard', action='store_true',
-                       help='Affiche le tableau de bord')
+                       help='Affiche le tableau de bord depuis la base, sans recalcul')
+    parser.add_argument('--hours', type=int, default=24,
+                       help='Période couverte par le tableau de bord en heures (défaut: 24)')
+    parser.add_argument('--serve', type=int, metavar='PORT',
+                       help='Sert l\'API en lecture seule du tableau de bord sur ce port')
+    parser.add_argument('--metrics-port', type=int,
+                       help='Expose les métriques de la file d\'alertes et du planificateur sur ce port (/metrics)')
+    parser.add_argument('--compact', action='store_true',
+                       help='Applique la rétention et agrège l\'historique puis quitte')
     parser.add_argument('--verbose', '-v', action='store_true',
                        help='Mode verbeux')
     
@@ -432,21 +612,41 @@ def main():
         logging.getLogger().setLevel(logging.DEBUG)
     
     try:
-        tracker = ErrorBudgetTracker(args.config, args.prometheus, args.db)
+        configs = load_slo_configs(args.config)
+        if args.service:
+            configs = [config for config in configs if config['service'] == args.service]
+            if not configs:
+                logger.error(f"[ERROR] Service inconnu: {args.service}")
+                sys.exit(1)
+        
+        tracker = ErrorBudgetTracker(configs, args.prometheus, args.db)
         
         if args.webhook:
             tracker.alert_webhook_url = args.webhook
         if args.email:
             tracker.alert_email = args.email
-        
-        if args.dashboard:
-            tracker.print_dashboard()
+        if args.metrics_port:
+            tracker.metrics_registry = CollectorRegistry()
+            tracker.metrics_registry.register(tracker.dispatcher)
+            start_http_server(args.metrics_port, registry=tracker.metrics_registry)
+        if args.serve:
+            DashboardAPI(tracker.store, tracker.get_snapshot,
+                         tracker.slo_config.get('forecast')).start(args.serve)
+        
+        if args.compact:
+            steps = tracker.store.compact()
+            logger.info(f"[OK] Historique compacté ({steps} passes)")
+        elif args.dashboard:
+            tracker.print_dashboard(refresh=False, hours=args.hours)
         elif args.monitor:
-            tracker.start_monitoring(args.interval)
+            interval = args.interval_seconds / 60 if args.interval_seconds else args.interval
+            tracker.start_monitoring(interval, args.jitter)
         else:
             # Mode par défaut: collecte unique
             tracker.collect_metrics()
-            tracker.print_dashboard()
+            tracker.print_dashboard(refresh=False)
+            tracker.dispatcher.flush()
+            tracker.dispatcher.stop()
             
     except KeyboardInterrupt:
         logger.info("\n[STOP] Programme interrompu par l'utilisateur")
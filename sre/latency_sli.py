@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+SLIs de latence calculés localement à partir des compteurs de buckets d'histogramme
+Une seule requête par fenêtre fournit tous les quantiles et le ratio de bonnes requêtes
+"""
+
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Une requête instantanée par fenêtre: accroissement de chaque bucket sur la fenêtre
+DEFAULT_BUCKET_QUERY = "sum by (le) (increase(http_request_duration_seconds_bucket[{window}]))"
+
+
+def parse_bucket_vector(results: List[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+    """Convertit un vecteur Prometheus par 'le' en bornes triées et compteurs cumulés"""
+    counts: Dict[float, float] = {}
+    for result in results:
+        le = result.get('metric', {}).get('le')
+        if le is None or 'value' not in result:
+            continue
+        try:
+            bound = float('inf') if le == '+Inf' else float(le)
+            counts[bound] = counts.get(bound, 0.0) + float(result['value'][1])
+        except (ValueError, IndexError):
+            continue
+
+    if not counts:
+        return np.empty(0), np.empty(0)
+
+    bounds = np.array(sorted(counts))
+    cumulative = np.array([counts[b] for b in bounds])
+    # Les compteurs cumulés doivent être monotones (increase() peut introduire du bruit)
+    cumulative = np.maximum.accumulate(cumulative)
+    return bounds, cumulative
+
+
+def histogram_quantiles(bounds: np.ndarray, cumulative: np.ndarray,
+                        quantiles: Sequence[float]) -> np.ndarray:
+    """Quantiles par interpolation linéaire dans les buckets (sémantique histogram_quantile)
+
+    cumulative peut avoir plusieurs dimensions (ex: fenêtres x buckets); le résultat
+    a la forme cumulative.shape[:-1] + (len(quantiles),).
+    """
+    q = np.asarray(quantiles, dtype=float)
+    cumulative = np.asarray(cumulative, dtype=float)
+    total = cumulative[..., -1:]
+    rank = q * total  # (..., Q)
+
+    # Index du premier bucket dont le compteur cumulé atteint le rang
+    index = (cumulative[..., None, :] < rank[..., :, None]).sum(axis=-1)
+    index = np.minimum(index, len(bounds) - 1)
+
+    finite_bounds = np.where(np.isinf(bounds), np.nan, bounds)
+    highest_finite = np.nanmax(finite_bounds) if np.isfinite(finite_bounds).any() else np.nan
+
+    upper = bounds[index]
+    lower = np.where(index > 0, bounds[np.maximum(index - 1, 0)], 0.0)
+    lower = np.where((index == 0) & (bounds[0] <= 0), bounds[0], lower)
+
+    count_upper = np.take_along_axis(cumulative, index, axis=-1)
+    count_lower = np.where(index > 0, np.take_along_axis(cumulative, np.maximum(index - 1, 0), axis=-1), 0.0)
+    in_bucket = count_upper - count_lower
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fraction = np.where(in_bucket > 0, (rank - count_lower) / in_bucket, 0.0)
+        values = lower + (upper - lower) * fraction
+
+    # Rang dans le bucket +Inf: on retourne la plus grande borne finie
+    values = np.where(np.isinf(upper), highest_finite, values)
+    return np.where(total > 0, values, np.nan)
+
+
+def good_event_ratio(bounds: np.ndarray, cumulative: np.ndarray, threshold: float) -> np.ndarray:
+    """Fraction des requêtes plus rapides que le seuil, interpolée dans le bucket"""
+    cumulative = np.asarray(cumulative, dtype=float)
+    total = cumulative[..., -1]
+    i = min(int(np.searchsorted(bounds, threshold, side='left')), len(bounds) - 1)
+
+    count_lower = cumulative[..., i - 1] if i > 0 else np.zeros_like(total)
+    lower = bounds[i - 1] if i > 0 else 0.0
+    upper = bounds[i]
+
+    if np.isinf(upper):
+        # Au-delà de la dernière borne finie: le bucket +Inf est compté comme lent
+        good = count_lower
+    elif upper <= lower:
+        good = cumulative[..., i]
+    else:
+        good = count_lower + (cumulative[..., i] - count_lower) * (threshold - lower) / (upper - lower)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(total > 0, good / total, 1.0)
+
+
+def group_latency_slis(slo_config: Dict) -> Dict[str, List[str]]:
+    """Regroupe les SLIs de latence par requête de buckets (une requête par groupe)"""
+    groups: Dict[str, List[str]] = {}
+    for name, sli in slo_config['slis'].items():
+        measurement = sli['measurement']
+        if measurement.get('type') == 'histogram':
+            groups.setdefault(measurement.get('bucket_query', DEFAULT_BUCKET_QUERY), []).append(name)
+    return groups
+
+
+def compute_latency_slis(slo_config: Dict, bounds: np.ndarray, cumulative: np.ndarray,
+                         window_minutes: float, sli_names: Optional[List[str]] = None) -> Dict[str, Dict]:
+    """Calcule quantile, ratio de bonnes requêtes et burn rate de chaque SLI de latence"""
+    latency_slis = {
+        name: sli for name, sli in slo_config['slis'].items()
+        if sli['measurement'].get('type') == 'histogram'
+        and (sli_names is None or name in sli_names)
+    }
+    if not latency_slis or len(bounds) == 0:
+        return {}
+
+    names = list(latency_slis)
+    quantiles = [latency_slis[name]['measurement'].get('quantile', 0.95) for name in names]
+    values = histogram_quantiles(bounds, cumulative, quantiles)
+    total = float(cumulative[-1])
+    slo_period_minutes = slo_config.get('slo_period_days', 30) * 24 * 60
+
+    results = {}
+    for name, quantile, value in zip(names, quantiles, values):
+        threshold = latency_slis[name]['slo_target']
+        ratio = float(good_event_ratio(bounds, cumulative, threshold))
+        budget = 1.0 - quantile
+        burn_rate = (1.0 - ratio) / budget if budget > 0 else 0.0
+        results[name] = {
+            'quantile': quantile,
+            'value_seconds': float(value),
+            'threshold_seconds': threshold,
+            'good_ratio': ratio,
+            'total_requests': total,
+            'burn_rate': burn_rate,
+            # Part du budget de la période SLO consommée pendant la fenêtre
+            'error_budget_consumed': burn_rate * window_minutes / slo_period_minutes
+        }
+    return results
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Planificateur asyncio de la surveillance de l'error budget
+Cycles à cadence fixe (intervalles inférieurs à la minute, jitter), fenêtres
+évaluées en parallèle, détection des dépassements et des ticks sautés
+"""
+
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime
+from typing import List, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+class MonitorScheduler:
+    """Exécute les cycles de collecte d'un ErrorBudgetTracker sur une boucle asyncio"""
+
+    def __init__(self, tracker, interval_seconds: float, jitter_seconds: float = 0,
+                 windows: Optional[List[int]] = None):
+        self.tracker = tracker
+        self.interval_seconds = interval_seconds
+        # Le jitter décale chaque cycle sans dériver la cadence de référence
+        self.jitter_seconds = min(jitter_seconds, interval_seconds / 2)
+        self.windows = windows or [1, 6, 24]
+        self.current: Optional[asyncio.Task] = None
+        self.stopping: Optional[asyncio.Event] = None
+
+        # Métriques non enregistrées globalement: exposées via collect()
+        self.duration = Histogram('slo_tracker_evaluation_duration_seconds',
+                                  'Durée des cycles d\'évaluation', buckets=DURATION_BUCKETS, registry=None)
+        self.overruns = Counter('slo_tracker_overruns', 'Cycles plus longs que l\'intervalle', registry=None)
+        self.skipped = Counter('slo_tracker_skipped_ticks', 'Ticks sautés (cycle précédent en cours)',
+                               registry=None)
+        self.failures = Counter('slo_tracker_cycle_failures', 'Cycles en échec', registry=None)
+        self.last_success = Gauge('slo_tracker_last_success_timestamp_seconds',
+                                  'Horodatage du dernier cycle réussi', registry=None)
+
+    def collect(self):
+        # Permet d'enregistrer le planificateur dans un CollectorRegistry
+        for metric in (self.duration, self.overruns, self.skipped, self.failures, self.last_success):
+            yield from metric.collect()
+
+    async def run_cycle(self):
+        """Un cycle de collecte: fenêtres et moteur multi-fenêtres évalués en parallèle"""
+        now = datetime.now()
+
+        if self.tracker.batch_evaluator:
+            # Déjà parallélisé par requêtes groupées (moteur multi-fenêtres compris)
+            await asyncio.to_thread(self.tracker.collect_services_metrics, now, self.windows)
+            return
+
+        results = await asyncio.gather(
+            asyncio.to_thread(self.tracker.collect_multi_window_alerts, now),
+            *(asyncio.to_thread(self.tracker.collect_window, now, window_hours)
+              for window_hours in self.windows)
+        )
+        await asyncio.to_thread(self.tracker.complete_cycle, list(results[1:]), results[0])
+
+    async def timed_cycle(self, tick: int):
+        """Exécute un cycle et mesure sa durée"""
+        started = time.monotonic()
+        try:
+            await self.run_cycle()
+            self.last_success.set_to_current_time()
+        except Exception as e:
+            self.failures.inc()
+            logger.error(f"[ERROR] Cycle {tick} en échec: {e}")
+        finally:
+            elapsed = time.monotonic() - started
+            self.duration.observe(elapsed)
+            if elapsed > self.interval_seconds:
+                self.overruns.inc()
+                logger.warning(f"[WARN] Cycle {tick} en dépassement: {elapsed:.2f}s "
+                               f"pour un intervalle de {self.interval_seconds:g}s")
+
+    async def run(self, max_ticks: Optional[int] = None):
+        """Boucle à cadence fixe: les ticks manqués sont comptés, jamais rattrapés en rafale"""
+        loop = asyncio.get_running_loop()
+        self.stopping = asyncio.Event()
+        next_tick = loop.time()
+        tick = 0
+
+        while not self.stopping.is_set() and (max_ticks is None or tick < max_ticks):
+            delay = next_tick + random.uniform(0, self.jitter_seconds) - loop.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self.stopping.wait(), delay)
+                    break
+                except asyncio.TimeoutError:
+                    pass
+
+            # Boucle en retard (hôte suspendu, etc.): on réaligne sur la cadence
+            late_ticks = int((loop.time() - next_tick) // self.interval_seconds)
+            if late_ticks > 0:
+                self.skipped.inc(late_ticks)
+                logger.warning(f"[WARN] {late_ticks} tick(s) manqué(s), réalignement de la cadence")
+                next_tick += late_ticks * self.interval_seconds
+
+            tick += 1
+            if self.current and not self.current.done():
+                self.skipped.inc()
+                logger.warning(f"[WARN] Tick {tick} sauté: le cycle précédent est toujours en cours")
+            else:
+                self.current = asyncio.create_task(self.timed_cycle(tick))
+            next_tick += self.interval_seconds
+
+        if self.current:
+            await self.current
+
+    def stop(self):
+        """Demande l'arrêt après le cycle en cours"""
+        if self.stopping:
+            self.stopping.set()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Exporter Prometheus des SLOs calculés pour le lab SRE
+Recalcule périodiquement burn rate, error budget consommé, temps avant épuisement
+et états d'alerte, puis les sert depuis la mémoire à chaque scrape /metrics
+"""
+
+import argparse
+import logging
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from prometheus_client import CollectorRegistry, start_http_server
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+from alert_engine import MultiWindowBurnRateEngine
+from slo_registry import load_slo_configs, BatchedSLOEvaluator
+
+# Configuration du logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+SLI_LABELS = ['service', 'sli', 'window']
+
+
+def window_label(minutes: int) -> str:
+    """Libellé de fenêtre lisible (1h, 30m...)"""
+    return f"{minutes // 60}h" if minutes % 60 == 0 else f"{minutes}m"
+
+
+class SnapshotCollector:
+    """Collector servant une liste de métriques préconstruite (aucun calcul au scrape)
+
+    live_families() ajoute à chaque scrape des métriques construites depuis des compteurs
+    courants, servies même quand le recalcul du snapshot échoue.
+    """
+
+    def __init__(self, live_families: Optional[Callable[[], List]] = None):
+        self.families = []
+        self.live_families = live_families
+
+    def collect(self):
+        # Lecture d'une référence remplacée atomiquement par publish()
+        yield from self.families
+        if self.live_families:
+            yield from self.live_families()
+
+    def publish(self, families: List):
+        """Remplace le snapshot servi"""
+        self.families = families
+
+
+class SLOExporter:
+    """Recalcule l'état des SLOs en arrière-plan et l'expose via prometheus-client"""
+
+    def __init__(self, slo_configs: List[Dict], prometheus_url: str = "http://localhost:9090",
+                 interval_seconds: float = 60, windows_minutes: Optional[List[int]] = None):
+        self.slo_configs = slo_configs
+        self.interval_seconds = interval_seconds
+        self.windows_minutes = windows_minutes or [60, 360, 1440]
+        self.evaluator = BatchedSLOEvaluator(slo_configs, prometheus_url)
+        self.engine = MultiWindowBurnRateEngine.from_slo_configs(slo_configs)
+        # Curseur par SLO: un service dont les échantillons arrivent en retard ne perd rien
+        self.engine_cursors: Dict[str, datetime] = {}
+
+        # Métriques de fonctionnement construites au scrape: à jour pendant une panne du backend
+        self.collector = SnapshotCollector(self.exporter_families)
+        self.registry = CollectorRegistry()
+        self.registry.register(self.collector)
+
+        self.stop_event = threading.Event()
+        self.refresh_failures = 0
+        self.last_success = 0.0
+        self.last_duration = 0.0
+        self.snapshot: Dict = {}
+
+    def update_engine(self, now: datetime) -> List[Dict]:
+        """Alimente le moteur multi-fenêtres avec les nouveaux échantillons et l'évalue"""
+        if not self.engine.slos:
+            return []
+
+        # Une plage commune depuis le curseur le plus ancien, filtrée ensuite SLO par SLO
+        default_start = now - timedelta(minutes=self.engine.max_window_minutes)
+        start_time = min(self.engine_cursors.get(slo_id, default_start) for slo_id in self.engine.slos)
+        series = self.evaluator.fetch_event_counts(start_time, now, self.engine.step_seconds)
+
+        for slo_id, samples in series.items():
+            if slo_id not in self.engine.slos:
+                continue
+            cursor = self.engine_cursors.get(slo_id)
+            cursor_ts = cursor.timestamp() if cursor else None
+            self.engine.observe_many(slo_id, (s for s in samples if cursor_ts is None or s[0] > cursor_ts))
+            if samples and (cursor_ts is None or samples[-1][0] > cursor_ts):
+                self.engine_cursors[slo_id] = datetime.fromtimestamp(samples[-1][0])
+        return self.engine.evaluate(now.timestamp())
+
+    def compute_snapshot(self) -> Dict:
+        """Calcule l'état complet des SLOs (requêtes groupées + moteur d'alertes)"""
+        now = datetime.now()
+        results = self.evaluator.evaluate(self.windows_minutes, now)
+        alerts = self.update_engine(now)
+
+        firing = {(alert['slo'], alert['name']) for alert in alerts}
+        alert_states = {
+            slo_id: {name: (slo_id, name) in firing for name in state.policies}
+            for slo_id, state in self.engine.slos.items()
+        }
+        multi_window = {slo_id: self.engine.burn_rates(slo_id) for slo_id in self.engine.slos}
+
+        return {
+            'timestamp': now.timestamp(),
+            'results': results,
+            'alerts': alerts,
+            'alert_states': alert_states,
+            'multi_window_burn_rates': multi_window
+        }
+
+    def build_families(self, snapshot: Dict) -> List:
+        """Construit les familles de métriques à servir"""
+        sli_ratio = GaugeMetricFamily('slo_sli_ratio', 'Ratio de bons événements du SLI', labels=SLI_LABELS)
+        burn_rate = GaugeMetricFamily('slo_burn_rate', 'Burn rate de l\'error budget', labels=SLI_LABELS)
+        consumed = GaugeMetricFamily('slo_error_budget_consumed_ratio', 'Error budget consommé',
+                                     labels=SLI_LABELS)
+        exhaustion = GaugeMetricFamily('slo_time_to_exhaustion_hours',
+                                       'Temps estimé avant épuisement de l\'error budget', labels=SLI_LABELS)
+        latency = GaugeMetricFamily('slo_latency_seconds', 'Quantile de latence calculé depuis les buckets',
+                                    labels=SLI_LABELS + ['quantile'])
+
+        for service, slis in snapshot['results'].items():
+            for sli_name, windows in slis.items():
+                last_hour = windows.get(60)
+                for minutes, metrics in windows.items():
+                    labels = [service, sli_name, window_label(minutes)]
+                    burn_rate.add_metric(labels, metrics['burn_rate'])
+                    consumed.add_metric(labels, metrics['error_budget_consumed'])
+
+                    if 'availability' in metrics:
+                        sli_ratio.add_metric(labels, metrics['availability'])
+                        if metrics['burn_rate'] > 0 and last_hour:
+                            remaining = max(0.0, 1 - last_hour['error_budget_consumed'])
+                            exhaustion.add_metric(labels, remaining / metrics['burn_rate'])
+                    else:
+                        sli_ratio.add_metric(labels, metrics['good_ratio'])
+                        latency.add_metric(labels + [str(metrics['quantile'])], metrics['value_seconds'])
+
+        multi_window = GaugeMetricFamily('slo_multiwindow_burn_rate',
+                                         'Burn rate glissant du moteur multi-fenêtres', labels=SLI_LABELS)
+        for slo_id, rates in snapshot['multi_window_burn_rates'].items():
+            service, sli_name = slo_id.split(':', 1)
+            for minutes, rate in rates.items():
+                multi_window.add_metric([service, sli_name, window_label(minutes)], rate)
+
+        alert_firing = GaugeMetricFamily('slo_alert_firing', 'État des alertes burn rate multi-fenêtres',
+                                         labels=['service', 'sli', 'alert', 'severity'])
+        for slo_id, states in snapshot['alert_states'].items():
+            service, sli_name = slo_id.split(':', 1)
+            policies = self.engine.slos[slo_id].policies
+            for name, is_firing in states.items():
+                alert_firing.add_metric([service, sli_name, name, policies[name]['severity']],
+                                        1.0 if is_firing else 0.0)
+
+        return [sli_ratio, burn_rate, consumed, exhaustion, latency, multi_window, alert_firing]
+
+    def exporter_families(self) -> List:
+        """Métriques de fonctionnement de l'exporter"""
+        last_success = GaugeMetricFamily('slo_exporter_last_success_timestamp_seconds',
+                                         'Horodatage du dernier recalcul réussi')
+        last_success.add_metric([], self.last_success)
+        duration = GaugeMetricFamily('slo_exporter_refresh_duration_seconds', 'Durée du dernier recalcul')
+        duration.add_metric([], self.last_duration)
+        failures = CounterMetricFamily('slo_exporter_refresh_failures', 'Recalculs en échec')
+        failures.add_metric([], self.refresh_failures)
+        return [last_success, duration, failures]
+
+    def refresh(self):
+        """Recalcule le snapshot et le publie"""
+        started = time.perf_counter()
+        try:
+            self.snapshot = self.compute_snapshot()
+            self.last_duration = time.perf_counter() - started
+            self.last_success = time.time()
+            self.collector.publish(self.build_families(self.snapshot))
+            logger.info(f"Snapshot SLO recalculé en {self.last_duration:.2f}s "
+                        f"({len(self.snapshot['results'])} services, "
+                        f"{len(self.snapshot['alerts'])} alertes actives)")
+        except Exception as e:
+            self.refresh_failures += 1
+            logger.error(f"Erreur lors du recalcul des SLOs: {e}")
+
+    def run(self):
+        """Boucle de recalcul périodique"""
+        while not self.stop_event.is_set():
+            started = time.monotonic()
+            self.refresh()
+            self.stop_event.wait(max(0.0, self.interval_seconds - (time.monotonic() - started)))
+
+    def start(self, port: int, addr: str = '0.0.0.0') -> threading.Thread:
+        """Démarre le serveur /metrics et la boucle de recalcul en arrière-plan"""
+        start_http_server(port, addr=addr, registry=self.registry)
+        logger.info(f"📡 Exporter SLO sur http://{addr}:{port}/metrics "
+                    f"(recalcul toutes les {self.interval_seconds}s)")
+        thread = threading.Thread(target=self.run, name='slo-exporter', daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        """Arrête la boucle de recalcul"""
+        self.stop_event.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Exporter Prometheus des SLOs calculés')
+    parser.add_argument('--config', default='slo_config.json',
+                       help='Fichier ou répertoire de configuration SLO (défaut: slo_config.json)')
+    parser.add_argument('--prometheus', default='http://localhost:9090',
+                       help='URL de Prometheus (défaut: http://localhost:9090)')
+    parser.add_argument('--port', type=int, default=9464,
+                       help='Port du endpoint /metrics (défaut: 9464)')
+    parser.add_argument('--interval', type=float, default=60,
+                       help='Intervalle de recalcul en secondes (défaut: 60)')
+    parser.add_argument('--verbose', '-v', action='store_true',
+                       help='Mode verbeux')
+
+    args = parser.parse_args()
+
+    if args.verbose:
+        logging.getLogger().setLevel(logging.DEBUG)
+
+    try:
+        exporter = SLOExporter(load_slo_configs(args.config), args.prometheus, args.interval)
+        thread = exporter.start(args.port)
+        while thread.is_alive():
+            thread.join(1)
+    except KeyboardInterrupt:
+        logger.info("\n[STOP] Exporter arrêté par l'utilisateur")
+    except Exception as e:
+        logger.error(f"[ERROR] Erreur: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
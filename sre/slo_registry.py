@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Évaluation groupée des SLOs multi-services pour le lab SRE
+Charge un répertoire de configurations ou une configuration multi-services et
+regroupe les requêtes compatibles en requêtes PromQL 'sum by (service)'
+"""
+
+import copy
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from latency_sli import parse_bucket_vector, compute_latency_slis
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SERVICE_LABEL = 'service'
+PROMQL_REGEX_SPECIAL = set('.^$*+?()[]{}|\\')
+
+
+def deep_merge(base: Dict, override: Dict) -> Dict:
+    """Fusionne récursivement override dans une copie de base"""
+    merged = copy.deepcopy(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = deep_merge(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+def expand_slo_config(config: Dict) -> List[Dict]:
+    """Déplie une configuration multi-services ('services': [...]) en configurations unitaires"""
+    if 'services' not in config:
+        return [config]
+
+    defaults = {key: value for key, value in config.items() if key != 'services'}
+    return [deep_merge(defaults, service) for service in config['services']]
+
+
+def load_slo_configs(path: str) -> List[Dict]:
+    """Charge un fichier de config SLO, multi-services ou non, ou un répertoire de configs"""
+    if os.path.isdir(path):
+        filenames = sorted(
+            os.path.join(path, name) for name in os.listdir(path) if name.endswith('.json')
+        )
+    else:
+        filenames = [path]
+
+    configs = []
+    for filename in filenames:
+        with open(filename, 'r', encoding='utf-8-sig') as f:
+            configs.extend(expand_slo_config(json.load(f)))
+
+    services = [config['service'] for config in configs]
+    duplicates = {service for service in services if services.count(service) > 1}
+    if duplicates:
+        raise ValueError(f"Services définis plusieurs fois: {', '.join(sorted(duplicates))}")
+    return configs
+
+
+def promql_regex_escape(value: str) -> str:
+    """Échappe une valeur pour un matcher =~ dans une chaîne PromQL"""
+    return ''.join('\\\\' + c if c in PROMQL_REGEX_SPECIAL else c for c in value)
+
+
+class BatchedSLOEvaluator:
+    """Évalue les SLOs de nombreux services avec un nombre de requêtes indépendant du nombre de services"""
+
+    def __init__(self, slo_configs: List[Dict], prometheus_url: str = "http://localhost:9090",
+                 session: Optional[requests.Session] = None, max_workers: int = 8):
+        self.configs = {config['service']: config for config in slo_configs}
+        self.prometheus_url = prometheus_url.rstrip('/')
+        self.session = session or requests.Session()
+        self.max_workers = max_workers
+        self.ratio_groups, self.latency_groups = self.build_groups()
+        self.queries_sent = 0
+
+    def build_groups(self) -> Tuple[Dict[Tuple, List[Tuple[str, str]]], Dict[Tuple, List[Tuple[str, str]]]]:
+        """Regroupe les SLIs partageant métrique, filtre et label de service"""
+        ratio_groups: Dict[Tuple, List[Tuple[str, str]]] = {}
+        latency_groups: Dict[Tuple, List[Tuple[str, str]]] = {}
+
+        for service, config in self.configs.items():
+            label = config.get('service_label', DEFAULT_SERVICE_LABEL)
+            for sli_name, sli in config.get('slis', {}).items():
+                measurement = sli['measurement']
+                if measurement.get('type') == 'ratio' and 'good_filter' in measurement:
+                    key = (measurement['metric'], measurement['good_filter'], label)
+                    ratio_groups.setdefault(key, []).append((service, sli_name))
+                elif measurement.get('type') == 'histogram' and 'metric' in measurement:
+                    key = (measurement['metric'], label)
+                    latency_groups.setdefault(key, []).append((service, sli_name))
+
+        return ratio_groups, latency_groups
+
+    def query_vector(self, query: str, at_time: datetime) -> List[Dict]:
+        """Exécute une requête instantanée (POST: le sélecteur de services peut être long)"""
+        self.queries_sent += 1
+        try:
+            response = self.session.post(
+                f"{self.prometheus_url}/api/v1/query",
+                data={'query': query, 'time': int(at_time.timestamp())},
+                timeout=30
+            )
+
+            if response.status_code == 200:
+                data = response.json()
+                if data['status'] == 'success':
+                    return data['data']['result']
+                logger.error(f"Erreur Prometheus: {data.get('error', 'Unknown error')}")
+            else:
+                logger.error(f"Erreur HTTP: {response.status_code}")
+        except Exception as e:
+            logger.error(f"Erreur lors de la requête Prometheus: {e}")
+        return []
+
+    @staticmethod
+    def service_selector(label: str, members: List[Tuple[str, str]]) -> str:
+        """Construit le matcher de services d'un groupe"""
+        services = sorted({service for service, _ in members})
+        return f'{label}=~"{"|".join(promql_regex_escape(s) for s in services)}"'
+
+    def query_matrix(self, query: str, start_time: datetime, end_time: datetime,
+                     step_seconds: int) -> List[Dict]:
+        """Exécute une requête sur une plage de temps (POST)"""
+        self.queries_sent += 1
+        try:
+            response = self.session.post(
+                f"{self.prometheus_url}/api/v1/query_range",
+                data={
+                    'query': query,
+                    'start': int(start_time.timestamp()),
+                    'end': int(end_time.timestamp()),
+                    'step': str(step_seconds)
+                },
+                timeout=60
+            )
+
+            if response.status_code == 200:
+                data = response.json()
+                if data['status'] == 'success':
+                    return data['data']['result']
+                logger.error(f"Erreur Prometheus: {data.get('error', 'Unknown error')}")
+            else:
+                logger.error(f"Erreur HTTP: {response.status_code}")
+        except Exception as e:
+            logger.error(f"Erreur lors de la requête Prometheus: {e}")
+        return []
+
+    def fetch_event_counts(self, start_time: datetime, end_time: datetime,
+                           step_seconds: int = 60) -> Dict[str, List[Tuple[float, float, float]]]:
+        """Compteurs good/total par pas de temps de tous les SLIs ratio ('service:sli' -> échantillons)"""
+        window = f"{step_seconds}s"
+        series: Dict[str, List[Tuple[float, float, float]]] = {}
+
+        for key, members in self.ratio_groups.items():
+            metric, good_filter, label = key
+            selector = self.service_selector(label, members)
+            good = self.query_matrix(
+                f'sum by ({label}) (increase({metric}{{{selector}, {good_filter}}}[{window}]))',
+                start_time, end_time, step_seconds
+            )
+            valid = self.query_matrix(
+                f'sum by ({label}) (increase({metric}{{{selector}}}[{window}]))',
+                start_time, end_time, step_seconds
+            )
+
+            good_by_service: Dict[str, Dict[float, float]] = {}
+            for result in good:
+                service = result.get('metric', {}).get(label)
+                good_by_service[service] = {float(ts): float(v) for ts, v in result.get('values', [])}
+
+            valid_by_service: Dict[str, List] = {}
+            for result in valid:
+                valid_by_service[result.get('metric', {}).get(label)] = result.get('values', [])
+
+            for service, sli_name in members:
+                good_values = good_by_service.get(service, {})
+                series[f"{service}:{sli_name}"] = [
+                    (float(ts), good_values.get(float(ts), 0.0), float(total))
+                    for ts, total in valid_by_service.get(service, [])
+                ]
+
+        return series
+
+    def build_queries(self, window_minutes: int) -> List[Tuple[str, Tuple, str]]:
+        """Liste (type, clé de groupe, requête) des requêtes groupées pour une fenêtre"""
+        window = f"{window_minutes}m"
+        queries = []
+
+        for key, members in self.ratio_groups.items():
+            metric, good_filter, label = key
+            selector = self.service_selector(label, members)
+            queries.append(('good', key, f'sum by ({label}) (increase({metric}{{{selector}, {good_filter}}}[{window}]))'))
+            queries.append(('valid', key, f'sum by ({label}) (increase({metric}{{{selector}}}[{window}]))'))
+
+        for key, members in self.latency_groups.items():
+            metric, label = key
+            selector = self.service_selector(label, members)
+            queries.append(('buckets', key, f'sum by ({label}, le) (increase({metric}_bucket{{{selector}}}[{window}]))'))
+
+        return queries
+
+    def evaluate(self, windows_minutes: List[int],
+                 at_time: Optional[datetime] = None) -> Dict[str, Dict[str, Dict[int, Dict]]]:
+        """Évalue tous les SLOs; résultat service -> SLI -> fenêtre (minutes) -> métriques"""
+        at_time = at_time or datetime.now()
+        jobs = [
+            (window_minutes, kind, key, query)
+            for window_minutes in windows_minutes
+            for kind, key, query in self.build_queries(window_minutes)
+        ]
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            vectors = list(executor.map(lambda job: self.query_vector(job[3], at_time), jobs))
+
+        results: Dict[str, Dict[str, Dict[int, Dict]]] = {service: {} for service in self.configs}
+        ratio_counts: Dict[Tuple[int, Tuple], Dict[str, Dict[str, float]]] = {}
+
+        for (window_minutes, kind, key, _), vector in zip(jobs, vectors):
+            label = key[-1]
+            if kind == 'buckets':
+                self.fan_out_latency(results, key, label, vector, window_minutes)
+                continue
+
+            counts = ratio_counts.setdefault((window_minutes, key), {'good': {}, 'valid': {}})
+            for sample in vector:
+                service = sample.get('metric', {}).get(label)
+                try:
+                    counts[kind][service] = float(sample['value'][1])
+                except (KeyError, ValueError, IndexError):
+                    continue
+
+        for (window_minutes, key), counts in ratio_counts.items():
+            for service, sli_name in self.ratio_groups[key]:
+                good = counts['good'].get(service, 0.0)
+                valid = counts['valid'].get(service, 0.0)
+                results[service].setdefault(sli_name, {})[window_minutes] = self.ratio_metrics(
+                    self.configs[service]['slis'][sli_name]['slo_target'], good, valid, window_minutes
+                )
+
+        return results
+
+    def fan_out_latency(self, results: Dict, key: Tuple, label: str,
+                        vector: List[Dict], window_minutes: int):
+        """Répartit les buckets par service et calcule les SLIs de latence"""
+        by_service: Dict[str, List[Dict]] = {}
+        for sample in vector:
+            by_service.setdefault(sample.get('metric', {}).get(label), []).append(sample)
+
+        sli_names_by_service: Dict[str, List[str]] = {}
+        for service, sli_name in self.latency_groups[key]:
+            sli_names_by_service.setdefault(service, []).append(sli_name)
+
+        for service, sli_names in sli_names_by_service.items():
+            bounds, cumulative = parse_bucket_vector(by_service.get(service, []))
+            latency = compute_latency_slis(self.configs[service], bounds, cumulative,
+                                           window_minutes, sli_names)
+            for sli_name, metrics in latency.items():
+                results[service].setdefault(sli_name, {})[window_minutes] = metrics
+
+    @staticmethod
+    def ratio_metrics(slo_target: float, good: float, valid: float, window_minutes: int) -> Dict:
+        """Métriques d'un SLI ratio (mêmes définitions que BurnRateCalculator)"""
+        availability = good / valid if valid > 0 else 0.0
+        if slo_target >= 1.0 or valid <= 0:
+            error_budget_consumed = 0.0
+        else:
+            error_budget_consumed = min((1 - availability) / (1 - slo_target), 1.0)
+        return {
+            'good': good,
+            'valid': valid,
+            'availability': availability,
+            'error_budget_consumed': error_budget_consumed,
+            'burn_rate': error_budget_consumed / (window_minutes / 60)
+        }
+
+    def print_report(self, windows_minutes: List[int]):
+        """Affiche un rapport compact par service"""
+        results = self.evaluate(windows_minutes)
+
+        print("\n" + "="*80)
+        print("[INFO] RAPPORT MULTI-SERVICES - ERROR BUDGET")
+        print("="*80)
+        print(f"Services: {len(self.configs)}, requêtes Prometheus: {self.queries_sent}")
+        print()
+
+        for service in sorted(results):
+            print(f"🧩 {service}")
+            for sli_name, windows in sorted(results[service].items()):
+                parts = []
+                for window_minutes, metrics in sorted(windows.items()):
+                    if 'availability' in metrics:
+                        parts.append(f"{window_minutes // 60}h: {metrics['availability']*100:.3f}% "
+                                     f"(budget {metrics['error_budget_consumed']*100:.1f}%)")
+                    else:
+                        parts.append(f"{window_minutes // 60}h: {metrics['value_seconds']:.3f}s "
+                                     f"(burn {metrics['burn_rate']:.2f}x)")
+                print(f"   {sli_name:<14} " + " | ".join(parts))
+            print()
+
+        print("="*80)